@@ -0,0 +1,81 @@
+"""Main function to benchmark the hot paths without a sound card"""
+import argparse
+import json
+import os
+import platform
+import sys
+
+# pynput needs a display to create a Keyboard, the benchmarks never listen to real keys
+if sys.platform.startswith("linux") and not os.environ.get("DISPLAY"):
+    os.environ.setdefault("PYNPUT_BACKEND", "dummy")
+
+# pylint: disable=wrong-import-position
+from src.audioserver import AudioServer
+from src.benchmark import (
+    run_benchmarks,
+    compare_results,
+    ALL_EDOS,
+    DEFAULT_REPEATS,
+    DEFAULT_TOLERANCE,
+)
+
+
+def parse_edos(value):
+    """Parses edos like "1-60" or "12,24,31" """
+    edos = []
+    for part in value.split(","):
+        if "-" in part:
+            low, high = part.split("-")
+            edos.extend(range(int(low), int(high) + 1))
+        else:
+            edos.append(int(part))
+    return edos
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark scale building, key dispatch, graph rebuilds and voice cost"
+    )
+    parser.add_argument(
+        "--edos",
+        type=parse_edos,
+        help='edos to benchmark, like "1-60" or "12,24,31"',
+        default=ALL_EDOS,
+    )
+    parser.add_argument(
+        "--repeats",
+        type=int,
+        help="times every measurement is repeated",
+        default=DEFAULT_REPEATS,
+    )
+    parser.add_argument("--output", help="json file to write the results to")
+    parser.add_argument("--baseline", help="json results to compare against")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        help="fraction slower than the baseline that counts as a regression",
+        default=DEFAULT_TOLERANCE,
+    )
+    args = parser.parse_args()
+
+    server = AudioServer(offline=True)
+    results = run_benchmarks(server, args.edos, args.repeats)
+    report = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "repeats": args.repeats,
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            json.dump(report, output_file, indent=2, sort_keys=True)
+    else:
+        print(json.dumps(report, indent=2, sort_keys=True))
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as baseline_file:
+            baseline = json.load(baseline_file)["results"]
+        regressions = compare_results(results, baseline, args.tolerance)
+        for name, previous, current in regressions:
+            print(f"REGRESSION {name}: {previous:.6g}s -> {current:.6g}s")
+        sys.exit(1 if regressions else 0)
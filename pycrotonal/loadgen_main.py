@@ -0,0 +1,68 @@
+"""Main function to find the keypress rate the input path can sustain without a sound card"""
+import argparse
+import json
+import os
+import sys
+
+# pynput needs a display to create a Keyboard, the load never comes from real keys
+if sys.platform.startswith("linux") and not os.environ.get("DISPLAY"):
+    os.environ.setdefault("PYNPUT_BACKEND", "dummy")
+
+# pylint: disable=wrong-import-position
+from src.loadgen import (
+    run_load,
+    is_sustained,
+    PATTERNS,
+    DEFAULT_DURATION,
+    DEFAULT_EDO,
+)
+
+DEFAULT_RATES = "500,2000,8000,32000"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Send synthetic keypresses through the keyboard, dispatcher and voices"
+    )
+    parser.add_argument(
+        "--patterns",
+        help="comma separated load patterns out of " + ", ".join(PATTERNS),
+        default="mixed",
+    )
+    parser.add_argument(
+        "--rates",
+        help="comma separated events per second to try, from lowest to highest",
+        default=DEFAULT_RATES,
+    )
+    parser.add_argument(
+        "--duration",
+        type=float,
+        help="seconds every rate is sent for",
+        default=DEFAULT_DURATION,
+    )
+    parser.add_argument("--edo", type=int, default=DEFAULT_EDO)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="json file to write every report to")
+    args = parser.parse_args()
+
+    reports = []
+    for pattern in args.patterns.split(","):
+        breaking_point = None
+        for rate in (float(rate) for rate in args.rates.split(",")):
+            report = run_load(pattern, rate, args.duration, args.edo, args.seed)
+            reports.append(report)
+            print(
+                f"{pattern} at {rate:.0f}/s: sent {report['events_per_second']:.0f}/s, "
+                f"played {report['applied_per_second']:.0f}/s, "
+                f"max queue {report['max_queue_depth']}, "
+                f"dropped {report['dropped']}, stuck {report['stuck']}"
+            )
+            if breaking_point is None and not is_sustained(report):
+                breaking_point = rate
+        if breaking_point is None:
+            print(f"{pattern} sustained every rate")
+        else:
+            print(f"{pattern} broke at {breaking_point:.0f} events per second")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            json.dump(reports, output_file, indent=2)
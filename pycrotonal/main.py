@@ -1,5 +1,11 @@
 """Main Control Loop for Pycrotonal"""
+import argparse
 import wx
+from src import latency
+from src import monitor
+from src import quality
+from src import serverconfig
+from src.presets import DEFAULT_PRESET_DIR
 from src.gui import PycrotonalFrame
 
 # from pyo.lib.analysis import Scope
@@ -8,11 +14,42 @@ from src.gui import PycrotonalFrame
 # Then call app.MainLoop()
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Microtonal keyboard synthesizer")
+    serverconfig.add_arguments(parser)
+    parser.add_argument(
+        "--remote-engine",
+        action="store_true",
+        help="run the audio in its own process so the GUI can't delay notes",
+    )
+    parser.add_argument(
+        "--preset-dir",
+        default=DEFAULT_PRESET_DIR,
+        help="directory presets are saved in and loaded from",
+    )
+    monitor.add_arguments(parser)
+    quality.add_arguments(parser)
+    args = parser.parse_args()
+    config = serverconfig.config_from_args(args)
+    latency.enable_from_environment()
     app = wx.App()
     frame = PycrotonalFrame(
         None,
         title="Pycrotonal",
-        size=wx.Size(700, 800),
+        size=wx.Size(700, 940),
         style=wx.DEFAULT_FRAME_STYLE ^ wx.RESIZE_BORDER,
+        server_config=config,
+        remote_engine=args.remote_engine,
+        monitor_log=args.monitor_log,
+        monitor_interval=args.monitor_interval,
+        alert_thresholds=monitor.thresholds_from_args(args),
+        preset_dir=args.preset_dir,
+        quality=args.quality,
+        quality_down_cpu=args.quality_down_cpu,
+        quality_up_cpu=args.quality_up_cpu,
     )
+    # Report what the server actually booted with
+    if frame.server is not None:
+        print(serverconfig.describe(frame.server.config))
+    else:
+        print(serverconfig.describe(config))
     app.MainLoop()
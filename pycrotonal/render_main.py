@@ -0,0 +1,46 @@
+"""Main function to render a score offline without audio hardware"""
+import argparse
+import json
+import time
+from src.audioserver import AudioServer
+from src.npengine import NumpyEngine, write_wav
+from src.patch import make_patch
+from src.render import render, DEFAULT_TAIL
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Render a json score of note events to a wav file"
+    )
+    parser.add_argument(
+        "score", help='json file with a "patch" and a list of note "events"'
+    )
+    parser.add_argument("output", help="wav file to write")
+    parser.add_argument(
+        "--tail",
+        type=float,
+        help="seconds to render after the last note",
+        default=DEFAULT_TAIL,
+    )
+    parser.add_argument(
+        "--backend",
+        choices=["pyo", "numpy"],
+        help="render with an offline pyo server or the pure numpy engine",
+        default="pyo",
+    )
+    args = parser.parse_args()
+    with open(args.score, encoding="utf-8") as score_file:
+        score = json.load(score_file)
+    patch = make_patch(**score.get("patch", {}))
+    start = time.perf_counter()
+    if args.backend == "numpy":
+        engine = NumpyEngine(patch)
+        samples = engine.render(score["events"], args.tail)
+        write_wav(args.output, samples, engine.sample_rate)
+        length = len(samples) / engine.sample_rate
+    else:
+        server = AudioServer(offline=True)
+        length = render(server, score["events"], patch, args.output, args.tail)
+    elapsed = time.perf_counter() - start
+    print(
+        f"Rendered {length:.2f}s in {elapsed:.2f}s ({length / elapsed:.1f}x realtime)"
+    )
@@ -0,0 +1,108 @@
+"""Scope, spectrum and level analysis of the output for the GUI.
+The audio thread only writes the output into a table used as a ring buffer, pyo's TableFill,
+and the GUI copies the table when it repaints. Nothing is locked, so a slow repaint can never
+hold up the audio callback, at worst a frame shows a few samples that were just overwritten"""
+import numpy as np
+from pyo import DataTable, TableFill
+from pyo.lib._core import Mix
+
+# Samples kept in the ring buffer, about 85ms at 48000Hz
+DEFAULT_RING_SIZE = 4096
+# Samples the spectrum is computed from
+SPECTRUM_SIZE = 2048
+# Level in dB shown for silence
+SILENCE_DB = -90.0
+DEFAULT_FPS = 30
+MIN_FPS = 5
+# Fraction of each frame the repaint may take before the frame rate is lowered
+FRAME_BUDGET = 0.5
+
+
+class SignalTap:
+    """Continuously copies a signal into a ring buffer the GUI can read without locking"""
+
+    def __init__(self, source, size=DEFAULT_RING_SIZE):
+        """Constructor, source is the PyoObject to watch, its channels are mixed to mono"""
+        self.size = size
+        self._mono = Mix(source, 1)
+        self._table = DataTable(size)
+        self._fill = TableFill(self._mono, self._table)
+
+    def latest(self, num_samples):
+        """Returns the last num_samples written, oldest first"""
+        num_samples = min(num_samples, self.size)
+        end = self._fill.getCurrentPos()
+        # The table is copied instead of viewed through getBuffer, since a view of a table
+        # crashes the interpreter once the server that made the table is deleted
+        ring = np.array(self._table.getTable())
+        return np.roll(ring, -end)[self.size - num_samples :]
+
+    def stop(self):
+        """Stops filling the ring buffer"""
+        self._fill.stop()
+
+
+def decimate(samples, points):
+    """Reduces samples to at most points for drawing. Each point keeps the sample with the
+    largest magnitude of its stretch, so peaks do not disappear from the scope"""
+    if len(samples) <= points:
+        return samples
+    stretch = len(samples) // points
+    stretches = samples[: stretch * points].reshape(points, stretch)
+    loudest = np.argmax(np.abs(stretches), axis=1)
+    return stretches[np.arange(points), loudest]
+
+
+def levels(samples):
+    """Returns the rms and peak level of samples in dB"""
+    if len(samples) == 0:
+        return SILENCE_DB, SILENCE_DB
+    rms = np.sqrt(np.mean(np.square(samples, dtype=np.float64)))
+    peak = np.max(np.abs(samples))
+    return to_db(rms), to_db(peak)
+
+
+def to_db(amplitude):
+    """Converts an amplitude to dB, never going below SILENCE_DB"""
+    return max(SILENCE_DB, 20 * np.log10(max(float(amplitude), 1e-12)))
+
+
+def spectrum(samples, sample_rate, num_bins):
+    """Returns the centre frequencies and magnitudes in dB of num_bins log spaced bands
+    from 20Hz to Nyquist, taken from a Hann windowed FFT of samples"""
+    window = np.hanning(len(samples))
+    magnitudes = np.abs(np.fft.rfft(samples * window)) * 2 / window.sum()
+    freqs = np.fft.rfftfreq(len(samples), 1 / sample_rate)
+    edges = np.geomspace(20, sample_rate / 2, num_bins + 1)
+    bands = np.searchsorted(edges, freqs, side="right") - 1
+    inside = (bands >= 0) & (bands < num_bins)
+    peaks = np.zeros(num_bins)
+    np.maximum.at(peaks, bands[inside], magnitudes[inside])
+    decibels = 20 * np.log10(np.maximum(peaks, 1e-12))
+    return np.sqrt(edges[:-1] * edges[1:]), np.maximum(decibels, SILENCE_DB)
+
+
+class FrameRate:
+    """Chooses how long to wait before the next repaint. The rate is halved whenever a
+    repaint takes more than FRAME_BUDGET of its frame or the GUI calls back late,
+    and slowly climbs back to the target once repaints are cheap again"""
+
+    def __init__(self, target_fps=DEFAULT_FPS, min_fps=MIN_FPS):
+        """Constructor"""
+        self.target_fps = target_fps
+        self.min_fps = min_fps
+        self.fps = target_fps
+
+    @property
+    def interval(self):
+        """Seconds between repaints"""
+        return 1 / self.fps
+
+    def update(self, paint_seconds, late_seconds=0.0):
+        """Adjusts the rate after a repaint that took paint_seconds and started late_seconds
+        after it was due. Returns the seconds to wait until the next one"""
+        if paint_seconds > FRAME_BUDGET * self.interval or late_seconds > self.interval:
+            self.fps = max(self.min_fps, self.fps / 2)
+        elif paint_seconds < FRAME_BUDGET * self.interval / 2:
+            self.fps = min(self.target_fps, self.fps + 1)
+        return self.interval
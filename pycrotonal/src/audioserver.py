@@ -1,18 +1,65 @@
 """Controls the audio server to send Synth output to"""
 import pyo
+from .serverconfig import make_config, round_trip_latency, OFFLINE_BACKENDS
+from .waveforms.synth import set_sample_rate
+from .waveforms.wavetables import clear_tables
 
 
 class AudioServer:
     """The main audio server that must be initialized before any sound objects created"""
 
-    def __init__(self):
-        """Constructor"""
-        self.server = pyo.Server(sr=48000).boot()
+    def __init__(self, offline=False, config=None):
+        """Constructor
+        config is a server config from serverconfig, the defaults are used if None
+        An offline server renders to a file as fast as possible instead of a sound device"""
+        config = make_config() if config is None else config
+        if offline:
+            config = dict(config, backend="offline")
+        self.offline = config["backend"] in OFFLINE_BACKENDS
+        self.server = pyo.Server(
+            sr=config["sample_rate"],
+            nchnls=config["channels"],
+            buffersize=config["buffer_size"],
+            duplex=int(config["duplex"]),
+            audio=config["backend"],
+        ).boot()
+        # The settings the server actually booted with
+        self.config = dict(
+            config,
+            sample_rate=int(self.server.getSamplingRate()),
+            buffer_size=self.server.getBufferSize(),
+        )
+        set_sample_rate(self.config["sample_rate"])
+        # Cached wavetables were built on the previous server
+        clear_tables()
+        # Called at the start of every block, pyo only takes one callback
+        self._block_callbacks = []
+        self.server.setCallback(self._on_block)
+
+    def add_block_callback(self, callback):
+        """Calls callback with no arguments from the audio thread at the start of every block"""
+        self._block_callbacks.append(callback)
+
+    def _on_block(self):
+        """Runs every block callback in the order they were added"""
+        for callback in self._block_callbacks:
+            callback()
+
+    def latency(self):
+        """Round trip latency of the server's buffers in seconds"""
+        return round_trip_latency(self.config)
 
     def play(self):
-        """Start the server"""
+        """Start the server, an offline server returns once it is done rendering
+        unless it uses the offline_nb backend"""
         self.server.start()
 
+    def record(self, filename, duration):
+        """Sets the wav file an offline server renders to and for how many seconds"""
+        self.server.recordOptions(
+            dur=duration, filename=filename, fileformat=0, sampletype=1
+        )
+
     def stop(self):
         """Stop the server"""
         self.server.stop()
@@ -0,0 +1,158 @@
+"""Headless benchmarks of the hot paths, run against an offline server without a sound card.
+Every result is the median seconds of a measurement, keyed by a name such as
+"find_scale/edo=12" so results can be compared against a stored baseline"""
+import os
+import statistics
+import tempfile
+import time
+from .engine import SynthEngine
+from .freqhelper import find_scale, clear_scale_cache
+from .keyinput import Keyboard, MAX_EDO
+from .patch import WAVEFORM_CLASSES
+
+ALL_EDOS = list(range(1, MAX_EDO + 1))
+DEFAULT_REPEATS = 5
+# Current results more than this fraction slower than the baseline are regressions
+DEFAULT_TOLERANCE = 0.25
+# Seconds of audio rendered to measure the DSP cost of the voices
+DEFAULT_RENDER_SECONDS = 2.0
+
+
+def time_call(func, repeats=DEFAULT_REPEATS, setup=None):
+    """Returns the median seconds func takes over repeats calls
+    setup is called before every call without being timed"""
+    times = []
+    for _ in range(repeats):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def bench_find_scale(edos, repeats=DEFAULT_REPEATS):
+    """Times building the scale of every edo without the memoized results"""
+    return {
+        f"find_scale/edo={edo}": time_call(
+            lambda edo=edo: find_scale(440, edo), repeats, clear_scale_cache
+        )
+        for edo in edos
+    }
+
+
+def bench_keyboard_dispatch(edos, repeats=DEFAULT_REPEATS):
+    """Times a press going from the listener callback to get_keypress, per event"""
+    results = {}
+    for edo in edos:
+        keyboard = Keyboard(440, edo)
+
+        def dispatch_scale(keyboard=keyboard):
+            for key in keyboard.key_scale:
+                keyboard.on_press(key)
+                keyboard.get_keypress()
+
+        seconds = time_call(dispatch_scale, repeats)
+        results[f"keyboard_dispatch/edo={edo}"] = seconds / len(keyboard.key_scale)
+    return results
+
+
+def bench_edo_change(engine, edos, repeats=DEFAULT_REPEATS):
+    """Times the non GUI work of PycrotonalFrame.change_synth_edo"""
+
+    def change_edo(edo):
+        engine.release_all()
+        Keyboard(440, edo)
+
+    return {
+        f"edo_change/edo={edo}": time_call(lambda edo=edo: change_edo(edo), repeats)
+        for edo in edos
+    }
+
+
+def bench_waveform_change(engine, edos, repeats=DEFAULT_REPEATS):
+    """Times PycrotonalFrame.handle_waveform_change for every waveform,
+    with every key of the edo pressed before the switch. No server runs between the
+    calls, so the crossfade of the last change is ended before each one, or the
+    engine would only queue the change until it is done"""
+    results = {}
+    for edo in edos:
+        keyboard = Keyboard(440, edo)
+
+        def press_all(keyboard=keyboard):
+            engine.end_crossfade()
+            for key, freq in keyboard.get_scale():
+                engine.note_on(key, freq)
+
+        for name, synth_class in WAVEFORM_CLASSES.items():
+            results[f"waveform_change/{name}/edo={edo}"] = time_call(
+                lambda synth_class=synth_class: engine.set_waveform(synth_class),
+                repeats,
+                press_all,
+            )
+    return results
+
+
+def bench_voice_cost(
+    server, engine, seconds=DEFAULT_RENDER_SECONDS, repeats=DEFAULT_REPEATS
+):
+    """Measures the DSP load with no notes, one note, and every voice playing, for every waveform.
+    voice_cost is the seconds of CPU one more voice takes for every second of audio.
+    It is measured between one voice and every voice playing, because an idle engine
+    can cost more than a busy one once released notes decay into denormals in the effects"""
+    results = {}
+    num_voices = engine.voice_pool.num_voices
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, "benchmark.wav")
+
+        def render_load():
+            return (
+                time_call(
+                    server.play, repeats, lambda: server.record(filename, seconds)
+                )
+                / seconds
+            )
+
+        for name, synth_class in WAVEFORM_CLASSES.items():
+            # Ends the crossfade left by the last change, then the one of this one
+            engine.end_crossfade()
+            engine.set_waveform(synth_class)
+            engine.end_crossfade()
+            loads = {0: render_load()}
+            for voice in range(num_voices):
+                engine.note_on(voice, 220 + voice * 20)
+                if voice == 0:
+                    loads[1] = render_load()
+            loads[num_voices] = render_load()
+            engine.release_all()
+            for voices, load in loads.items():
+                results[f"dsp_load/{name}/voices={voices}"] = load
+            results[f"voice_cost/{name}"] = max(
+                (loads[num_voices] - loads[1]) / max(num_voices - 1, 1), 0
+            )
+    return results
+
+
+def run_benchmarks(server, edos=None, repeats=DEFAULT_REPEATS):
+    """Runs every benchmark, server must be an offline AudioServer"""
+    edos = ALL_EDOS if edos is None else edos
+    engine = SynthEngine(WAVEFORM_CLASSES["Sine"])
+    engine.out()
+    results = {}
+    results.update(bench_find_scale(edos, repeats))
+    results.update(bench_keyboard_dispatch(edos, repeats))
+    results.update(bench_edo_change(engine, edos, repeats))
+    results.update(bench_waveform_change(engine, edos, repeats))
+    results.update(bench_voice_cost(server, engine, repeats=repeats))
+    return results
+
+
+def compare_results(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """Returns (name, baseline, current) of every result slower than the baseline
+    by more than tolerance. Results missing from either side are skipped"""
+    regressions = []
+    for name, current in sorted(results.items()):
+        previous = baseline.get(name)
+        if previous is not None and current > previous * (1 + tolerance):
+            regressions.append((name, previous, current))
+    return regressions
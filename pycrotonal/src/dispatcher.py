@@ -0,0 +1,77 @@
+"""Dispatches keypresses from the keyboard listener to the synth on one long lived thread"""
+import threading
+from queue import Queue, Empty
+from . import latency
+
+# Most messages handed to the handler at once when draining a burst of keypresses
+DEFAULT_MAX_BATCH = 64
+# Put on the queue to stop the thread
+_STOP = object()
+
+
+class KeypressDispatcher:
+    """One thread for the life of the GUI that takes keypresses off a queue shared by every
+    Keyboard, looks them up in the current keyboard, and hands them to a handler in batches.
+    The keyboard can be swapped at any time, for example when the edo changes"""
+
+    def __init__(self, handler, msg_queue=None, max_batch=DEFAULT_MAX_BATCH):
+        """Constructor
+        handler is called on the dispatcher thread with a list of (key, freq, msg, captured)
+        msg_queue is the queue every keyboard puts its (key, msg, captured) messages onto
+        """
+        self.msg_queue = Queue() if msg_queue is None else msg_queue
+        self.max_batch = max_batch
+        self._handler = handler
+        self._keyboard = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def set_keyboard(self, keyboard):
+        """Swaps the keyboard keypresses are looked up in"""
+        self._keyboard = keyboard
+
+    def start(self):
+        """Starts the dispatcher thread"""
+        self._thread.start()
+
+    def stop(self, timeout=1.0):
+        """Stops the dispatcher thread once the messages already queued are handled"""
+        self.msg_queue.put(_STOP)
+        if self._thread.is_alive():
+            self._thread.join(timeout)
+
+    def is_alive(self):
+        """Whether the dispatcher thread is running"""
+        return self._thread.is_alive()
+
+    def _run(self):
+        """Blocks for a message, then drains whatever else is already queued as one batch"""
+        running = True
+        while running:
+            messages = [self.msg_queue.get()]
+            try:
+                while len(messages) < self.max_batch:
+                    messages.append(self.msg_queue.get_nowait())
+            except Empty:
+                pass
+            if _STOP in messages:
+                messages = messages[0 : messages.index(_STOP)]
+                running = False
+            events = self._lookup(messages)
+            if events:
+                self._handler(events)
+
+    def _lookup(self, messages):
+        """Finds the frequency of every message in the current keyboard.
+        Messages for keys that are not in its scale are dropped"""
+        keyboard = self._keyboard
+        if keyboard is None:
+            return []
+        events = []
+        for key, msg, captured in messages:
+            mapping = keyboard.key_map.get(key)
+            if mapping is None:
+                continue
+            if msg == "start":
+                latency.record("dequeued", captured)
+            events.append((key, mapping[1], msg, captured))
+        return events
@@ -0,0 +1,187 @@
+"""Master effects bus applied onto the mix of every voice"""
+import math
+from pyo import CallAfter, Sig, SigTo
+from pyo.lib.dynamics import Compress
+from pyo.lib.effects import Disto, Freeverb
+from pyo.lib.filters import Tone
+from pyo.lib.utils import Denorm
+from .waveforms.synth import Synth
+
+# Seconds to crossfade between the old and new input when the voices change
+DEFAULT_CROSSFADE = 0.05
+# Seconds the reverb keeps running on silence after it is bypassed, long enough for its
+# tail to die out so that it does not come back when the reverb is turned up again
+REVERB_TAIL = 3.0
+# Milliseconds the compressor looks ahead, pyo's default
+DEFAULT_LOOKAHEAD = 5.0
+# Streams of the bus, the voices are mixed down to stereo
+CHANNELS = 2
+# Slope of the one-pole lowpass after the distortion's curve
+DISTORTION_SLOPE = 0.8
+
+
+def one_pole_freq(slope, sample_rate):
+    """Cutoff frequency at which pyo's Tone has the pole of Disto's lowpass of slope"""
+    cos = 2 - (slope * slope + 1) / (2 * slope)
+    return math.acos(cos) * sample_rate / (2 * math.pi)
+
+
+class EffectsBus:
+    """Distortion, then reverb, then a compressor. The bus is built once and only its
+    input is swapped, so changing the voices never rebuilds or restarts the effects.
+    An effect turned all the way down is crossfaded out of the signal path and stopped,
+    and crossfaded back in as soon as it is turned up. At no drive the distortion is only
+    its lowpass, so it is bypassed through the same lowpass and the sound stays as dark"""
+
+    def __init__(self, distortion=0, reverb=0, fadetime=DEFAULT_CROSSFADE):
+        """Constructor, starts with a silent input until set_input is called
+        Distortion has set params, can only control drive amount and not clip function
+        Reverb has set params, can only control dry/wet for now"""
+        self.fadetime = fadetime
+        self.reverb = reverb
+        # A disabled reverb stays bypassed whatever its knob is set to
+        self.reverb_enabled = True
+        # Every effect gets as many streams as its first input, so the bus starts from
+        # stereo silence or it would only keep the left channel of its input
+        self._silence = Sig([0] * CHANNELS)
+        # The knobs glide over the crossfade time so turning an effect off never clicks,
+        # starting at their value instead of gliding up from 0
+        self._drive = SigTo(distortion, time=fadetime, init=distortion)
+        self._bal = SigTo(reverb, time=fadetime, init=reverb)
+        # Output level, lowered to fade the whole bus out
+        self._level = SigTo(1, time=fadetime, init=1)
+        self.dist_effect = Disto(
+            self._silence, drive=self._drive, slope=DISTORTION_SLOPE
+        )
+        # Stands in for the distortion while it is bypassed, running only then
+        self._lowpass = Tone(
+            self._silence, freq=one_pole_freq(DISTORTION_SLOPE, Synth.sample_rate)
+        )
+        # The distortion's lowpass decays into denormals after the notes are released,
+        # which makes the reverb several times more expensive while nothing is playing
+        self._denorm = Denorm(self.dist_effect)
+        self.reverb_effect = Freeverb(self._denorm, size=0.8, damp=0.7, bal=self._bal)
+        self.final_output = Compress(self.reverb_effect, ratio=4, mul=self._level)
+        self.distortion_bypassed = False
+        self.reverb_bypassed = False
+        # A stopped bus starts no effect until play is called
+        self.stopped = False
+        # Pending CallAfters that stop a bypassed effect, or the lowpass once the
+        # distortion is back
+        self._stop_distortion = None
+        self._stop_reverb = None
+        self._lowpass.stop()
+        self._bypass_distortion(distortion == 0, 0)
+        self._bypass_reverb(reverb == 0, 0)
+
+    def set_input(self, source, fadetime=None):
+        """Crossfades the bus from its current input to source"""
+        fadetime = self.fadetime if fadetime is None else fadetime
+        self.dist_effect.setInput(source, fadetime)
+        self._lowpass.setInput(source, fadetime)
+
+    def set_distortion(self, distortion):
+        """Sets the distortion drive from 0 to 1"""
+        self._drive.setValue(distortion)
+        self._bypass_distortion(distortion == 0, self.fadetime)
+
+    def set_reverb(self, reverb):
+        """Sets the reverb dry/wet balance from 0 to 1"""
+        self.reverb = reverb
+        self._bal.setValue(reverb)
+        self._bypass_reverb(reverb == 0 or not self.reverb_enabled, self.fadetime)
+
+    def set_reverb_enabled(self, enabled):
+        """Disabling the reverb bypasses and stops it while its knob keeps its value,
+        enabling it brings it back at that value"""
+        self.reverb_enabled = enabled
+        self._bypass_reverb(self.reverb == 0 or not enabled, self.fadetime)
+
+    def set_compressor(self, lookahead=DEFAULT_LOOKAHEAD, knee=0):
+        """Sets the compressor's look ahead in milliseconds and its knee from 0 to 1.
+        Without look ahead the compressor skips its delay line but reacts late"""
+        self.final_output.setLookAhead(lookahead)
+        self.final_output.setKnee(knee)
+
+    def set_level(self, level, fadetime=None):
+        """Glides the output level of the bus to level over fadetime seconds"""
+        self._level.setTime(self.fadetime if fadetime is None else fadetime)
+        self._level.setValue(level)
+
+    def _bypass_distortion(self, bypass, fadetime):
+        """Routes the input through the lowpass alone and stops the distortion once the
+        crossfade is done, or the other way around"""
+        if bypass == self.distortion_bypassed:
+            return
+        self.distortion_bypassed = bypass
+        if self._stop_distortion is not None:
+            self._stop_distortion.stop()
+        if bypass:
+            started, stopped = self._lowpass, self.dist_effect
+        else:
+            started, stopped = self.dist_effect, self._lowpass
+        if not self.stopped:
+            started.play()
+        self._denorm.setInput(started, fadetime)
+        if fadetime == 0:
+            stopped.stop()
+        else:
+            self._stop_distortion = CallAfter(stopped.stop, fadetime)
+
+    def _bypass_reverb(self, bypass, fadetime):
+        """Routes the signal around the reverb, whose output is only its input once it is
+        fully dry, then lets its tail die out on silence before stopping it.
+        Or starts it and routes the signal back through it"""
+        if bypass == self.reverb_bypassed:
+            return
+        self.reverb_bypassed = bypass
+        if bypass:
+            self.final_output.setInput(self._denorm, fadetime)
+            if fadetime == 0:
+                # Nothing has gone through it yet, so it has no tail
+                self.reverb_effect.stop()
+            else:
+                self._stop_reverb = CallAfter(self._flush_reverb, fadetime)
+        else:
+            if self._stop_reverb is not None:
+                self._stop_reverb.stop()
+            if not self.stopped:
+                self.reverb_effect.play()
+            # At once, so its dry signal is the whole input while it is faded back in
+            self.reverb_effect.setInput(self._denorm, 0)
+            self.final_output.setInput(self.reverb_effect, fadetime)
+
+    def _flush_reverb(self):
+        """Feeds the bypassed reverb silence until its tail dies out, then stops it"""
+        self.reverb_effect.setInput(self._silence, 0)
+        self._stop_reverb = CallAfter(self.reverb_effect.stop, REVERB_TAIL)
+
+    def stop(self):
+        """Removes every effect from processing, the bus outputs silence until play"""
+        self.stopped = True
+        for effect in (
+            self.dist_effect,
+            self._lowpass,
+            self._denorm,
+            self.reverb_effect,
+            self.final_output,
+        ):
+            effect.stop()
+
+    def play(self):
+        """Starts the bus again after stop, the bypassed effects stay stopped"""
+        if not self.stopped:
+            return
+        self.stopped = False
+        if self.distortion_bypassed:
+            self._lowpass.play()
+        else:
+            self.dist_effect.play()
+        self._denorm.play()
+        if not self.reverb_bypassed:
+            self.reverb_effect.play()
+        self.final_output.play()
+
+    def out(self):
+        """Sends the bus to the speakers, should only be called once"""
+        self.final_output.out()
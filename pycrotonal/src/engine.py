@@ -0,0 +1,181 @@
+"""Synth engine holding the voices and effects, independent of the GUI"""
+from pyo import CallAfter
+from pyo.lib._core import Mix
+from .effects import EffectsBus, CHANNELS
+from .fm import FMModulator, DEFAULT_FM_FREQ, DEFAULT_FM_INDEX, FM_SMOOTHING
+from .voicepool import VoicePool, DEFAULT_NUM_VOICES, STEAL_OLDEST
+
+
+class SynthEngine:
+    """Owns the voice pool and the effects bus it is mixed into.
+    The AudioServer must be booted before an engine is created"""
+
+    def __init__(
+        self,
+        synth_class,
+        num_voices=DEFAULT_NUM_VOICES,
+        steal_mode=STEAL_OLDEST,
+        distortion=0,
+        reverb=0,
+        fm_freq=DEFAULT_FM_FREQ,
+        fm_index=DEFAULT_FM_INDEX,
+    ):
+        """Constructor, synth_class is the Synth subclass the voices start with"""
+        self.distortion = distortion
+        self.reverb = reverb
+        # pyo computes objects in the order they were made, and an object reading one
+        # made after it gets that object's previous block, so the voices come first
+        self.voice_pool = VoicePool(synth_class, num_voices, steal_mode)
+        self.fm = FMModulator(fm_freq, fm_index)
+        self._fm_off = None
+        self._connect_fm()
+        self.mix = Mix(self.voice_pool.get_output(), CHANNELS)
+        self.bus = EffectsBus(distortion, reverb)
+        self.bus.set_input(self.mix, 0)
+        # Oscillator of the previous waveform while it is faded out,
+        # and the waveform asked for during that crossfade
+        self._retiring = []
+        self._retire = None
+        self._next_waveform = None
+        self._previous_mix = None
+
+    @property
+    def final_output(self):
+        """The last object of the effects bus"""
+        return self.bus.final_output
+
+    def out(self):
+        """Sends the final output to the speakers"""
+        self.bus.out()
+
+    def stop(self):
+        """Releases every note and removes the voices and effects from processing,
+        for an engine that is not heard. play starts it again"""
+        if self._retire is not None:
+            self._retire.stop()
+        self._next_waveform = None
+        self._stop_retiring()
+        self.voice_pool.stop()
+        self.mix.stop()
+        self.fm.stop()
+        self.bus.stop()
+
+    def play(self):
+        """Starts an engine stopped by stop, its voices wake up as they are given notes"""
+        if not self.bus.stopped:
+            return
+        self.bus.play()
+        self.mix.play()
+        if self.fm.active:
+            self.fm.play()
+
+    def set_level(self, level, fadetime=None):
+        """Glides the output level to level over fadetime, or the bus's crossfade time"""
+        self.bus.set_level(level, fadetime)
+
+    def set_quality(self, polyphony, reverb_enabled, lookahead, knee):
+        """Applies the settings of a quality tier. The voices switch to the wavetables
+        of the Synth harmonics limit, which should have been built with build_tables"""
+        self.voice_pool.set_polyphony(polyphony)
+        self.voice_pool.bank.refresh_tables()
+        self.bus.set_reverb_enabled(reverb_enabled)
+        self.bus.set_compressor(lookahead, knee)
+
+    def set_waveform(self, synth_class):
+        """Switches the voices to a new Synth subclass and crossfades the bus to them.
+        The previous oscillator is removed from processing once the crossfade is done.
+        The bus only crossfades between two inputs, so a change asked for during the
+        crossfade waits for it to finish, and only the latest one is made.
+        Call it at the start of a block, through EventScheduler.call, since freeing the
+        objects of the previous waveform in the middle of a block clicks"""
+        if self._retiring:
+            self._next_waveform = synth_class
+            return
+        self._retiring = [self.voice_pool.set_waveform(synth_class)]
+        # The bus reads the previous mix until its input is set again, freeing it
+        # during the crossfade clicks
+        self._previous_mix = self.mix
+        self.mix = Mix(self.voice_pool.get_output(), CHANNELS)
+        self.bus.set_input(self.mix)
+        if self._retire is not None:
+            self._retire.stop()
+        self._retire = CallAfter(self.end_crossfade, self.bus.fadetime)
+
+    def end_crossfade(self):
+        """Removes the previous oscillator from processing, then makes the waveform
+        change asked for during the crossfade. Called once the crossfade is done, or
+        early to cut it short when no server runs, such as between benchmark calls"""
+        if self._retire is not None:
+            self._retire.stop()
+        self._stop_retiring()
+        if self._next_waveform is not None:
+            synth_class, self._next_waveform = self._next_waveform, None
+            self.set_waveform(synth_class)
+
+    def _stop_retiring(self):
+        """Removes the oscillators of the previous waveforms from processing"""
+        for osc in self._retiring:
+            osc.stop()
+        self._retiring = []
+
+    def set_fm_freq(self, fm_freq):
+        """Sets the frequency in Hz of the modulator shared by every voice"""
+        self.fm.set_freq(fm_freq)
+
+    def set_fm_index(self, fm_index):
+        """Sets the FM index. The voices are only connected to the modulator
+        while the index is above 0, so FM costs nothing while it is off"""
+        was_active = self.fm.active
+        self.fm.set_index(fm_index)
+        if self.fm.active and not was_active:
+            self._connect_fm()
+        elif was_active and not self.fm.active:
+            # Disconnect once the depth has glided to 0 so the pitch does not jump
+            self._fm_off = CallAfter(self._connect_fm, FM_SMOOTHING)
+
+    def _connect_fm(self):
+        """Connects every voice to the modulator if FM is on, otherwise disconnects them"""
+        modulator = self.fm.modulator if self.fm.active else None
+        self.voice_pool.bank.set_modulator(modulator)
+        if self.fm.active:
+            self.fm.play()
+        else:
+            self.fm.stop()
+
+    def set_distortion(self, distortion):
+        """Sets the distortion drive from 0 to 1"""
+        self.distortion = distortion
+        self.bus.set_distortion(distortion)
+
+    def set_reverb(self, reverb):
+        """Sets the reverb dry/wet balance from 0 to 1"""
+        self.reverb = reverb
+        self.bus.set_reverb(reverb)
+
+    def set_attack(self, attack):
+        """Sets the attack of every voice's envelope from its next note"""
+        self.voice_pool.envelope.update(attack=attack)
+
+    def set_decay(self, decay):
+        """Sets the decay of every voice's envelope from its next note"""
+        self.voice_pool.envelope.update(decay=decay)
+
+    def set_sustain(self, sustain):
+        """Sets the sustain of every voice's envelope from its next note"""
+        self.voice_pool.envelope.update(sustain=sustain)
+
+    def set_release(self, release):
+        """Sets the release of every voice's envelope from its next note or release"""
+        self.voice_pool.envelope.update(release=release)
+
+    def note_on(self, key, freq):
+        """Plays freq on a voice of the pool"""
+        return self.voice_pool.note_on(key, freq)
+
+    def note_off(self, key):
+        """Releases the voice playing key"""
+        self.voice_pool.note_off(key)
+
+    def release_all(self):
+        """Releases every held note"""
+        self.voice_pool.release_all()
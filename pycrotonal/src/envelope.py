@@ -0,0 +1,45 @@
+"""ADSR parameters shared by the envelope of every voice"""
+
+# Matches the envelope made by voicepool.default_adsr, sustain is pyo's default
+DEFAULT_ATTACK = 0.01
+DEFAULT_DECAY = 0.01
+DEFAULT_SUSTAIN = 0.707
+DEFAULT_RELEASE = 0.01
+
+
+class EnvelopeParams:
+    """One source of the ADSR parameters for every voice.
+    Changing a parameter only stores it and bumps the version, so a slider move costs the same
+    however many voices there are. Each voice copies the parameters onto its envelope when it
+    is played or released and its copy is older than the version"""
+
+    def __init__(
+        self,
+        attack=DEFAULT_ATTACK,
+        decay=DEFAULT_DECAY,
+        sustain=DEFAULT_SUSTAIN,
+        release=DEFAULT_RELEASE,
+    ):
+        """Constructor, times are in seconds and sustain is an amplitude"""
+        self.attack = attack
+        self.decay = decay
+        self.sustain = sustain
+        self.release = release
+        self.version = 0
+
+    def update(self, **params):
+        """Sets any of attack, decay, sustain, and release"""
+        for name, value in params.items():
+            if name not in ("attack", "decay", "sustain", "release"):
+                raise ValueError("This is not an envelope parameter: " + name)
+            if value < 0:
+                raise ValueError(name + " can not be negative")
+            setattr(self, name, value)
+        self.version += 1
+
+    def apply(self, adsr):
+        """Copies the parameters onto a pyo Adsr"""
+        adsr.setAttack(self.attack)
+        adsr.setDecay(self.decay)
+        adsr.setSustain(self.sustain)
+        adsr.setRelease(self.release)
@@ -0,0 +1,54 @@
+"""Frequency modulation shared by every voice"""
+from pyo import SigTo
+from pyo.lib.generators import Sine
+
+DEFAULT_FM_FREQ = 100
+DEFAULT_FM_INDEX = 0
+# Seconds for the knobs to glide to a new value instead of stepping and clicking
+FM_SMOOTHING = 0.02
+
+
+class FMModulator:
+    """One sine modulator at a fixed frequency that every voice adds to its own frequency.
+    Its depth is index * freq in Hz, so one Sine serves the whole pool
+    instead of one modulator per voice"""
+
+    def __init__(self, freq=DEFAULT_FM_FREQ, index=DEFAULT_FM_INDEX):
+        """Constructor
+        freq is the modulator frequency in Hz
+        index is the modulation index, the peak frequency deviation / freq
+        """
+        if freq < 0 or index < 0:
+            raise ValueError("FM frequency and index can't be negative")
+        self.freq = freq
+        self.index = index
+        self._freq = SigTo(freq, time=FM_SMOOTHING)
+        self._index = SigTo(index, time=FM_SMOOTHING)
+        self.modulator = Sine(freq=self._freq, mul=self._freq * self._index)
+
+    @property
+    def active(self):
+        """Whether the modulator changes the voices at all"""
+        return self.index > 0
+
+    def set_freq(self, freq):
+        """Sets the modulator frequency in Hz"""
+        if freq < 0:
+            raise ValueError("FM frequency can't be negative")
+        self.freq = freq
+        self._freq.setValue(freq)
+
+    def set_index(self, index):
+        """Sets the modulation index"""
+        if index < 0:
+            raise ValueError("FM index can't be negative")
+        self.index = index
+        self._index.setValue(index)
+
+    def play(self):
+        """Starts computing the modulator"""
+        self.modulator.play()
+
+    def stop(self):
+        """Removes the modulator from processing while no voice uses it"""
+        self.modulator.stop()
@@ -1,6 +1,10 @@
 """Frequency helper to create scales"""
+from functools import lru_cache
 import numpy as np
 
+# Decimal places kept in the scales given to the keyboard and GUI
+SCALE_PRECISION = 4
+
 
 def find_next_step(freq, edo):
     """Finds the next step of a scale"""
@@ -8,16 +12,57 @@ def find_next_step(freq, edo):
     return freq * step
 
 
+def _check_scale_args(root, edo, num_octaves):
+    """Throws an error for a root, edo, or number of octaves that can't make a scale"""
+    if np.any(np.asarray(root) < 0):
+        raise ValueError("This is not a valid root")
+    if np.any(np.asarray(edo) < 1):
+        raise ValueError("This is not a valid edo")
+    if np.any(np.asarray(num_octaves) < 0):
+        raise ValueError("This is not a valid number of octaves")
+
+
+@lru_cache(maxsize=256)
+def _cached_scale_array(root, edo, num_octaves):
+    """Memoized closed form scale, the array is read only since it is shared"""
+    steps = np.arange(edo * num_octaves + 1, dtype=np.float64)
+    scale = root * np.exp2(steps / edo)
+    scale.flags.writeable = False
+    return scale
+
+
+def find_scale_array(root, edo, num_octaves=1):
+    """Finds a complete scale as a contiguous float64 array in one shot
+    Every step is computed directly from the root, so there is no rounding drift
+    up the scale. Results are cached, so the returned array must not be modified"""
+    _check_scale_args(root, edo, num_octaves)
+    return _cached_scale_array(float(root), int(edo), int(num_octaves))
+
+
+def clear_scale_cache():
+    """Forgets every memoized scale"""
+    _cached_scale_array.cache_clear()
+
+
+def find_scale_table(roots, edos, num_octaves=1):
+    """Finds many scales at once for table building.
+    roots, edos and num_octaves are broadcast against each other, and every row of the
+    returned 2d array is one scale. Scales shorter than the longest one are padded with nan"""
+    _check_scale_args(roots, edos, num_octaves)
+    roots, edos, num_octaves = np.broadcast_arrays(
+        np.asarray(roots, dtype=np.float64).ravel(),
+        np.asarray(edos, dtype=np.int64).ravel(),
+        np.asarray(num_octaves, dtype=np.int64).ravel(),
+    )
+    lengths = edos * num_octaves + 1
+    steps = np.arange(lengths.max(), dtype=np.float64)
+    table = roots[:, None] * np.exp2(steps[None, :] / edos[:, None])
+    table[steps[None, :] >= lengths[:, None]] = np.nan
+    return table
+
+
 def find_scale(root, edo, num_octaves=1):
     """Finds a complete scale, also able to give more than 1 octave"""
-    if root < 0:
-        raise ValueError("This is not a valid root")
-    scale = [root]
-    for i in range(edo * num_octaves):
-        # since we are dynamically adding things to scale, we can access indexs of scale
-        # that are outside the initialization
-        freq = scale[i]
-        freq = np.around(find_next_step(freq, edo), 4)
-        scale.append(freq)
+    scale = np.around(find_scale_array(root, edo, num_octaves), SCALE_PRECISION)
     # convert to native float instead of numpy.float64
-    return [float(freq) for freq in scale]
+    return scale.tolist()
@@ -1,11 +1,5 @@
 """GUI class for wx Frame"""
 import sys
-import threading
-from pyo.lib.controls import Adsr
-from pyo.lib._core import Mix
-from pyo.lib.dynamics import Compress
-from pyo.lib.generators import FM, Sine
-from pyo.lib.effects import Disto, Freeverb
 import wx
 from wx.lib.agw.knobctrl import KnobCtrl, EVT_KC_ANGLE_CHANGED
 from wx import (
@@ -22,10 +16,25 @@ from .waveforms.trianglewave import TriangleWave
 from .waveforms.squarewave import SquareWave
 from .waveforms.sawtoothwave import SawtoothWave
 
+from . import latency
+from .analysis import SignalTap
 from .audioserver import AudioServer
+from .dispatcher import KeypressDispatcher
+from .envelope import DEFAULT_ATTACK, DEFAULT_DECAY, DEFAULT_SUSTAIN, DEFAULT_RELEASE
+from .fm import DEFAULT_FM_FREQ, DEFAULT_FM_INDEX
 from .keyinput import Keyboard
+from .monitor import ServerMonitor, JsonLinesSink, DEFAULT_INTERVAL, format_status
+from .params import ParameterScheduler
+from .patch import make_patch, apply_patch
+from .presets import PresetStore, PresetSwitcher, DEFAULT_PRESET_DIR
+from .quality import QualityGovernor, QUALITY_MODES, DEFAULT_MODE
+from .quality import STEP_DOWN_CPU, STEP_UP_CPU
+from .remote import EngineProcess
+from .scheduler import EventScheduler, DEFAULT_LOOKAHEAD
+from .serverconfig import make_config
+from .scopeview import ScopePanel
+from .voicepool import DEFAULT_NUM_VOICES, STEAL_OLDEST
 
-# TODO: Apply FM modulation with a button, FM currently not working right now
 WAVEFORMS = ["Sine", "Square", "Triangle", "Saw"]
 SINE_INDEX = 0
 SQUARE_INDEX = 1
@@ -33,12 +42,44 @@ TRIANGLE_INDEX = 2
 SAW_INDEX = 3
 FM_MAX_FREQ = 9000
 STARTING_EDO = 60
+STARTING_ROOT = 440
+NUM_VOICES = DEFAULT_NUM_VOICES
+STEAL_MODE = STEAL_OLDEST
+LOOKAHEAD = DEFAULT_LOOKAHEAD
+# Milliseconds between redraws of the knob labels, and between sends of the knob values
+# to a remote engine, which has no audio blocks here to apply them on
+PARAM_REFRESH_MS = 30
+# Longest ADSR time in seconds, at the top of the sliders
+ADSR_MAX = 10
+
+
+def slider_value(position):
+    """ADSR value of a slider position, the sliders look linear but map exponentially"""
+    return rescale(position, 0, 100, 0, ADSR_MAX, mode="exp")
+
+
+def slider_position(value):
+    """Slider position whose ADSR value is closest to value"""
+    return min(range(101), key=lambda position: abs(slider_value(position) - value))
 
 
 class PycrotonalFrame(wx.Frame):
     """Main Frame for Pycrotonal"""
 
-    def __init__(self, *args, **kw):
+    def __init__(
+        self,
+        *args,
+        server_config=None,
+        remote_engine=False,
+        monitor_log=None,
+        monitor_interval=DEFAULT_INTERVAL,
+        alert_thresholds=None,
+        preset_dir=DEFAULT_PRESET_DIR,
+        quality=DEFAULT_MODE,
+        quality_down_cpu=STEP_DOWN_CPU,
+        quality_up_cpu=STEP_UP_CPU,
+        **kw,
+    ):
         """Constructor
         Creates a frame and adds all additional objects and frames into it
         Also creates the base synth, FM synthesizer, Reverb, and Distortion.
@@ -48,41 +89,94 @@ class PycrotonalFrame(wx.Frame):
 
         *args and **kw are there to extend the wx.Frame object, currently using
         title, size, and style. The c++ implementation uses flags, which is disgusting but workable.
+        server_config is the serverconfig settings the AudioServer is booted with
+        remote_engine runs the audio in its own process that only receives commands,
+        so GUI work can't delay notes. The scope and the monitor are not available with a
+        remote engine
+        monitor_log is a file the server health samples are appended to, None to not log them
+        monitor_interval is the seconds between server health samples
+        alert_thresholds are the monitor's make_thresholds, the defaults are used if None
+        preset_dir is the directory presets are saved in and loaded from
+        quality is the quality tier, or auto to step it down while the CPU is overloaded
+        and back up once it is not. quality_down_cpu and quality_up_cpu are the CPU
+        percents auto mode steps at. Quality can't be changed with a remote engine
         """
         super().__init__(*args, **kw)
-        self.server = AudioServer()
+        self.server_config = make_config() if server_config is None else server_config
+        self.remote_engine = remote_engine
+        self.server = None if remote_engine else AudioServer(config=self.server_config)
         # How do we have polyphony:
-        # Have an array of Synth objects that are always running in the background.
-        # When a key is pressed, An envelope is applied onto the synth that corresponds
-        # to the ADSR parameters.Each ADSR and Synth is distinct so we can have as many
-        # notes as there are keys to press
+        # Have a fixed pool of voices, each a Synth with its own ADSR envelope.
+        # When a key is pressed, a free voice is retuned to the key's frequency and its
+        # envelope is started. If every voice is busy, the oldest note is stolen, so the
+        # amount of oscillators depends on the polyphony and not the EDO
 
         # Distortion has set params, can only control drive amount and not clip function
         self.distortion = 0
         # Reverb has set params, can only control dry/wet for now
         self.reverb = 0
-        self.fm_freq = 100
-        self.apply_fm = False
+        self.fm_freq = DEFAULT_FM_FREQ
+        self.fm_index = DEFAULT_FM_INDEX
+        self.attack = DEFAULT_ATTACK
+        self.decay = DEFAULT_DECAY
+        self.sustain = DEFAULT_SUSTAIN
+        self.release = DEFAULT_RELEASE
+        self.presets = PresetStore(preset_dir)
+        # Patch of the preset picked to be switched to next
+        self.next_patch = None
         self.init_ui()
+        if remote_engine:
+            # Takes the place of both the engine and the scheduler
+            self.engine = EngineProcess(
+                self.server_config,
+                "Sine",
+                NUM_VOICES,
+                STEAL_MODE,
+                self.distortion,
+                self.reverb,
+                self.fm_freq,
+                self.fm_index,
+                LOOKAHEAD,
+            )
+            self.scheduler = self.engine
+        else:
+            # Builds the next preset on a standby engine so switching to it is gapless
+            self.engine = PresetSwitcher(make_patch(voices=NUM_VOICES), STEAL_MODE)
+            # Notes start on the audio clock a fixed time after their key was pressed
+            self.scheduler = EventScheduler(self.server, self.engine, LOOKAHEAD)
+        # One thread for the life of the frame plays the keypresses of whichever
+        # keyboard is current, it is a daemon so it also shuts down when main loop stops
+        self.dispatcher = KeypressDispatcher(self.handle_keypresses)
+        self.dispatcher.start()
         self.change_synth_edo(STARTING_EDO)
 
+        self.init_param_updates()
+        self.init_quality(quality, quality_down_cpu, quality_up_cpu)
+        self.init_monitor(monitor_log, monitor_interval, alert_thresholds)
         self.is_playing = False
-        self.server.play()
-        self.final_output.out()
+        if not remote_engine:
+            self.server.play()
+            self.engine.out()
+            self.scope.set_tap(SignalTap(self.engine.final_output))
 
         self.SetFocus()
         self.Bind(wx.EVT_CLOSE, self.on_exit)
         self.Center()
         self.Show()
 
-        # Start a new thread to get keypresses
-        # Has daemon=True so it also shuts down when main loop stops
-        # thrd_keypress = threading.Thread(target=self.get_keypress, daemon=True)
-        # thrd_keypress.start()
-
     def on_exit(self, event):
-        """Stops the audio server on exit"""
-        self.server.stop()
+        """Stops the keyboard, the dispatcher, and the audio server on exit"""
+        self.scope.stop()
+        self.param_timer.Stop()
+        self.monitor_timer.Stop()
+        for sink in self.monitor_sinks:
+            sink.close()
+        self.keyboard.stop_listening()
+        self.dispatcher.stop()
+        if self.remote_engine:
+            self.engine.stop()
+        else:
+            self.server.stop()
         sys.exit(0)
 
     def init_ui(self):
@@ -102,19 +196,97 @@ class PycrotonalFrame(wx.Frame):
         self.wave_select.SetSelection(0)
         main_box.Add(self.wave_select, 0, wx.ALIGN_CENTER_HORIZONTAL, 10)
         self.Bind(EVT_CHOICE, self.handle_waveform_change, self.wave_select)
+        # QUALITY
+        quality_box = wx.BoxSizer(wx.HORIZONTAL)
+        lbl_quality = wx.StaticText(panel, label="Quality:", style=wx.ALIGN_CENTER)
+        quality_box.Add(lbl_quality, 0, wx.ALIGN_CENTER_VERTICAL | wx.RIGHT, 5)
+        self.quality_select = wx.Choice(panel, choices=list(QUALITY_MODES))
+        quality_box.Add(self.quality_select, 0, 0, 10)
+        self.Bind(EVT_CHOICE, self.handle_quality_change, self.quality_select)
+        main_box.Add(quality_box, 0, wx.ALIGN_CENTER_HORIZONTAL | wx.TOP, 5)
         # CONTROLS
         params_box = self.init_params_sizer(panel)
         main_box.Add(params_box, 0, wx.ALL | wx.EXPAND, 10)
 
+        # PRESETS
+        preset_box = self.init_preset_sizer(panel)
+        main_box.Add(preset_box, 0, wx.ALL | wx.EXPAND, 10)
+
         # EDO and KEYMAP
         keymap_box = self.init_keymap_sizer(panel)
         main_box.Add(keymap_box, 0, wx.ALL | wx.EXPAND, 10)
 
-        # Waveform oscilloscope
-        # self.osc_scope = PyoGuiScope(panel)
-        # main_box.Add(self.osc_scope, 0, wx.ALIGN_CENTER_HORIZONTAL, 2)
+        # Oscilloscope, spectrum, and level meter of the output
+        self.scope = ScopePanel(panel, self.server_config["sample_rate"])
+        main_box.Add(self.scope, 0, wx.ALL | wx.EXPAND, 10)
         panel.SetSizer(main_box)
         main_box.Layout()
+        self.CreateStatusBar()
+
+    def init_param_updates(self):
+        """Knob values are coalesced so a drag only applies the latest value once per
+        audio block, and its labels are only redrawn every PARAM_REFRESH_MS"""
+        if self.remote_engine:
+            self.params = ParameterScheduler(self.engine)
+        else:
+            self.params = ParameterScheduler(self.engine, self.server)
+        # Text to show on each widget at the next refresh, with the method that shows it
+        self.pending_labels = {}
+        self.param_timer = wx.Timer(self)
+        self.Bind(wx.EVT_TIMER, self.on_param_timer, self.param_timer)
+        self.param_timer.Start(PARAM_REFRESH_MS)
+
+    def on_param_timer(self, event):
+        """Sends the knob values to a remote engine, and redraws the changed labels"""
+        if self.remote_engine:
+            self.params.apply_pending()
+        pending, self.pending_labels = self.pending_labels, {}
+        for widget, (setter, text) in pending.items():
+            setter(text)
+            widget.Refresh()
+
+    def show_later(self, widget, setter, text):
+        """Shows text with the widget's setter at the next refresh"""
+        self.pending_labels[widget] = (setter, text)
+
+    def init_monitor(self, log_path, interval, thresholds):
+        """Starts sampling the server's health into the status bar and the log"""
+        self.monitor = None
+        self.monitor_sinks = []
+        self.monitor_timer = wx.Timer(self)
+        if self.remote_engine:
+            self.SetStatusText("The audio engine runs in its own process")
+            return
+        if log_path is not None:
+            self.monitor_sinks.append(JsonLinesSink(log_path))
+        # The switcher counts the voices of whichever engine is live
+        self.monitor = ServerMonitor(
+            self.server,
+            self.engine,
+            thresholds,
+            sinks=self.monitor_sinks,
+        )
+        self.Bind(wx.EVT_TIMER, self.on_monitor_timer, self.monitor_timer)
+        self.monitor_timer.Start(int(interval * 1000))
+
+    def on_monitor_timer(self, event):
+        """Takes a health sample, lets the governor step the quality from it,
+        and shows it in the status bar"""
+        snapshot = self.monitor.sample()
+        self.governor.update(snapshot)
+        status = format_status(snapshot) + "  quality " + self.governor.tier
+        self.SetStatusText(status)
+
+    def init_quality(self, mode, down_cpu, up_cpu):
+        """Applies the starting quality, a remote engine always plays at full quality"""
+        self.quality_select.SetStringSelection(mode)
+        if self.remote_engine:
+            self.governor = None
+            self.quality_select.Disable()
+            return
+        self.governor = QualityGovernor(
+            self.engine, mode, down_cpu, up_cpu, call=self.scheduler.call
+        )
 
     def init_params_sizer(self, panel):
         """Initialize the parameters box with FM, reverb, and distortion"""
@@ -227,16 +399,34 @@ class PycrotonalFrame(wx.Frame):
         params_box.Add(rev_dist_param_box, 0, wx.TOP | wx.EXPAND, 10)
         return params_box
 
+    def init_preset_sizer(self, panel):
+        """Initialize the preset row, picking a preset prepares it and Switch plays it"""
+        preset_box = wx.BoxSizer(wx.HORIZONTAL)
+        lbl_preset = wx.StaticText(panel, label="Preset:", style=wx.ALIGN_CENTER)
+        preset_box.Add(lbl_preset, 0, wx.ALIGN_CENTER_VERTICAL | wx.RIGHT, 5)
+        self.preset_select = wx.Choice(panel, choices=self.presets.names())
+        preset_box.Add(self.preset_select, 1, wx.RIGHT, 5)
+        self.Bind(EVT_CHOICE, self.handle_preset_select, self.preset_select)
+        self.btn_preset_switch = wx.Button(panel, label="Switch")
+        preset_box.Add(self.btn_preset_switch, 0, wx.RIGHT, 20)
+        self.Bind(EVT_BUTTON, self.handle_preset_switch, self.btn_preset_switch)
+        self.txt_preset_name = wx.TextCtrl(panel, value="")
+        preset_box.Add(self.txt_preset_name, 1, wx.RIGHT, 5)
+        self.btn_preset_save = wx.Button(panel, label="Save")
+        preset_box.Add(self.btn_preset_save, 0, 0, 5)
+        self.Bind(EVT_BUTTON, self.handle_preset_save, self.btn_preset_save)
+        return preset_box
+
     def init_keymap_sizer(self, panel):
         """Initialize the containers for EDO selection and keymapping"""
         keymap_sizer = wx.BoxSizer(wx.VERTICAL)
         edo_box = wx.BoxSizer(wx.HORIZONTAL)
         lbl_edo = wx.StaticText(panel, label="EDO:", style=wx.ALIGN_CENTER)
         edo_box.Add(lbl_edo, 0, 0, 5)
-        edo_select = wx.Choice(panel, choices=[str(i) for i in range(1, 61)])
-        edo_select.SetSelection(STARTING_EDO - 1)
-        edo_box.Add(edo_select, 0, 0, 10)
-        self.Bind(EVT_CHOICE, self.handle_edo_change, edo_select)
+        self.edo_select = wx.Choice(panel, choices=[str(i) for i in range(1, 61)])
+        self.edo_select.SetSelection(STARTING_EDO - 1)
+        edo_box.Add(self.edo_select, 0, 0, 10)
+        self.Bind(EVT_CHOICE, self.handle_edo_change, self.edo_select)
 
         keymap_sizer.Add(edo_box, 0, wx.TOP | wx.ALIGN_CENTER_HORIZONTAL, 10)
         self.lbl_frequency = wx.StaticText(
@@ -270,16 +460,18 @@ class PycrotonalFrame(wx.Frame):
         """Handles the fm_index knob"""
         value = event.GetValue()
         self.fm_index = value
-        self.lbl_fm_index.SetLabel("FM Index: " + str(value))
-        self.lbl_fm_index.Refresh()
+        # One modulator is shared by every voice so this is a single update
+        self.params.set("fm_index", self.fm_index)
+        label = "FM Index: " + str(value)
+        self.show_later(self.lbl_fm_index, self.lbl_fm_index.SetLabel, label)
         self.SetFocus()
 
     def handle_fm_freq_knob(self, event):
         """Handles the fm_freq knob"""
         value = event.GetValue()
         self.fm_freq = value
-        self.txt_fm_freq.SetValue(str(value))
-        self.txt_fm_freq.Refresh()
+        self.params.set("fm_freq", self.fm_freq)
+        self.show_later(self.txt_fm_freq, self.txt_fm_freq.SetValue, str(value))
         self.SetFocus()
 
     def handle_fm_freq_input(self, event):
@@ -287,8 +479,9 @@ class PycrotonalFrame(wx.Frame):
 
         try:
             value = int(self.txt_fm_freq.GetValue())
-            if value > 0 & value < FM_MAX_FREQ:
+            if 0 < value < FM_MAX_FREQ:
                 self.fm_freq = value
+                self.params.set("fm_freq", self.fm_freq)
                 self.ctrl_fm_freq.SetValue(int(value))
                 self.ctrl_fm_freq.Refresh()
         except ValueError:
@@ -300,9 +493,9 @@ class PycrotonalFrame(wx.Frame):
         value = event.GetValue()
         self.reverb = value / 100
         # Update the reverb PyoObject
-        self.reverb_effect.setBal(self.reverb)
-        self.lbl_reverb.SetLabel("Reverb: " + str(value))
-        self.lbl_reverb.Refresh()
+        self.params.set("reverb", self.reverb)
+        label = "Reverb: " + str(value)
+        self.show_later(self.lbl_reverb, self.lbl_reverb.SetLabel, label)
         self.SetFocus()
 
     def handle_distortion_knob(self, event):
@@ -310,50 +503,28 @@ class PycrotonalFrame(wx.Frame):
         value = event.GetValue()
         self.distortion = value / 100
         # Update the distortion effect and reverb effect PyoObjects
-        self.dist_effect.setDrive(self.distortion)
-        self.reverb_effect.setInput(self.dist_effect)
-        self.lbl_dist.SetLabel("Distortion: " + str(value))
-        self.lbl_dist.Refresh()
+        self.params.set("distortion", self.distortion)
+        label = "Distortion: " + str(value)
+        self.show_later(self.lbl_dist, self.lbl_dist.SetLabel, label)
         self.SetFocus()
 
     def handle_waveform_change(self, event):
-        """Handles the waveform selection change and creates new synth objects"""
-        # Stop previous synths to remove from processing loop
-        for synth in self.synths.values():
-            synth.get_synth().stop()
-
+        """Handles the waveform selection change and rebuilds the voices.
+        The voices are switched on the audio thread, between the notes it plays"""
+        # Rebuilding the voices stops the previous synths to remove them from processing loop
         if event.GetSelection() == SINE_INDEX:
-            self.synths = {
-                key: SineWave(freq, self.adsr_arr[i])
-                for i, (key, freq) in enumerate(self.keyboard.get_scale())
-            }
+            self.scheduler.call(self.engine.set_waveform, SineWave)
         elif event.GetSelection() == SQUARE_INDEX:
-            self.synths = {
-                key: SquareWave(freq, self.adsr_arr[i])
-                for i, (key, freq) in enumerate(self.keyboard.get_scale())
-            }
+            self.scheduler.call(self.engine.set_waveform, SquareWave)
         elif event.GetSelection() == TRIANGLE_INDEX:
-            self.synths = {
-                key: TriangleWave(freq, self.adsr_arr[i])
-                for i, (key, freq) in enumerate(self.keyboard.get_scale())
-            }
+            self.scheduler.call(self.engine.set_waveform, TriangleWave)
         elif event.GetSelection() == SAW_INDEX:
-            self.synths = {
-                key: SawtoothWave(freq, self.adsr_arr[i])
-                for i, (key, freq) in enumerate(self.keyboard.get_scale())
-            }
-
-        # Mix all together
-        raw_synths = [synth.get_synth() for synth in self.synths.values()]
-        self.mix = Mix(raw_synths, 2)
-        self.dist_effect = Disto(self.mix, drive=self.distortion, slope=0.8)
-        self.reverb_effect = Freeverb(
-            self.dist_effect, size=0.8, damp=0.7, bal=self.reverb
-        )
-        self.final_output = Compress(self.reverb_effect)
-        # Have out send so effects are applied again
-        self.final_output.out()
+            self.scheduler.call(self.engine.set_waveform, SawtoothWave)
+        self.SetFocus()
 
+    def handle_quality_change(self, event):
+        """Handles the quality selection, a tier or auto"""
+        self.governor.set_mode(event.GetString())
         self.SetFocus()
 
     def handle_edo_change(self, event):
@@ -362,48 +533,26 @@ class PycrotonalFrame(wx.Frame):
         self.change_synth_edo(edo)
         self.SetFocus()
 
-    def change_synth_edo(self, edo):
-        """Initializes or changes the synth edo. Creates all synths and ADSR envelopes
-        Stops all previous synths to save computation cycles"""
+    def change_synth_edo(self, edo, root=None):
+        """Initializes or changes the synth edo by creating the keyboard for the scale.
+        The root in Hz is kept from the current keyboard if None.
+        The voices are retuned on every note so they do not depend on the edo.
+        The new keyboard shares the dispatcher's queue, so no thread is started.
+        Releases all held notes since their keys may not exist in the new scale"""
         try:
             self.keyboard.stop_listening()
-            self.wave_select.SetSelection(0)
-            for synth in self.synths.values():
-                synth.get_synth().stop()
+            if root is None:
+                root = self.keyboard.root
         except AttributeError:
             # Keyboard does not exist yet
             pass
-        self.keyboard = Keyboard(440, edo)
+        if root is None:
+            root = STARTING_ROOT
+        self.scheduler.cancel()
+        self.scheduler.call(self.engine.release_all)
+        self.keyboard = Keyboard(root, edo, self.dispatcher.msg_queue)
+        self.dispatcher.set_keyboard(self.keyboard)
         self.keyboard.start_listening()
-        # Have array of independent adsr so that each note has its own envelope
-        self.adsr_arr = [
-            Adsr(attack=0.01, decay=0.01, release=0.01, mul=0.2) for _ in range(edo)
-        ]
-        # Create all synths and so when the key is pressed, it starts the synth associated with the key
-        self.synths = {
-            key: SineWave(freq, self.adsr_arr[i])
-            for i, (key, freq) in enumerate(self.keyboard.get_scale())
-        }
-        raw_synths = [synth.get_synth() for synth in self.synths.values()]
-        self.mix = Mix(raw_synths, 2)
-        self.fm_ratio = self.fm_freq / 440
-        self.fm_index = 1
-        if self.apply_fm:
-            # Putting fm synthesis on hold for right now
-            self.fm_synth = FM(carrier=Sine())
-            # So there's sound if you really listen hard but not usable
-            self.dist_effect = Disto(self.fm_synth, drive=self.distortion, slope=0.8)
-            self.final_output = Freeverb(
-                self.fm_synth, size=0.8, damp=0.7, bal=self.reverb
-            )
-        else:
-            self.dist_effect = Disto(self.mix, drive=self.distortion, slope=0.8)
-            self.reverb_effect = Freeverb(
-                self.dist_effect, size=0.8, damp=0.7, bal=self.reverb
-            )
-            self.final_output = Compress(self.reverb_effect, ratio=4)
-        thrd_keypress = threading.Thread(target=self.get_keypress, daemon=True)
-        thrd_keypress.start()
 
         self.update_keymapping_label()
 
@@ -422,48 +571,124 @@ class PycrotonalFrame(wx.Frame):
 
     def handle_attack_change(self, event):
         """Handles attack slider of ADSR"""
-        attack = self.attack_slider.GetValue()
-        attack = rescale(attack, 0, 100, 0, 10, mode="exp")
-        for adsr in self.adsr_arr:
-            adsr.setAttack(attack)
+        self.attack = slider_value(self.attack_slider.GetValue())
+        self.params.set("attack", self.attack)
         self.SetFocus()
 
     def handle_decay_change(self, event):
         """Handles decay slider of ADSR"""
-        decay = self.decay_slider.GetValue()
-        decay = rescale(decay, 0, 100, 0, 10, mode="exp")
-        for adsr in self.adsr_arr:
-            adsr.setDecay(decay)
+        self.decay = slider_value(self.decay_slider.GetValue())
+        self.params.set("decay", self.decay)
         self.SetFocus()
 
     def handle_sustain_change(self, event):
         """Handles sustain slider of ADSR"""
-        sustain = self.sustain_slider.GetValue()
-        sustain = rescale(sustain, 0, 100, 0, 10, mode="exp")
-        for adsr in self.adsr_arr:
-            adsr.setSustain(sustain)
+        self.sustain = slider_value(self.sustain_slider.GetValue())
+        self.params.set("sustain", self.sustain)
         self.SetFocus()
 
     def handle_release_change(self, event):
         """Handles release slider of ADSR"""
-        release = self.release_slider.GetValue()
-        release = rescale(release, 0, 100, 0, 10, mode="exp")
-        for adsr in self.adsr_arr:
-            adsr.setRelease(release)
+        self.release = slider_value(self.release_slider.GetValue())
+        self.params.set("release", self.release)
+        self.SetFocus()
+
+    def current_patch(self):
+        """Patch of every control as it is set now"""
+        return make_patch(
+            waveform=self.wave_select.GetStringSelection(),
+            attack=self.attack,
+            decay=self.decay,
+            sustain=self.sustain,
+            release=self.release,
+            reverb=self.reverb,
+            distortion=self.distortion,
+            fm_freq=self.fm_freq,
+            fm_index=self.fm_index,
+            edo=self.keyboard.edo,
+            root=self.keyboard.root,
+            voices=NUM_VOICES,
+        )
+
+    def handle_preset_save(self, event):
+        """Saves the controls as the preset named in the text box"""
+        name = self.txt_preset_name.GetValue().strip()
+        try:
+            self.presets.save(name, self.current_patch())
+        except ValueError as error:
+            print(error)
+        else:
+            self.preset_select.Set(self.presets.names())
+            self.preset_select.SetStringSelection(name)
+        self.SetFocus()
+
+    def handle_preset_select(self, event):
+        """Loads the picked preset and builds it on the standby engine"""
+        try:
+            self.next_patch = self.presets.load(event.GetString())
+        except ValueError as error:
+            print(error)
+            self.next_patch = None
+        if self.next_patch is not None and not self.remote_engine:
+            self.scheduler.call(self.engine.prepare, self.next_patch)
+        self.SetFocus()
+
+    def handle_preset_switch(self, event):
+        """Switches to the picked preset. A remote engine has no standby engine,
+        so the preset is sent to it parameter by parameter instead"""
+        if self.next_patch is not None:
+            # Knob values not applied yet belong to the patch being left
+            if self.remote_engine:
+                self.params.apply_pending()
+                apply_patch(self.engine, self.next_patch)
+            else:
+                self.scheduler.call(self.params.apply_pending)
+                self.scheduler.call(self.engine.switch)
+            self.show_patch(self.next_patch)
+            # The standby engine is fading out, the next preset is prepared once picked
+            self.next_patch = None
+            self.preset_select.SetSelection(wx.NOT_FOUND)
         self.SetFocus()
 
-    def get_keypress(self):
-        """Runs in a thread to get the keypresses and play the corresponding synth"""
-        while True:
-            # Also need wxpython input for edo
-            try:
-                key, freq, msg = self.keyboard.get_keypress()
-                if msg == "start":
-                    self.lbl_frequency.SetLabel(
-                        "Key: " + str(key) + "Frequency: " + str(freq)
-                    )
-                    self.synths[key].play()
-                elif msg == "stop":
-                    self.synths[key].stop()
-            except ValueError as error:
-                print(error)
+    def show_patch(self, patch):
+        """Sets every control to a patch that is already playing"""
+        self.wave_select.SetStringSelection(patch["waveform"])
+        self.attack = patch["attack"]
+        self.decay = patch["decay"]
+        self.sustain = patch["sustain"]
+        self.release = patch["release"]
+        self.attack_slider.SetValue(slider_position(self.attack))
+        self.decay_slider.SetValue(slider_position(self.decay))
+        self.sustain_slider.SetValue(slider_position(self.sustain))
+        self.release_slider.SetValue(slider_position(self.release))
+        self.reverb = patch["reverb"]
+        self.distortion = patch["distortion"]
+        self.ctrl_reverb.SetValue(round(self.reverb * 100))
+        self.ctrl_dist.SetValue(round(self.distortion * 100))
+        self.lbl_reverb.SetLabel("Reverb: " + str(round(self.reverb * 100)))
+        self.lbl_dist.SetLabel("Distortion: " + str(round(self.distortion * 100)))
+        self.fm_freq = patch["fm_freq"]
+        self.fm_index = patch["fm_index"]
+        self.ctrl_fm_freq.SetValue(int(self.fm_freq))
+        self.txt_fm_freq.SetValue(str(self.fm_freq))
+        self.ctrl_fm_index.SetValue(int(self.fm_index))
+        self.lbl_fm_index.SetLabel("FM Index: " + str(self.fm_index))
+        if (patch["edo"], patch["root"]) != (self.keyboard.edo, self.keyboard.root):
+            self.edo_select.SetSelection(patch["edo"] - 1)
+            self.change_synth_edo(patch["edo"], patch["root"])
+
+    def handle_keypresses(self, events):
+        """Runs on the dispatcher thread to schedule a batch of keypresses.
+        Only the last note of the batch is shown, and the label is set on the GUI thread"""
+        shown = None
+        for key, freq, msg, captured in events:
+            self.scheduler.schedule(key, freq, msg, captured)
+            if msg == "start":
+                shown = (key, freq, captured)
+        if shown is not None:
+            wx.CallAfter(self.show_frequency, *shown)
+
+    def show_frequency(self, key, freq, captured):
+        """Shows the key and frequency of the last note played"""
+        self.lbl_frequency.SetLabel("Key: " + str(key) + "Frequency: " + str(freq))
+        latency.record("displayed", captured)
@@ -2,6 +2,7 @@
 from queue import Queue, Empty
 from pynput import keyboard
 from pynput.keyboard import Key, KeyCode
+from . import latency
 from .freqhelper import find_scale
 
 # This was the best way to implement the most amount of flexibility.
@@ -204,33 +205,68 @@ SCALE_60_EDO = [
 ]
 
 
+# Every layout and the largest edo it can play, from smallest to largest
+KEY_LAYOUTS = (
+    (12, SCALE_12_EDO),
+    (24, SCALE_24_EDO),
+    (36, SCALE_36_EDO),
+    (48, SCALE_48_EDO),
+    (60, SCALE_60_EDO),
+)
+MAX_EDO = KEY_LAYOUTS[-1][0]
+
+
+def compile_degree_tables():
+    """Compiles every layout into hash tables of key to scale degree, one per edo"""
+    tables = {}
+    for edo in range(1, MAX_EDO + 1):
+        layout = next(scale for max_edo, scale in KEY_LAYOUTS if edo <= max_edo)
+        tables[edo] = {key: degree for degree, key in enumerate(layout[0:edo])}
+    return tables
+
+
+# Compiled once at import so that looking up a keypress is constant time
+DEGREE_TABLES = compile_degree_tables()
+
+
 class Keyboard:
     """Keyboard Listener class, will listen to keypresses
     Uses the freqhelper class to construct a scale of frequencies and"""
 
-    def __init__(self, root, edo):
-        """Constructor, makes a keyboard listener with a root and a scale of freqs"""
+    def __init__(self, root, edo, msg_queue=None):
+        """Constructor, makes a keyboard listener with a root and a scale of freqs
+        msg_queue lets keyboards share the queue of one dispatcher, a new queue is made if None"""
         self.root = root
         self.edo = edo
         self.key_scale = self.find_key_scale(edo)
         self.freq_scale = find_scale(root, edo)
-        self.msg_queue = Queue()
+        # Key to (degree, frequency), and the keys that can sound for the listener to filter
+        self.key_map = {
+            key: (degree, self.freq_scale[degree])
+            for key, degree in DEGREE_TABLES[edo].items()
+        }
+        self.mapped_keys = frozenset(self.key_map)
+        self.msg_queue = Queue() if msg_queue is None else msg_queue
         self.listener = keyboard.Listener(
             on_press=self.on_press, on_release=self.on_release
         )
 
     def on_press(self, key):
-        """on press handler"""
-        print("press")
-        self.msg_queue.put((key, "start"))
+        """on press handler, keys outside the scale are never queued
+        Every message is stamped with the time it was captured"""
+        if key in self.mapped_keys:
+            captured = latency.now()
+            self.msg_queue.put((key, "start", captured))
+            latency.record("queued", captured)
 
     def on_release(self, key):
-        """on release handler"""
-        print("release")
-        self.msg_queue.put((key, "stop"))
+        """on release handler, keys outside the scale are never queued"""
         if key == keyboard.Key.esc:
             # Stop listener
             return False
+        if key in self.mapped_keys:
+            self.msg_queue.put((key, "stop", latency.now()))
+        return None
 
     def start_listening(self):
         """Listen to keyboard"""
@@ -244,16 +280,9 @@ class Keyboard:
         """returns the keys that will be associated with a frequency"""
         if edo < 1:
             raise ValueError("This is not a valid edo")
-        if edo <= 12:
-            return SCALE_12_EDO[0:edo]
-        if edo <= 24:
-            return SCALE_24_EDO[0:edo]
-        if edo <= 36:
-            return SCALE_36_EDO[0:edo]
-        if edo <= 48:
-            return SCALE_48_EDO[0:edo]
-        if edo <= 60:
-            return SCALE_60_EDO[0:edo]
+        for max_edo, scale in KEY_LAYOUTS:
+            if edo <= max_edo:
+                return scale[0:edo]
         raise ValueError("This is not a valid edo")
 
     def get_scale(self):
@@ -262,14 +291,17 @@ class Keyboard:
 
     def get_keypress(self):
         """Allows GUI to get frequency associated with keypress in a (kind of) async way
-        returns the frequency, index of the keypress in its array, and key actually pressed"""
+        returns the key actually pressed, its frequency, the message,
+        and the time the keypress was captured"""
         try:
-            key, msg = self.msg_queue.get(block=True)
+            key, msg, captured = self.msg_queue.get(block=True)
         except Empty:
             print("empty")
             return -1
         try:
-            index = self.key_scale.index(key)
-            return (key, self.freq_scale[index], msg)
-        except ValueError as non_exist_freq:
+            _, freq = self.key_map[key]
+            if msg == "start":
+                latency.record("dequeued", captured)
+            return (key, freq, msg, captured)
+        except KeyError as non_exist_freq:
             raise ValueError("freq doesnt exist") from non_exist_freq
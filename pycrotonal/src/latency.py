@@ -0,0 +1,108 @@
+"""Keypress to sound latency instrumentation.
+Every keypress is stamped with a monotonic clock when it is captured, and every hop it
+goes through records how long after the capture it got there. Recording does nothing
+until enable() is called, so the instrumentation costs one check when it is off"""
+import atexit
+import json
+import os
+import signal
+import sys
+import time
+from collections import deque
+import numpy as np
+
+# Hops of a keypress in order: put on the queue by the listener, taken off the queue,
+# the voice's envelope started, and shown on the GUI label
+STAGES = ("queued", "dequeued", "onset", "displayed")
+# Latencies kept per stage, older ones are dropped
+DEFAULT_WINDOW = 4096
+# Set to 1 to print the histograms at exit, or to a file path to write them as json
+ENVIRONMENT_VARIABLE = "PYCROTONAL_LATENCY"
+
+_TRACKER = None
+
+
+def now():
+    """Monotonic timestamp in nanoseconds used to stamp every hop. perf_counter is
+    system wide, so stamps from other threads and processes compare, and unlike
+    monotonic it is finer than a block on Windows, where monotonic ticks every 15.6ms"""
+    return time.perf_counter_ns()
+
+
+class LatencyTracker:
+    """Rolling windows of the latency since capture of every stage"""
+
+    def __init__(self, window=DEFAULT_WINDOW):
+        """Constructor, window is how many latencies are kept per stage"""
+        self._latencies = {stage: deque(maxlen=window) for stage in STAGES}
+
+    def record(self, stage, captured):
+        """Records that an event captured at the captured timestamp reached stage"""
+        self._latencies[stage].append(now() - captured)
+
+    def histograms(self):
+        """Returns the count, p50, p99 and max latency in milliseconds of every stage"""
+        histograms = {}
+        for stage, latencies in self._latencies.items():
+            if not latencies:
+                histograms[stage] = {"count": 0}
+                continue
+            millis = np.array(latencies, dtype=np.float64) / 1e6
+            p50, p99 = np.percentile(millis, [50, 99])
+            histograms[stage] = {
+                "count": len(millis),
+                "p50_ms": float(p50),
+                "p99_ms": float(p99),
+                "max_ms": float(millis.max()),
+            }
+        return histograms
+
+    def dump(self, path=None):
+        """Writes the histograms as json to path, or prints them when there is no path"""
+        report = json.dumps(self.histograms(), indent=2)
+        if path is None:
+            print(report, file=sys.stderr)
+        else:
+            with open(path, "w", encoding="utf-8") as report_file:
+                report_file.write(report)
+
+
+def record(stage, captured):
+    """Records a hop if the instrumentation is enabled"""
+    if _TRACKER is not None:
+        _TRACKER.record(stage, captured)
+
+
+def get_tracker():
+    """Returns the tracker, None if the instrumentation is not enabled"""
+    return _TRACKER
+
+
+def enable(path=None, window=DEFAULT_WINDOW, dump_at_exit=True):
+    """Starts recording latencies. The histograms are dumped to path at exit,
+    and on demand with SIGUSR1 where the platform has it"""
+    global _TRACKER  # pylint: disable=global-statement
+    tracker = LatencyTracker(window)
+    _TRACKER = tracker
+    if dump_at_exit:
+        atexit.register(tracker.dump, path)
+    if hasattr(signal, "SIGUSR1"):
+        try:
+            signal.signal(signal.SIGUSR1, lambda *_: tracker.dump(path))
+        except ValueError:
+            # Signals can only be handled from the main thread
+            pass
+    return tracker
+
+
+def disable():
+    """Stops recording latencies"""
+    global _TRACKER  # pylint: disable=global-statement
+    _TRACKER = None
+
+
+def enable_from_environment():
+    """Enables the instrumentation if PYCROTONAL_LATENCY is set"""
+    value = os.environ.get(ENVIRONMENT_VARIABLE)
+    if value:
+        enable(None if value == "1" else value)
@@ -0,0 +1,221 @@
+"""Headless load generator for the path from the keyboard callbacks to the voices.
+Synthetic presses and releases are fed to a real Keyboard's listener callbacks as fast as a
+target rate allows, and go through the real dispatcher, scheduler and voice pool of an
+offline server paced to the wall clock, to find the rate where the input path falls behind"""
+import os
+import random
+import tempfile
+import time
+from pynput.keyboard import KeyCode
+from .audioserver import AudioServer
+from .dispatcher import KeypressDispatcher
+from .engine import SynthEngine
+from .keyinput import Keyboard
+from .scheduler import EventScheduler, DEFAULT_LOOKAHEAD
+from .serverconfig import make_config
+from .waveforms.sinewave import SineWave
+
+PATTERNS = ("chords", "trills", "repeats", "unmapped", "mixed")
+# Events sent per second
+DEFAULT_RATE = 2000
+# Seconds events are sent for
+DEFAULT_DURATION = 2.0
+DEFAULT_EDO = 60
+CHORD_SIZE = 4
+# Notes in one trill
+TRILL_LENGTH = 16
+# Presses the operating system repeats while a key is held, before its release
+REPEAT_COUNT = 30
+# Keys that are not in any layout
+UNMAPPED_KEYS = [KeyCode.from_char(char) for char in "`<>?"]
+# Events sent between samples of the queue depth
+QUEUE_SAMPLE_EVERY = 64
+# Seconds to wait for the events already sent to be played
+DRAIN_TIMEOUT = 2.0
+# A rate is sustained if at least this fraction of it was sent
+SUSTAINED_FRACTION = 0.95
+
+
+def chord(keys, rng):
+    """Presses CHORD_SIZE keys together then releases them"""
+    notes = rng.sample(keys, min(CHORD_SIZE, len(keys)))
+    return [(key, "start") for key in notes] + [(key, "stop") for key in notes]
+
+
+def trill(keys, rng):
+    """Alternates legato between two neighbouring keys, each press before the last release"""
+    first = rng.randrange(len(keys) - 1)
+    pair = keys[first : first + 2]
+    events = [(pair[0], "start")]
+    for note in range(1, TRILL_LENGTH):
+        events += [(pair[note % 2], "start"), (pair[(note - 1) % 2], "stop")]
+    return events + [(pair[(TRILL_LENGTH - 1) % 2], "stop")]
+
+
+def repeat_storm(keys, rng):
+    """Holds a key down long enough for the operating system to repeat its press"""
+    key = rng.choice(keys)
+    return [(key, "start")] * REPEAT_COUNT + [(key, "stop")]
+
+
+def unmapped(keys, rng):
+    """Presses and releases keys that are not in the scale"""
+    key = rng.choice(UNMAPPED_KEYS)
+    return [(key, "start"), (key, "stop")]
+
+
+PHRASES = {
+    "chords": chord,
+    "trills": trill,
+    "repeats": repeat_storm,
+    "unmapped": unmapped,
+}
+
+
+def playable_keys(keyboard):
+    """Keys of the keyboard's scale with a character. The function keys are left out since
+    headless pynput backends can't tell them apart"""
+    return [key for key in keyboard.key_scale if isinstance(key, KeyCode)]
+
+
+def make_events(keys, pattern, count, seed=0):
+    """Returns at least count (key, msg) events of whole phrases of pattern,
+    every key pressed in a phrase is released by its end"""
+    if pattern not in PATTERNS:
+        raise ValueError("This is not a valid load pattern")
+    if len(keys) < 2:
+        raise ValueError("The load needs at least two playable keys")
+    rng = random.Random(seed)
+    phrases = list(PHRASES.values())
+    events = []
+    while len(events) < count:
+        phrase = rng.choice(phrases) if pattern == "mixed" else PHRASES[pattern]
+        events += phrase(keys, rng)
+    return events
+
+
+class CountingEngine:
+    """Passes notes to a SynthEngine, counting every note applied"""
+
+    def __init__(self, engine):
+        """Constructor"""
+        self.engine = engine
+        self.applied = 0
+
+    def note_on(self, key, freq):
+        """Starts a note"""
+        self.applied += 1
+        return self.engine.note_on(key, freq)
+
+    def note_off(self, key):
+        """Releases a note"""
+        self.applied += 1
+        self.engine.note_off(key)
+
+
+class RealtimePacer:
+    """Block callback that holds an offline server back to the wall clock, so the load
+    competes with the audio for the CPU the way it would with a sound card"""
+
+    def __init__(self, server):
+        """Constructor"""
+        self.server = server
+        self.sample_rate = server.config["sample_rate"]
+        self._start = None
+
+    def __call__(self):
+        """Sleeps until the wall clock reaches the start of this block"""
+        if self._start is None:
+            self._start = time.perf_counter()
+            return
+        due = self._start + self.server.server.getCurrentTimeInSamples() / self.sample_rate
+        ahead = due - time.perf_counter()
+        if ahead > 0:
+            time.sleep(ahead)
+
+
+def send(keyboard, events, rate):
+    """Calls the keyboard's listener callbacks for every event at rate events per second.
+    Returns the seconds it took and the queue depths seen along the way"""
+    depths = []
+    start = time.perf_counter()
+    for sent, (key, msg) in enumerate(events):
+        due = start + sent / rate
+        ahead = due - time.perf_counter()
+        if ahead > 0.001:
+            time.sleep(ahead)
+        if msg == "start":
+            keyboard.on_press(key)
+        else:
+            keyboard.on_release(key)
+        if sent % QUEUE_SAMPLE_EVERY == 0:
+            depths.append(keyboard.msg_queue.qsize())
+    return time.perf_counter() - start, depths
+
+
+def run_load(
+    pattern="mixed",
+    rate=DEFAULT_RATE,
+    duration=DEFAULT_DURATION,
+    edo=DEFAULT_EDO,
+    seed=0,
+    lookahead=DEFAULT_LOOKAHEAD,
+):
+    """Sends duration seconds of pattern at rate events per second through the keyboard,
+    dispatcher, scheduler and voices of an offline server, and reports how it kept up"""
+    server = AudioServer(config=make_config(backend="offline_nb"))
+    server.add_block_callback(RealtimePacer(server))
+    engine = CountingEngine(SynthEngine(SineWave))
+    scheduler = EventScheduler(server, engine, lookahead)
+
+    def handle_keypresses(events):
+        for key, freq, msg, captured in events:
+            scheduler.schedule(key, freq, msg, captured)
+
+    dispatcher = KeypressDispatcher(handle_keypresses)
+    keyboard = Keyboard(440, edo, dispatcher.msg_queue)
+    dispatcher.set_keyboard(keyboard)
+    events = make_events(playable_keys(keyboard), pattern, int(rate * duration), seed)
+    expected = sum(key in keyboard.mapped_keys for key, _ in events)
+
+    with tempfile.TemporaryDirectory() as directory:
+        # Long enough to never finish before it is stopped
+        length = duration + DRAIN_TIMEOUT + 60
+        server.record(os.path.join(directory, "load.wav"), length)
+        dispatcher.start()
+        server.play()
+        engine.engine.out()
+        seconds, depths = send(keyboard, events, rate)
+        drain_start = time.perf_counter()
+        while time.perf_counter() - drain_start < DRAIN_TIMEOUT and (
+            engine.applied < expected or scheduler.pending()
+        ):
+            time.sleep(0.001)
+        drain_seconds = time.perf_counter() - drain_start
+        dispatcher.stop()
+        server.stop()
+
+    return {
+        "pattern": pattern,
+        "target_rate": rate,
+        "sent": len(events),
+        "unmapped": len(events) - expected,
+        "events_per_second": len(events) / seconds,
+        "applied": engine.applied,
+        "applied_per_second": engine.applied / (seconds + drain_seconds),
+        "dropped": expected - engine.applied,
+        "stuck": engine.engine.voice_pool.num_active,
+        "max_queue_depth": max(depths),
+        "mean_queue_depth": sum(depths) / len(depths),
+        "drain_seconds": drain_seconds,
+        "late_events": scheduler.jitter()["late"],
+    }
+
+
+def is_sustained(report):
+    """Whether a run kept up with its target rate without losing or hanging notes"""
+    return (
+        report["events_per_second"] >= SUSTAINED_FRACTION * report["target_rate"]
+        and report["dropped"] == 0
+        and report["stuck"] == 0
+    )
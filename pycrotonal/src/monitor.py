@@ -0,0 +1,225 @@
+"""Health of the audio server while it plays: CPU use, late blocks and how many voices are busy.
+The audio thread only stamps the time and its own CPU time at every block, and the GUI takes
+a sample of every metric a few times a second, keeping a rolling series of them and raising
+alerts when a metric crosses its threshold, so an overload shows up before the buffers run dry"""
+import json
+import logging
+import time
+from collections import deque
+
+# Seconds between samples
+DEFAULT_INTERVAL = 0.5
+# Samples kept in the rolling series, a minute at the default interval
+DEFAULT_HISTORY = 120
+# A block starting more than this many block lengths after the previous one was late,
+# the sound card ran out of audio somewhere between them
+LATE_BLOCK_FACTOR = 1.5
+# Alerts are raised once a metric reaches its threshold, below the point where it is heard
+DEFAULT_THRESHOLDS = {
+    # CPU time the audio thread took per block, DSP and block callbacks, as a percent of
+    # the block length. At 100 the blocks take as long to compute as to play
+    "cpu_percent": 70.0,
+    "late_blocks": 1,
+    "clock_lag_ms": 20.0,
+    # Fraction of the pool holding notes, at 1 the next note steals a voice
+    "voice_usage": 1.0,
+}
+METRICS = tuple(DEFAULT_THRESHOLDS)
+
+logger = logging.getLogger(__name__)
+
+
+def make_thresholds(**thresholds):
+    """Returns the alert thresholds with thresholds replacing the defaults"""
+    unknown = set(thresholds) - set(DEFAULT_THRESHOLDS)
+    if unknown:
+        raise ValueError("Unknown metrics: " + ", ".join(sorted(unknown)))
+    thresholds = dict(DEFAULT_THRESHOLDS, **thresholds)
+    if any(threshold < 0 for threshold in thresholds.values()):
+        raise ValueError("Thresholds can't be negative")
+    return thresholds
+
+
+class ServerMonitor:
+    """Samples the health of an AudioServer and the voices playing on it"""
+
+    def __init__(
+        self,
+        server,
+        voice_pool=None,
+        thresholds=None,
+        history=DEFAULT_HISTORY,
+        sinks=(),
+    ):
+        """Constructor
+        server is the AudioServer to watch
+        voice_pool is the VoicePool whose busy voices are counted
+        thresholds are from make_thresholds, the defaults are used if None
+        sinks are called with every sample, such as a JsonLinesSink
+        """
+        self.server = server
+        self.voice_pool = voice_pool
+        self.thresholds = make_thresholds() if thresholds is None else thresholds
+        self.history = deque(maxlen=history)
+        self.sinks = list(sinks)
+        self.sample_rate = server.config["sample_rate"]
+        self.block_seconds = server.config["buffer_size"] / self.sample_rate
+        # An offline server renders as fast as it can, so its blocks are never late
+        self.realtime = not server.offline
+        # Only written by the audio thread
+        self._last_block = None
+        self._first_block = None
+        self._late_blocks = 0
+        self._max_gap = 0.0
+        # CPU time of the audio thread at the last block, and its total over the blocks
+        self._last_block_cpu = None
+        self._blocks = 0
+        self._block_cpu = 0.0
+        # Totals at the previous sample
+        self._sampled_late_blocks = 0
+        self._sampled_blocks = 0
+        self._sampled_block_cpu = 0.0
+        self._alerting = set()
+        server.add_block_callback(self._on_block)
+
+    def _on_block(self):
+        """Called at the start of every block, stamps when it started and adds the CPU time
+        the audio thread took since the previous block, the rest of the process is not
+        counted. pyo computes a block on the thread that calls its callback"""
+        cpu = time.thread_time()
+        if self._last_block_cpu is not None:
+            self._block_cpu += cpu - self._last_block_cpu
+            self._blocks += 1
+        self._last_block_cpu = cpu
+        stamp = time.perf_counter()
+        if self._last_block is None:
+            self._first_block = (stamp, self.server.server.getCurrentTimeInSamples())
+        else:
+            gap = stamp - self._last_block
+            if gap > self._max_gap:
+                self._max_gap = gap
+            if gap > LATE_BLOCK_FACTOR * self.block_seconds:
+                self._late_blocks += 1
+        self._last_block = stamp
+
+    def clock_lag(self):
+        """Seconds the audio clock has fallen behind the wall clock since the first block"""
+        if self._first_block is None or not self.realtime:
+            return 0.0
+        start, start_samples = self._first_block
+        played = self.server.server.getCurrentTimeInSamples() - start_samples
+        return max(0.0, time.perf_counter() - start - played / self.sample_rate)
+
+    def sample(self):
+        """Takes a sample of every metric since the previous one, stores it in the series,
+        passes it to the sinks and returns it"""
+        blocks, block_cpu = self._blocks, self._block_cpu
+        played = (blocks - self._sampled_blocks) * self.block_seconds
+        cpu_percent = 100 * (block_cpu - self._sampled_block_cpu) / played if played else 0.0
+        self._sampled_blocks, self._sampled_block_cpu = blocks, block_cpu
+        late_blocks = self._late_blocks
+        max_gap, self._max_gap = self._max_gap, 0.0
+        snapshot = {
+            "time": time.time(),
+            "cpu_percent": cpu_percent,
+            "late_blocks": late_blocks - self._sampled_late_blocks if self.realtime else 0,
+            "max_gap_ms": max_gap * 1000 if self.realtime else 0.0,
+            "clock_lag_ms": self.clock_lag() * 1000,
+            "voices": 0,
+            "voice_usage": 0.0,
+        }
+        self._sampled_late_blocks = late_blocks
+        if self.voice_pool is not None:
+            snapshot["voices"] = self.voice_pool.num_active
+            snapshot["voice_usage"] = snapshot["voices"] / self.voice_pool.num_voices
+        snapshot["alerts"] = self.alerts(snapshot)
+        self.history.append(snapshot)
+        for sink in self.sinks:
+            sink(snapshot)
+        return snapshot
+
+    def alerts(self, snapshot):
+        """Returns the metrics of snapshot at or above their threshold,
+        logging a warning when a metric first crosses it"""
+        alerts = [
+            metric for metric in METRICS if snapshot[metric] >= self.thresholds[metric]
+        ]
+        for metric in set(alerts) - self._alerting:
+            logger.warning(
+                "%s reached %.3g, the threshold is %.3g",
+                metric,
+                snapshot[metric],
+                self.thresholds[metric],
+            )
+        self._alerting = set(alerts)
+        return alerts
+
+    def series(self, metric):
+        """Returns the values of metric in the rolling series, oldest first"""
+        return [snapshot[metric] for snapshot in self.history]
+
+    def total_late_blocks(self):
+        """Late blocks since the server started"""
+        return self._late_blocks
+
+
+class JsonLinesSink:
+    """Appends every sample to a file as one line of json"""
+
+    def __init__(self, path):
+        """Constructor, opens path for appending"""
+        self._file = open(path, "a", encoding="utf-8")  # pylint: disable=consider-using-with
+
+    def __call__(self, snapshot):
+        """Writes one sample"""
+        self._file.write(json.dumps(snapshot) + "\n")
+        self._file.flush()
+
+    def close(self):
+        """Closes the file"""
+        self._file.close()
+
+
+def format_status(snapshot):
+    """One line summary of a sample for the status bar"""
+    status = (
+        f"CPU {snapshot['cpu_percent']:.0f}%  "
+        f"late blocks {snapshot['late_blocks']}  "
+        f"max gap {snapshot['max_gap_ms']:.1f} ms  "
+        f"lag {snapshot['clock_lag_ms']:.1f} ms  "
+        f"voices {snapshot['voices']}"
+    )
+    if snapshot["alerts"]:
+        status += "  ALERT: " + ", ".join(snapshot["alerts"])
+    return status
+
+
+def add_arguments(parser):
+    """Adds the monitoring settings to an argparse parser"""
+    group = parser.add_argument_group("monitoring")
+    group.add_argument(
+        "--monitor-log", help="file every health sample is appended to as json lines"
+    )
+    group.add_argument(
+        "--monitor-interval",
+        type=float,
+        default=DEFAULT_INTERVAL,
+        help="seconds between samples",
+    )
+    for metric in METRICS:
+        group.add_argument(
+            "--alert-" + metric.replace("_", "-"),
+            type=float,
+            dest="alert_" + metric,
+            help=f"alert threshold, default {DEFAULT_THRESHOLDS[metric]}",
+        )
+
+
+def thresholds_from_args(args):
+    """Returns the alert thresholds set by the flags of args"""
+    thresholds = {}
+    for metric in METRICS:
+        value = getattr(args, "alert_" + metric, None)
+        if value is not None:
+            thresholds[metric] = value
+    return make_thresholds(**thresholds)
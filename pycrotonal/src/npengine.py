@@ -0,0 +1,223 @@
+"""Pure NumPy synthesis engine that renders voices in blocks without a pyo server.
+Every voice reads a single cycle table summed from the same spectrum as its Synth subclass,
+and every active voice is processed at once as one 2d array per block"""
+import wave
+import numpy as np
+from .patch import WAVEFORM_CLASSES
+from .render import event_frequencies, render_length, DEFAULT_TAIL
+from .waveforms.synth import SAMPLE_RATE
+
+DEFAULT_BLOCK_SIZE = 256
+# Same gain as the envelopes of the voice pool
+VOICE_GAIN = 0.2
+# Same slope as the distortion in the effects chain
+DISTORTION_SLOPE = 0.8
+# pyo's Disto keeps the drive under 1 so the curve stays finite
+MAX_DRIVE = 0.998
+# Samples in the single cycle table of every voice
+TABLE_SIZE = 2048
+
+
+def adsr_envelope(age, held, attack, decay, sustain, release):
+    """Linear ADSR envelope of many voices at once, like pyo's Adsr.
+    age is the time in seconds since each note started, negative before it starts
+    held is how long each note was held before its release, inf while still held"""
+    attack = max(attack, 1e-9)
+    decay = max(decay, 1e-9)
+    release = max(release, 1e-9)
+
+    def attack_decay_sustain(time):
+        decaying = 1 - (1 - sustain) * (time - attack) / decay
+        return np.where(
+            time < attack,
+            time / attack,
+            np.where(time < attack + decay, decaying, sustain),
+        )
+
+    released_at = attack_decay_sustain(np.minimum(held, age))
+    released_for = age - held
+    envelope = np.where(
+        released_for < 0,
+        released_at,
+        released_at * np.clip(1 - released_for / release, 0, 1),
+    )
+    return np.where(age < 0, 0.0, envelope)
+
+
+def distort(block, drive, slope=DISTORTION_SLOPE, last=0.0):
+    """Soft clipper followed by a one pole lowpass, the same as pyo's Disto.
+    The curve is (1 + k) x / (1 + k |x|) with k = 2 drive / (1 - drive), so a drive
+    of 0 leaves the block as it is and full scale always stays at full scale.
+    last is the final output sample of the previous block.
+    Returns the distorted block, its last sample is the next block's last"""
+    drive = np.clip(drive, 0, MAX_DRIVE)
+    k = 2 * drive / (1 - drive)
+    shaped = (1 + k) * block / (1 + k * np.abs(block))
+    if slope <= 0:
+        return shaped
+    # y[n] = (1 - slope) * x[n] + slope * y[n - 1], solved a chunk at a time.
+    # Chunks are kept short enough that slope ** n does not underflow
+    chunk = max(1, int(150 / -np.log10(slope)))
+    filtered = np.empty_like(shaped)
+    for start in range(0, len(shaped), chunk):
+        piece = shaped[start : start + chunk]
+        powers = slope ** np.arange(1, len(piece) + 1)
+        filtered[start : start + chunk] = powers * (
+            last + np.cumsum((1 - slope) * piece / powers)
+        )
+        last = filtered[start + len(piece) - 1]
+    return filtered
+
+
+def mix(voices):
+    """Sums every voice of a (voices, samples) block into one signal"""
+    return voices.sum(axis=0)
+
+
+class NumpyEngine:
+    """Block based synthesizer with a fixed number of voices held in arrays"""
+
+    def __init__(self, patch, sample_rate=SAMPLE_RATE, block_size=DEFAULT_BLOCK_SIZE):
+        """Constructor, patch is a patch made by make_patch
+        The patch's voices sets the polyphony, the oldest note is stolen when every voice is busy
+        """
+        self.patch = patch
+        self.sample_rate = sample_rate
+        self.block_size = block_size
+        self.synth_class = WAVEFORM_CLASSES[patch["waveform"]]
+        num_voices = patch["voices"]
+        self._freqs = np.zeros(num_voices)
+        # Sample each voice started and was released at, in samples since the engine started
+        self._onsets = np.zeros(num_voices)
+        self._releases = np.full(num_voices, np.inf)
+        self._active = np.zeros(num_voices, dtype=bool)
+        # One extra sample at the end of each table wraps around for interpolation
+        self._tables = np.zeros((num_voices, TABLE_SIZE + 1))
+        self._table_phases = np.arange(TABLE_SIZE + 1) / TABLE_SIZE
+        self._clock = 0
+        self._last_output = 0.0
+
+    @property
+    def time(self):
+        """Samples rendered so far"""
+        return self._clock
+
+    def active_voices(self):
+        """Number of voices that are sounding, including release tails"""
+        return int(self._active.sum())
+
+    def note_on(self, freq, start=None):
+        """Starts a note at freq, start is in samples and defaults to the next block
+        Returns the voice playing the note"""
+        start = self._clock if start is None else start
+        free = np.flatnonzero(~self._active)
+        voice = free[0] if len(free) else int(np.argmin(self._onsets))
+        harmonics, amplitudes = self.synth_class.spectrum(freq, self.sample_rate)
+        orders = np.asarray(harmonics) / freq
+        cycle = np.asarray(amplitudes) @ np.sin(
+            2 * np.pi * np.outer(orders, self._table_phases)
+        )
+        # Normalize each voice to a peak of 1 like the pyo wavetables
+        self._tables[voice] = cycle / np.abs(cycle).max()
+        self._freqs[voice] = freq
+        self._onsets[voice] = start
+        self._releases[voice] = np.inf
+        self._active[voice] = True
+        return voice
+
+    def note_off(self, voice, stop=None):
+        """Releases a voice, stop is in samples and defaults to the next block"""
+        stop = self._clock if stop is None else stop
+        self._releases[voice] = max(stop, self._onsets[voice])
+
+    def process_block(self):
+        """Renders the next block of every active voice, returns the mixed and distorted block"""
+        samples = self._clock + np.arange(self.block_size)
+        voices = np.flatnonzero(self._active)
+        self._clock += self.block_size
+        if len(voices) == 0:
+            block = np.zeros(self.block_size)
+        else:
+            # (voices, samples) arrays
+            age = (samples[None, :] - self._onsets[voices, None]) / self.sample_rate
+            held = (self._releases[voices] - self._onsets[voices])[:, None]
+            held = held / self.sample_rate
+            envelope = adsr_envelope(
+                age,
+                held,
+                self.patch["attack"],
+                self.patch["decay"],
+                self.patch["sustain"],
+                self.patch["release"],
+            )
+            # Phase is taken from the note start so voices never drift
+            phase = self._freqs[voices, None] * np.maximum(age, 0)
+            if self.patch["fm_index"] > 0:
+                phase = phase + self._fm_phase(samples, voices)
+            phase = np.mod(phase, 1)
+            position = phase * TABLE_SIZE
+            index = position.astype(np.intp)
+            frac = position - index
+            tables = self._tables[voices]
+            current = np.take_along_axis(tables, index, axis=1)
+            following = np.take_along_axis(tables, index + 1, axis=1)
+            oscillators = current + (following - current) * frac
+            block = mix(oscillators * envelope * VOICE_GAIN)
+            # Free voices once their release has finished
+            finished = age[:, -1] - held[:, 0] >= self.patch["release"]
+            self._active[voices[finished]] = False
+        block = distort(block, self.patch["distortion"], last=self._last_output)
+        self._last_output = block[-1]
+        return block
+
+    def _fm_phase(self, samples, voices):
+        """Phase in cycles the shared sine modulator has added to each voice since its onset.
+        The integral of index * fm_freq * sin(2 pi fm_freq t) has a closed form,
+        so FM costs two cosines per sample instead of a running sum"""
+        radians = 2 * np.pi * self.patch["fm_freq"] / self.sample_rate
+        started = np.minimum(samples[None, :], self._onsets[voices, None])
+        return (
+            self.patch["fm_index"]
+            / (2 * np.pi)
+            * (np.cos(radians * started) - np.cos(radians * samples[None, :]))
+        )
+
+    def render(self, events, tail=DEFAULT_TAIL):
+        """Renders note events like render.render, returns every sample as one array"""
+        freqs = event_frequencies(events, self.patch["root"], self.patch["edo"])
+        num_samples = int(render_length(events, self.patch, tail) * self.sample_rate)
+        starts = [round(event["time"] * self.sample_rate) for event in events]
+        stops = [
+            round((event["time"] + event["duration"]) * self.sample_rate)
+            for event in events
+        ]
+        order = sorted(range(len(events)), key=lambda i: starts[i])
+        voices = {}
+        blocks = []
+        next_event = 0
+        while self._clock < num_samples:
+            block_end = self._clock + self.block_size
+            # Notes inside this block start on their exact sample
+            while next_event < len(order) and starts[order[next_event]] < block_end:
+                i = order[next_event]
+                voices[i] = self.note_on(freqs[i], starts[i])
+                next_event += 1
+            for i, voice in list(voices.items()):
+                if stops[i] < block_end:
+                    # The voice may have been stolen by a later note
+                    if self._onsets[voice] == starts[i]:
+                        self.note_off(voice, stops[i])
+                    del voices[i]
+            blocks.append(self.process_block())
+        return np.concatenate(blocks)[:num_samples] if blocks else np.zeros(0)
+
+
+def write_wav(filename, samples, sample_rate=SAMPLE_RATE):
+    """Writes mono samples between -1 and 1 to a 16 bit wav file"""
+    pcm = (np.clip(samples, -1, 1) * 32767).astype("<i2")
+    # Wave_write directly, pylint takes wave.open for a Wave_read
+    with wave.Wave_write(filename) as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(pcm.tobytes())
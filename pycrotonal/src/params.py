@@ -0,0 +1,57 @@
+"""Coalesces knob and slider changes before they reach the engine.
+A knob sends an event for every pixel it is dragged, far more often than the audio can
+use them. Every change only replaces the latest value of its parameter, and the values
+are applied at most once per audio block, so a drag costs one engine call per block
+whatever its speed. The engine glides to the new values, so the steps do not zipper"""
+
+# Parameter names and the engine setter each one is applied with
+SETTERS = {
+    "distortion": "set_distortion",
+    "reverb": "set_reverb",
+    "attack": "set_attack",
+    "decay": "set_decay",
+    "sustain": "set_sustain",
+    "release": "set_release",
+    "fm_freq": "set_fm_freq",
+    "fm_index": "set_fm_index",
+}
+
+
+class ParameterScheduler:
+    """Keeps the latest value of every parameter changed since they were last applied"""
+
+    def __init__(self, engine, server=None):
+        """Constructor
+        engine is the SynthEngine, or EngineProcess, the values are applied to
+        server is the AudioServer to apply them at the start of every block of,
+        without one apply_pending must be called, such as from a GUI timer
+        """
+        self.engine = engine
+        self._pending = {}
+        self.received = 0
+        self.applied = 0
+        if server is not None:
+            server.add_block_callback(self.apply_pending)
+
+    def set(self, name, value):
+        """Changes a parameter, replacing its last value if it was not applied yet"""
+        if name not in SETTERS:
+            raise ValueError("This is not a parameter: " + name)
+        self.received += 1
+        self._pending[name] = value
+
+    def pending(self):
+        """Number of parameters waiting to be applied"""
+        return len(self._pending)
+
+    def apply_pending(self):
+        """Applies the latest value of every changed parameter.
+        Items are popped one at a time, which is atomic, so a value set by another
+        thread while this runs is either applied now or on the next call, never lost"""
+        while True:
+            try:
+                name, value = self._pending.popitem()
+            except KeyError:
+                return
+            getattr(self.engine, SETTERS[name])(value)
+            self.applied += 1
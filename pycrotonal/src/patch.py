@@ -0,0 +1,112 @@
+"""A patch holds every parameter needed to recreate a sound"""
+from .waveforms.sinewave import SineWave
+from .waveforms.squarewave import SquareWave
+from .waveforms.trianglewave import TriangleWave
+from .waveforms.sawtoothwave import SawtoothWave
+from .engine import SynthEngine
+from .fm import DEFAULT_FM_FREQ, DEFAULT_FM_INDEX
+from .voicebank import build_tables
+from .voicepool import DEFAULT_NUM_VOICES, STEAL_OLDEST
+from .waveforms.synth import Synth
+
+WAVEFORM_CLASSES = {
+    "Sine": SineWave,
+    "Square": SquareWave,
+    "Triangle": TriangleWave,
+    "Saw": SawtoothWave,
+}
+
+# ADSR times are in seconds and sustain is the amplitude held after the decay.
+# Reverb and distortion go from 0 to 1. The FM modulator frequency is in Hz and an index of 0 is off
+DEFAULT_PATCH = {
+    "waveform": "Sine",
+    "attack": 0.01,
+    "decay": 0.01,
+    "sustain": 0.707,
+    "release": 0.01,
+    "reverb": 0,
+    "distortion": 0,
+    "fm_freq": DEFAULT_FM_FREQ,
+    "fm_index": DEFAULT_FM_INDEX,
+    "edo": 12,
+    "root": 440,
+    "voices": DEFAULT_NUM_VOICES,
+}
+
+
+def make_patch(**params):
+    """Returns a complete patch with params replacing the defaults"""
+    unknown = set(params) - set(DEFAULT_PATCH)
+    if unknown:
+        raise ValueError("Unknown patch parameters: " + ", ".join(sorted(unknown)))
+    patch = dict(DEFAULT_PATCH, **params)
+    if patch["waveform"] not in WAVEFORM_CLASSES:
+        raise ValueError("This is not a valid waveform")
+    for param in ("reverb", "distortion"):
+        if not 0 <= patch[param] <= 1:
+            raise ValueError(param + " must be between 0 and 1")
+    for param in ("fm_freq", "fm_index"):
+        if patch[param] < 0:
+            raise ValueError(param + " can't be negative")
+    for param in ("edo", "voices"):
+        if not isinstance(patch[param], int) or patch[param] < 1:
+            raise ValueError(param + " must be a whole number of at least 1")
+    if patch["root"] <= 0:
+        raise ValueError("root must be above 0 Hz")
+    return patch
+
+
+def apply_envelope(envelope, patch):
+    """Sets the ADSR parameters of a patch on the EnvelopeParams shared by the voices"""
+    envelope.update(
+        attack=patch["attack"],
+        decay=patch["decay"],
+        sustain=patch["sustain"],
+        release=patch["release"],
+    )
+
+
+def waveform_name(synth_class):
+    """Name of a Synth subclass in a patch"""
+    for name, waveform in WAVEFORM_CLASSES.items():
+        if waveform is synth_class:
+            return name
+    raise ValueError("This waveform can't be saved in a patch")
+
+
+def build_waveform_tables(max_harmonics):
+    """Builds the wavetables of every waveform for every octave band, holding at most
+    max_harmonics, so changing the waveform on the audio thread never builds one"""
+    build_tables(WAVEFORM_CLASSES.values(), max_harmonics)
+
+
+def make_engine(patch, steal_mode=STEAL_OLDEST):
+    """Builds a SynthEngine playing a patch, and the wavetables of every waveform it can
+    be switched to. The AudioServer must be booted"""
+    build_waveform_tables(Synth.max_harmonics)
+    engine = SynthEngine(
+        WAVEFORM_CLASSES[patch["waveform"]],
+        patch["voices"],
+        steal_mode,
+        distortion=patch["distortion"],
+        reverb=patch["reverb"],
+        fm_freq=patch["fm_freq"],
+        fm_index=patch["fm_index"],
+    )
+    apply_envelope(engine.voice_pool.envelope, patch)
+    return engine
+
+
+def apply_patch(engine, patch):
+    """Sets every sound parameter of a patch on a running engine through its setters.
+    The number of voices, the edo and the root belong to the engine and keyboard
+    and are left as they are"""
+    engine.set_waveform(WAVEFORM_CLASSES[patch["waveform"]])
+    engine.set_distortion(patch["distortion"])
+    engine.set_reverb(patch["reverb"])
+    engine.set_fm_freq(patch["fm_freq"])
+    engine.set_fm_index(patch["fm_index"])
+    engine.set_attack(patch["attack"])
+    engine.set_decay(patch["decay"])
+    engine.set_sustain(patch["sustain"])
+    engine.set_release(patch["release"])
@@ -0,0 +1,204 @@
+"""Presets are patches saved to disk, played by an engine that can switch to the next one
+without a gap. The next preset is built on a standby engine while the live one plays,
+so switching is only a short crossfade between the two and never waits on a rebuild"""
+import json
+import os
+from pyo import CallAfter
+from .params import SETTERS
+from .patch import DEFAULT_PATCH, make_patch, make_engine, apply_patch, waveform_name
+from .voicepool import STEAL_OLDEST
+
+DEFAULT_PRESET_DIR = "presets"
+PRESET_EXTENSION = ".json"
+# Seconds the live and standby engines are crossfaded over
+DEFAULT_SWITCH_TIME = 0.02
+
+
+def encode_patch(patch):
+    """Compact text of a patch, only the values that differ from the defaults are kept"""
+    changed = {
+        name: value for name, value in patch.items() if DEFAULT_PATCH[name] != value
+    }
+    return json.dumps(changed, separators=(",", ":"), sort_keys=True)
+
+
+def decode_patch(text):
+    """Complete patch from the text of encode_patch"""
+    params = json.loads(text)
+    if not isinstance(params, dict):
+        raise ValueError("This is not a patch")
+    return make_patch(**params)
+
+
+class PresetStore:
+    """A directory of presets, one file per preset named after it"""
+
+    def __init__(self, directory=DEFAULT_PRESET_DIR):
+        """Constructor, the directory is made when the first preset is saved"""
+        self.directory = directory
+
+    def path(self, name):
+        """File of the preset called name"""
+        if not name or name.startswith(".") or os.sep in name or "/" in name:
+            raise ValueError("This is not a valid preset name")
+        return os.path.join(self.directory, name + PRESET_EXTENSION)
+
+    def names(self):
+        """Names of every saved preset in alphabetical order"""
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(
+            filename[: -len(PRESET_EXTENSION)]
+            for filename in os.listdir(self.directory)
+            if filename.endswith(PRESET_EXTENSION)
+        )
+
+    def save(self, name, patch):
+        """Saves a patch as the preset called name, replacing it if it exists"""
+        text = encode_patch(make_patch(**patch))
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self.path(name), "w", encoding="utf-8") as file:
+            file.write(text)
+
+    def load(self, name):
+        """Returns the patch of the preset called name"""
+        path = self.path(name)
+        if not os.path.exists(path):
+            raise ValueError("There is no preset called " + name)
+        with open(path, encoding="utf-8") as file:
+            return decode_patch(file.read())
+
+    def delete(self, name):
+        """Removes the preset called name"""
+        os.remove(self.path(name))
+
+
+class PresetSwitcher:
+    """Plays like a SynthEngine, but holds a live engine and a silent standby engine.
+    prepare builds the next patch on the standby engine ahead of time, and switch
+    crossfades to it, carrying the held notes over. The standby engine is stopped while
+    it is not needed, so it costs no CPU. The AudioServer must be booted"""
+
+    def __init__(
+        self, patch=None, steal_mode=STEAL_OLDEST, fadetime=DEFAULT_SWITCH_TIME
+    ):
+        """Constructor, both engines start with patch, the default patch if None"""
+        self.fadetime = fadetime
+        self.patch = make_patch() if patch is None else make_patch(**patch)
+        self.standby_patch = dict(self.patch)
+        self.live = make_engine(self.patch, steal_mode)
+        self.standby = make_engine(self.patch, steal_mode)
+        self.standby.set_level(0, 0)
+        self.standby.stop()
+        # Pending CallAfter that stops the engine faded out
+        self._release = None
+        self.final_output = self.live.final_output + self.standby.final_output
+
+    @property
+    def voice_pool(self):
+        """Voices of the live engine"""
+        return self.live.voice_pool
+
+    @property
+    def num_voices(self):
+        """Number of voices of the live engine"""
+        return self.live.voice_pool.num_voices
+
+    @property
+    def num_active(self):
+        """Number of voices of the live engine holding a note"""
+        return self.live.voice_pool.num_active
+
+    def out(self):
+        """Sends the output of both engines to the speakers"""
+        self.final_output.out()
+
+    def prepare(self, patch):
+        """Starts the standby engine and sets patch on it so it is ready to be switched to"""
+        self.standby_patch = make_patch(**patch)
+        self.standby.play()
+        apply_patch(self.standby, self.standby_patch)
+
+    def switch(self):
+        """Crossfades from the live engine to the standby engine, whose patch becomes the
+        live patch. The held notes are started on the new engine, and the old one, which
+        becomes the standby engine, is stopped once it is faded out"""
+        if self._release is not None:
+            # The engine still fading out from the last switch is live again
+            self._release.stop()
+            self.standby.release_all()
+        # Stopped if it was faded out before prepare or without one
+        self.standby.play()
+        previous = self.live
+        self.live, self.standby = self.standby, previous
+        self.patch, self.standby_patch = self.standby_patch, self.patch
+        for key, freq in previous.voice_pool.held_notes().items():
+            self.live.note_on(key, freq)
+        self.live.set_level(1, self.fadetime)
+        previous.set_level(0, self.fadetime)
+        self._release = CallAfter(previous.stop, self.fadetime)
+
+    def load(self, patch):
+        """Prepares patch and switches to it at once"""
+        self.prepare(patch)
+        self.switch()
+
+    def set_quality(self, polyphony, reverb_enabled, lookahead, knee):
+        """Applies the settings of a quality tier to both engines"""
+        self.live.set_quality(polyphony, reverb_enabled, lookahead, knee)
+        self.standby.set_quality(polyphony, reverb_enabled, lookahead, knee)
+
+    def _set(self, name, value):
+        """Sets a parameter on the live engine and keeps the live patch up to date"""
+        getattr(self.live, SETTERS[name])(value)
+        self.patch[name] = value
+
+    def set_waveform(self, synth_class):
+        """Switches the live voices to a new Synth subclass"""
+        name = waveform_name(synth_class)
+        self.live.set_waveform(synth_class)
+        self.patch["waveform"] = name
+
+    def set_fm_freq(self, fm_freq):
+        """Sets the FM frequency of the live engine"""
+        self._set("fm_freq", fm_freq)
+
+    def set_fm_index(self, fm_index):
+        """Sets the FM index of the live engine"""
+        self._set("fm_index", fm_index)
+
+    def set_distortion(self, distortion):
+        """Sets the distortion of the live engine"""
+        self._set("distortion", distortion)
+
+    def set_reverb(self, reverb):
+        """Sets the reverb of the live engine"""
+        self._set("reverb", reverb)
+
+    def set_attack(self, attack):
+        """Sets the attack of the live engine"""
+        self._set("attack", attack)
+
+    def set_decay(self, decay):
+        """Sets the decay of the live engine"""
+        self._set("decay", decay)
+
+    def set_sustain(self, sustain):
+        """Sets the sustain of the live engine"""
+        self._set("sustain", sustain)
+
+    def set_release(self, release):
+        """Sets the release of the live engine"""
+        self._set("release", release)
+
+    def note_on(self, key, freq):
+        """Plays freq on the live engine"""
+        return self.live.note_on(key, freq)
+
+    def note_off(self, key):
+        """Releases key on the live engine, the old engine released its keys on switch"""
+        self.live.note_off(key)
+
+    def release_all(self):
+        """Releases every held note"""
+        self.live.release_all()
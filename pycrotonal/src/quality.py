@@ -0,0 +1,199 @@
+"""Quality tiers that trade fidelity for CPU, and a governor picking one from the load.
+Each tier sets the harmonics of the wavetables, how many voices can sound at once,
+whether the reverb runs, and the compressor's settings. In auto mode the governor steps
+down a tier as soon as the server monitor sees the CPU cross a threshold, or sees late
+blocks for a few samples in a row, and only steps back up after the load has stayed well
+under it for a while"""
+import logging
+from .effects import DEFAULT_LOOKAHEAD
+from .patch import build_waveform_tables
+from .waveforms.synth import set_max_harmonics
+
+ECO = "eco"
+STANDARD = "standard"
+HIGH = "high"
+AUTO = "auto"
+# Cheapest first
+TIERS = (ECO, STANDARD, HIGH)
+QUALITY_MODES = TIERS + (AUTO,)
+# High is the full quality the synth always had. polyphony is the fraction of the
+# pool's voices that can sound at once. Fewer harmonics do not make a wavetable cheaper
+# to read, but make the tables built when a note moves to a new octave band cheaper
+TIER_SETTINGS = {
+    ECO: {
+        "max_harmonics": 16,
+        "polyphony": 0.5,
+        "reverb_enabled": False,
+        "lookahead": 0,
+        "knee": 0,
+    },
+    STANDARD: {
+        "max_harmonics": 64,
+        "polyphony": 0.75,
+        "reverb_enabled": True,
+        "lookahead": DEFAULT_LOOKAHEAD,
+        "knee": 0,
+    },
+    HIGH: {
+        "max_harmonics": None,
+        "polyphony": 1.0,
+        "reverb_enabled": True,
+        "lookahead": DEFAULT_LOOKAHEAD,
+        "knee": 0,
+    },
+}
+DEFAULT_MODE = HIGH
+# Percent of CPU at or above which auto mode steps down a tier
+STEP_DOWN_CPU = 70.0
+# Percent of CPU the load must stay under for auto mode to step up a tier
+STEP_UP_CPU = 40.0
+# Late blocks in one monitor sample at or above which the sample is late
+STEP_DOWN_LATE_BLOCKS = 1
+# Late monitor samples in a row needed to step down a tier, a single late block can come
+# from anything else the machine did
+STEP_DOWN_LATE_SAMPLES = 3
+# Calm monitor samples in a row needed to step up a tier
+STEP_UP_SAMPLES = 10
+# Monitor samples ignored after a change, while the load settles to the new tier
+SETTLE_SAMPLES = 2
+
+logger = logging.getLogger(__name__)
+
+
+def call_now(function, *args):
+    """Calls function(*args) on the calling thread"""
+    function(*args)
+
+
+class QualityGovernor:
+    """Sets the quality tier of a SynthEngine or PresetSwitcher, either a fixed tier
+    or one stepped by auto mode from the samples of a ServerMonitor.
+    The settings are applied through call, EventScheduler.call applies them on the
+    audio thread at a block boundary, so a lower polyphony never releases a voice
+    while a note is being given to it. The wavetables of the tier are built first on
+    the calling thread, so the audio thread only swaps them in"""
+
+    def __init__(
+        self,
+        engine,
+        mode=DEFAULT_MODE,
+        step_down_cpu=STEP_DOWN_CPU,
+        step_up_cpu=STEP_UP_CPU,
+        step_up_samples=STEP_UP_SAMPLES,
+        call=call_now,
+    ):
+        """Constructor, applies mode, auto mode starts at the high tier"""
+        if step_up_cpu >= step_down_cpu:
+            raise ValueError("The step up CPU must be below the step down CPU")
+        self.engine = engine
+        self.call = call
+        self.step_down_cpu = step_down_cpu
+        self.step_up_cpu = step_up_cpu
+        self.step_up_samples = step_up_samples
+        self.tier = None
+        self.auto = False
+        # Number of tier changes made by auto mode
+        self.steps = 0
+        self._calm = 0
+        self._late = 0
+        self._settle = 0
+        self.set_mode(mode)
+
+    @property
+    def mode(self):
+        """The tier, or auto"""
+        return AUTO if self.auto else self.tier
+
+    def set_mode(self, mode):
+        """Sets a fixed tier, or auto to let the load pick it"""
+        if mode not in QUALITY_MODES:
+            raise ValueError("This is not a quality mode: " + mode)
+        self.auto = mode == AUTO
+        if not self.auto:
+            self.set_tier(mode)
+        elif self.tier is None:
+            self.set_tier(HIGH)
+
+    def set_tier(self, tier):
+        """Builds the wavetables of a tier, then applies its settings to the engine"""
+        settings = TIER_SETTINGS[tier]
+        build_waveform_tables(settings["max_harmonics"])
+        self.call(self._apply, settings)
+        self.tier = tier
+        self._calm = 0
+        self._late = 0
+        self._settle = SETTLE_SAMPLES
+
+    def _apply(self, settings):
+        """Sets the harmonics and the engine to the settings of a tier"""
+        set_max_harmonics(settings["max_harmonics"])
+        num_voices = self.engine.voice_pool.num_voices
+        polyphony = max(1, round(num_voices * settings["polyphony"]))
+        self.engine.set_quality(
+            polyphony,
+            settings["reverb_enabled"],
+            settings["lookahead"],
+            settings["knee"],
+        )
+
+    def update(self, snapshot):
+        """Steps the tier in auto mode from a ServerMonitor sample.
+        Returns whether the tier changed"""
+        if not self.auto:
+            return False
+        if self._settle:
+            self._settle -= 1
+            return False
+        level = TIERS.index(self.tier)
+        late = snapshot["late_blocks"] >= STEP_DOWN_LATE_BLOCKS
+        self._late = self._late + 1 if late else 0
+        if (
+            snapshot["cpu_percent"] >= self.step_down_cpu
+            or self._late >= STEP_DOWN_LATE_SAMPLES
+        ):
+            self._calm = 0
+            if level == 0:
+                return False
+            logger.warning(
+                "Overloaded at %.0f%% CPU, %d late blocks, quality lowered to %s",
+                snapshot["cpu_percent"],
+                snapshot["late_blocks"],
+                TIERS[level - 1],
+            )
+            return self._step(TIERS[level - 1])
+        if snapshot["cpu_percent"] < self.step_up_cpu and not late:
+            self._calm += 1
+        else:
+            self._calm = 0
+        if self._calm >= self.step_up_samples and level < len(TIERS) - 1:
+            return self._step(TIERS[level + 1])
+        return False
+
+    def _step(self, tier):
+        """Changes tier for auto mode"""
+        self.set_tier(tier)
+        self.steps += 1
+        return True
+
+
+def add_arguments(parser):
+    """Adds the quality settings to an argparse parser"""
+    group = parser.add_argument_group("quality")
+    group.add_argument(
+        "--quality",
+        choices=QUALITY_MODES,
+        default=DEFAULT_MODE,
+        help="quality tier, auto lowers it while the CPU is overloaded",
+    )
+    group.add_argument(
+        "--quality-down-cpu",
+        type=float,
+        default=STEP_DOWN_CPU,
+        help="percent of CPU at which auto quality steps down",
+    )
+    group.add_argument(
+        "--quality-up-cpu",
+        type=float,
+        default=STEP_UP_CPU,
+        help="percent of CPU the load must stay under for auto quality to step up",
+    )
@@ -0,0 +1,275 @@
+"""Runs the audio engine in its own process, controlled through a ring of commands in shared
+memory. The GUI process only writes fixed size messages into the ring, so wx repaints and
+keyboard handling never hold the GIL the audio process needs to start notes on time"""
+import multiprocessing
+import struct
+import threading
+import time
+from multiprocessing.shared_memory import SharedMemory
+from .audioserver import AudioServer
+from .engine import SynthEngine
+from .fm import DEFAULT_FM_FREQ, DEFAULT_FM_INDEX
+from .patch import WAVEFORM_CLASSES, build_waveform_tables
+from .scheduler import EventScheduler, DEFAULT_LOOKAHEAD
+from .voicepool import DEFAULT_NUM_VOICES, STEAL_OLDEST
+from .waveforms.synth import Synth
+
+# Messages the ring holds before new ones are dropped, or wait for room
+DEFAULT_CAPACITY = 1024
+# Seconds between the engine process checking the ring, well under the scheduler's look-ahead
+POLL_INTERVAL = 0.001
+# Seconds to wait for the engine process to shut down
+STOP_TIMEOUT = 2.0
+# opcode, key, value, captured timestamp
+MESSAGE = struct.Struct("<qqdq")
+# Write position then read position, both counting every message ever sent
+HEADER = struct.Struct("<QQ")
+
+NOTE_ON = 1
+NOTE_OFF = 2
+CANCEL = 3
+RELEASE_ALL = 4
+SET_WAVEFORM = 5
+SET_DISTORTION = 6
+SET_REVERB = 7
+SET_ATTACK = 8
+SET_DECAY = 9
+SET_SUSTAIN = 10
+SET_RELEASE = 11
+SET_FM_FREQ = 12
+SET_FM_INDEX = 13
+QUIT = 14
+
+# SynthEngine setters that take one float value
+PARAMETER_SETTERS = {
+    SET_DISTORTION: "set_distortion",
+    SET_REVERB: "set_reverb",
+    SET_ATTACK: "set_attack",
+    SET_DECAY: "set_decay",
+    SET_SUSTAIN: "set_sustain",
+    SET_RELEASE: "set_release",
+    SET_FM_FREQ: "set_fm_freq",
+    SET_FM_INDEX: "set_fm_index",
+}
+WAVEFORM_NAMES = list(WAVEFORM_CLASSES)
+# Messages never dropped while the ring is full, losing one leaves notes stuck in the
+# engine process, so the sender waits for the engine process to make room instead
+KEPT_OPCODES = (NOTE_OFF, CANCEL, RELEASE_ALL, QUIT)
+# Seconds a kept message waits for room, it is only dropped if the engine process is
+# no longer reading the ring
+KEPT_TIMEOUT = 2.0
+
+
+class CommandRing:
+    """Single producer, single consumer ring of messages in shared memory.
+    The producer only moves the write position and the consumer only moves the read position,
+    so neither side waits for the other, unless the ring is full of messages and the producer
+    has a message that must not be lost"""
+
+    def __init__(self, capacity=DEFAULT_CAPACITY, name=None):
+        """Constructor, creates a new ring, or attaches to the ring called name"""
+        size = HEADER.size + capacity * MESSAGE.size
+        if name is None:
+            self._memory = SharedMemory(create=True, size=size)
+            HEADER.pack_into(self._memory.buf, 0, 0, 0)
+        else:
+            self._memory = SharedMemory(name=name)
+        self.capacity = capacity
+        self.dropped = 0
+
+    @property
+    def name(self):
+        """Name another process attaches to the ring with"""
+        return self._memory.name
+
+    def push(self, opcode, key=0, value=0.0, captured=0):
+        """Writes a message, returns False and drops it if the ring is full.
+        The messages of KEPT_OPCODES wait for room instead, for up to KEPT_TIMEOUT"""
+        deadline = time.monotonic() + KEPT_TIMEOUT
+        write, read = HEADER.unpack_from(self._memory.buf, 0)
+        while write - read >= self.capacity:
+            if opcode not in KEPT_OPCODES or time.monotonic() >= deadline:
+                self.dropped += 1
+                return False
+            time.sleep(POLL_INTERVAL)
+            write, read = HEADER.unpack_from(self._memory.buf, 0)
+        offset = HEADER.size + (write % self.capacity) * MESSAGE.size
+        MESSAGE.pack_into(self._memory.buf, offset, opcode, key, value, captured)
+        # The message is written before it is published by moving the write position
+        struct.pack_into("<Q", self._memory.buf, 0, write + 1)
+        return True
+
+    def pop_all(self):
+        """Reads every message written since the last call, oldest first"""
+        write, read = HEADER.unpack_from(self._memory.buf, 0)
+        messages = []
+        for position in range(read, write):
+            offset = HEADER.size + (position % self.capacity) * MESSAGE.size
+            messages.append(MESSAGE.unpack_from(self._memory.buf, offset))
+        struct.pack_into("<Q", self._memory.buf, 8, write)
+        return messages
+
+    def close(self):
+        """Detaches this process from the ring"""
+        self._memory.close()
+
+    def unlink(self):
+        """Frees the shared memory, only the process that created the ring should call this"""
+        self._memory.unlink()
+
+
+def apply_command(engine, scheduler, opcode, key, value, captured):
+    """Applies one message to the engine and scheduler of the engine process.
+    Everything but notes is handed to the scheduler to run on the audio thread, since
+    this runs on the thread reading the ring. Returns False once the engine should quit"""
+    if opcode == NOTE_ON:
+        scheduler.schedule(key, value, "start", captured)
+    elif opcode == NOTE_OFF:
+        scheduler.schedule(key, value, "stop", captured)
+    elif opcode == CANCEL:
+        scheduler.cancel()
+    elif opcode == RELEASE_ALL:
+        scheduler.call(engine.release_all)
+    elif opcode == SET_WAVEFORM:
+        waveform = WAVEFORM_CLASSES[WAVEFORM_NAMES[int(value)]]
+        scheduler.call(engine.set_waveform, waveform)
+    elif opcode in PARAMETER_SETTERS:
+        scheduler.call(getattr(engine, PARAMETER_SETTERS[opcode]), value)
+    elif opcode == QUIT:
+        return False
+    return True
+
+
+def run_engine(ring_name, server_config, settings):
+    """Entry point of the engine process. Boots the server and plays commands from the ring
+    until told to quit. settings are the keyword arguments of the SynthEngine"""
+    ring = CommandRing(name=ring_name)
+    server = AudioServer(config=server_config)
+    lookahead = settings.pop("lookahead")
+    waveform = WAVEFORM_CLASSES[settings.pop("waveform")]
+    build_waveform_tables(Synth.max_harmonics)
+    engine = SynthEngine(waveform, **settings)
+    scheduler = EventScheduler(server, engine, lookahead)
+    server.play()
+    engine.out()
+    running = True
+    while running:
+        for message in ring.pop_all():
+            running = apply_command(engine, scheduler, *message) and running
+        time.sleep(POLL_INTERVAL)
+    server.stop()
+    ring.close()
+
+
+class EngineProcess:
+    """Stands in for both the SynthEngine and the EventScheduler in the GUI process,
+    every call is sent to the engine process as a message"""
+
+    def __init__(
+        self,
+        server_config,
+        waveform="Sine",
+        num_voices=DEFAULT_NUM_VOICES,
+        steal_mode=STEAL_OLDEST,
+        distortion=0,
+        reverb=0,
+        fm_freq=DEFAULT_FM_FREQ,
+        fm_index=DEFAULT_FM_INDEX,
+        lookahead=DEFAULT_LOOKAHEAD,
+    ):
+        """Constructor, starts the engine process"""
+        self.ring = CommandRing()
+        # The GUI thread and the dispatcher thread both send, the ring only has one producer
+        self._lock = threading.Lock()
+        # Number every key is sent as, in the order the keys were first played
+        self._key_ids = {}
+        settings = {
+            "waveform": waveform,
+            "num_voices": num_voices,
+            "steal_mode": steal_mode,
+            "distortion": distortion,
+            "reverb": reverb,
+            "fm_freq": fm_freq,
+            "fm_index": fm_index,
+            "lookahead": lookahead,
+        }
+        # Spawned so that the engine does not inherit the wx and pynput state of this process
+        context = multiprocessing.get_context("spawn")
+        self.process = context.Process(
+            target=run_engine,
+            args=(self.ring.name, server_config, settings),
+            daemon=True,
+        )
+        self.process.start()
+
+    def _send(self, opcode, key=0, value=0.0, captured=0):
+        """Writes a message to the ring"""
+        with self._lock:
+            return self.ring.push(opcode, key, value, captured)
+
+    def schedule(self, key, freq, msg, captured):
+        """Schedules a keypress like EventScheduler.schedule. Keys are sent as a number
+        given to each key, unlike a hash it is the same in every process"""
+        opcode = NOTE_ON if msg == "start" else NOTE_OFF
+        with self._lock:
+            key_id = self._key_ids.setdefault(key, len(self._key_ids))
+            return self.ring.push(opcode, key_id, freq, captured)
+
+    def cancel(self):
+        """Drops every event that has not been applied yet"""
+        self._send(CANCEL)
+
+    def call(self, function, *args):
+        """Calls function(*args) at once. The methods of this class only send messages,
+        and the engine process applies them on its own audio thread"""
+        function(*args)
+
+    def release_all(self):
+        """Releases every held note"""
+        self._send(RELEASE_ALL)
+
+    def set_waveform(self, synth_class):
+        """Rebuilds the voices with a new Synth subclass"""
+        name = next(name for name, cls in WAVEFORM_CLASSES.items() if cls is synth_class)
+        self._send(SET_WAVEFORM, value=WAVEFORM_NAMES.index(name))
+
+    def set_distortion(self, distortion):
+        """Sets the distortion drive from 0 to 1"""
+        self._send(SET_DISTORTION, value=distortion)
+
+    def set_reverb(self, reverb):
+        """Sets the reverb dry/wet balance from 0 to 1"""
+        self._send(SET_REVERB, value=reverb)
+
+    def set_attack(self, attack):
+        """Sets the attack of every voice's envelope"""
+        self._send(SET_ATTACK, value=attack)
+
+    def set_decay(self, decay):
+        """Sets the decay of every voice's envelope"""
+        self._send(SET_DECAY, value=decay)
+
+    def set_sustain(self, sustain):
+        """Sets the sustain of every voice's envelope"""
+        self._send(SET_SUSTAIN, value=sustain)
+
+    def set_release(self, release):
+        """Sets the release of every voice's envelope"""
+        self._send(SET_RELEASE, value=release)
+
+    def set_fm_freq(self, fm_freq):
+        """Sets the frequency in Hz of the shared FM modulator"""
+        self._send(SET_FM_FREQ, value=fm_freq)
+
+    def set_fm_index(self, fm_index):
+        """Sets the FM index"""
+        self._send(SET_FM_INDEX, value=fm_index)
+
+    def stop(self):
+        """Stops the engine process and frees the ring"""
+        self._send(QUIT)
+        self.process.join(STOP_TIMEOUT)
+        if self.process.is_alive():
+            self.process.terminate()
+        self.ring.close()
+        self.ring.unlink()
@@ -0,0 +1,49 @@
+"""Offline rendering of timed note events to a wav file, as fast as the CPU allows"""
+from .freqhelper import find_scale_array
+from .patch import make_engine
+from .scheduler import EventScheduler
+
+# Seconds rendered after the last release so the reverb can ring out
+DEFAULT_TAIL = 1.0
+
+
+def event_frequencies(events, root, edo):
+    """Returns the frequency of every event. An event's degree counts steps of the edo
+    up from the root and may go past the first octave"""
+    degrees = [event["degree"] for event in events]
+    if any(degree < 0 for degree in degrees):
+        raise ValueError("Note degrees can't be below the root")
+    scale = find_scale_array(root, edo, max(degrees, default=0) // edo + 1)
+    return [float(scale[degree]) for degree in degrees]
+
+
+def render_length(events, patch, tail=DEFAULT_TAIL):
+    """Length in seconds needed to render every event including its release"""
+    end = max((event["time"] + event["duration"] for event in events), default=0)
+    return end + patch["release"] + tail
+
+
+def render(server, events, patch, filename, tail=DEFAULT_TAIL):
+    """Renders events with a patch to filename, returns the length in seconds
+    server must be an offline AudioServer that has not been started yet
+    events are dicts with the start "time", "duration" and scale "degree" of every note"""
+    for event in events:
+        if event["time"] < 0 or event["duration"] < 0:
+            raise ValueError("Note times can't be negative")
+    freqs = event_frequencies(events, patch["root"], patch["edo"])
+    length = render_length(events, patch, tail)
+    server.record(filename, length)
+
+    engine = make_engine(patch)
+    engine.out()
+
+    # Every event is its own key so that repeated degrees can overlap
+    sequence = []
+    for i, (event, freq) in enumerate(zip(events, freqs)):
+        sequence.append((event["time"], i, freq, "start"))
+        sequence.append((event["time"] + event["duration"], i, freq, "stop"))
+    scheduler = EventScheduler(server, engine, lookahead=0)
+    scheduler.schedule_sequence(sequence, start=0)
+    # An offline server returns once the whole file is rendered
+    server.play()
+    return length
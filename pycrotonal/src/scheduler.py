@@ -0,0 +1,137 @@
+"""Applies note events on the audio server's block clock instead of whenever a thread wakes up.
+Every event gets a target time in samples, a fixed look-ahead after it was captured, and the
+server calls the scheduler at the start of every block to start the notes that are due.
+pyo can only change a note at a block boundary, so an event that arrives in time is applied
+within half a block of its target, and events that arrive after their target are counted"""
+import functools
+import heapq
+import itertools
+from collections import deque
+from queue import SimpleQueue, Empty
+import numpy as np
+from . import latency
+
+# Seconds between capturing a keypress and starting its note, long enough for the
+# dispatcher to hand it to the scheduler before its block comes around
+DEFAULT_LOOKAHEAD = 0.01
+# Timing errors kept for the jitter statistics
+JITTER_WINDOW = 4096
+# Put on the incoming queue to drop every event queued before it
+_CANCEL = object()
+
+
+class EventScheduler:
+    """Queues note on and off events for an engine and applies them from the server's
+    block callback"""
+
+    def __init__(self, server, engine, lookahead=DEFAULT_LOOKAHEAD):
+        """Constructor
+        server is the AudioServer whose block clock the events are applied on
+        engine is the SynthEngine the notes are played on
+        lookahead is the seconds between capturing an event and applying it
+        """
+        if lookahead < 0:
+            raise ValueError("The look-ahead can't be negative")
+        self.server = server
+        self.engine = engine
+        self.lookahead = lookahead
+        self.sample_rate = server.config["sample_rate"]
+        self.block_size = server.config["buffer_size"]
+        # Filled from any thread, only the audio thread moves events into the heap
+        self._incoming = SimpleQueue()
+        # Heap of (target sample, order, key, freq, msg, captured)
+        self._pending = []
+        self._order = itertools.count()
+        # Samples each event was applied after its target, negative if it was applied early
+        self._errors = deque(maxlen=JITTER_WINDOW)
+        self.late_events = 0
+        # Target of the last keypress, so that keypresses keep the order they were captured in
+        self._last_target = None
+        server.add_block_callback(self._process)
+
+    def clock(self):
+        """Samples the server has processed, counted at the start of the current block"""
+        return self.server.server.getCurrentTimeInSamples()
+
+    def schedule(self, key, freq, msg, captured):
+        """Schedules a "start" or "stop" message of key, captured is the latency.now()
+        timestamp of the keypress. It is applied lookahead seconds after it was captured,
+        but never before a keypress scheduled earlier"""
+        elapsed = (latency.now() - captured) / 1e9
+        target = self.clock() + round((self.lookahead - elapsed) * self.sample_rate)
+        # The clock only moves once per block while elapsed keeps growing, so a keypress that
+        # waited longer in the queue could otherwise land before the one captured before it,
+        # such as a release before its own press
+        if self._last_target is not None and target < self._last_target:
+            target = self._last_target
+        self._last_target = target
+        self._incoming.put((target, next(self._order), key, freq, msg, captured))
+
+    def schedule_sequence(self, events, start=None):
+        """Schedules pre-timed events such as an arpeggio or a score.
+        events are (time, key, freq, msg) with time in seconds from start,
+        start is a clock() sample and defaults to lookahead seconds from now"""
+        if start is None:
+            start = self.clock() + round(self.lookahead * self.sample_rate)
+        for time, key, freq, msg in events:
+            if time < 0:
+                raise ValueError("Event times can't be negative")
+            target = start + round(time * self.sample_rate)
+            self._incoming.put((target, next(self._order), key, freq, msg, None))
+
+    def cancel(self):
+        """Drops every event that has not been applied yet"""
+        self._incoming.put(_CANCEL)
+
+    def call(self, function, *args):
+        """Calls function(*args) on the audio thread at the start of the next block, after
+        the cancels queued before it and before the notes due in that block. Every change
+        to the voices other than a note, such as releasing them all or switching the
+        waveform, goes through here so that it never runs while a note is being played"""
+        self._incoming.put(functools.partial(function, *args))
+
+    def pending(self):
+        """Number of events that have not been applied yet"""
+        return len(self._pending) + self._incoming.qsize()
+
+    def jitter(self):
+        """Returns how many events were applied, the mean and max distance in milliseconds
+        between their target and the block they were applied in, and how many were late"""
+        if not self._errors:
+            return {"count": 0, "late": self.late_events}
+        millis = np.abs(np.array(self._errors)) / self.sample_rate * 1000
+        return {
+            "count": len(millis),
+            "mean_ms": float(millis.mean()),
+            "max_ms": float(millis.max()),
+            "late": self.late_events,
+        }
+
+    def _process(self):
+        """Called by the server at the start of every block, applies every event whose
+        target is closer to this block than to the next one"""
+        block_start = self.clock()
+        try:
+            while True:
+                event = self._incoming.get_nowait()
+                if event is _CANCEL:
+                    self._pending.clear()
+                elif callable(event):
+                    event()
+                else:
+                    heapq.heappush(self._pending, event)
+        except Empty:
+            pass
+        due = block_start + self.block_size // 2
+        while self._pending and self._pending[0][0] < due:
+            target, _, key, freq, msg, captured = heapq.heappop(self._pending)
+            error = block_start - target
+            self._errors.append(error)
+            if error > self.block_size // 2:
+                self.late_events += 1
+            if msg == "start":
+                self.engine.note_on(key, freq)
+                if captured is not None:
+                    latency.record("onset", captured)
+            elif msg == "stop":
+                self.engine.note_off(key)
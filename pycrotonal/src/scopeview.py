@@ -0,0 +1,111 @@
+"""wx panel drawing the oscilloscope, spectrum and level meter of the output"""
+import time
+import wx
+from .analysis import (
+    FrameRate,
+    SPECTRUM_SIZE,
+    SILENCE_DB,
+    decimate,
+    levels,
+    spectrum,
+)
+
+# Samples shown across the oscilloscope, about 20ms at 48000Hz
+SCOPE_SAMPLES = 1024
+SPECTRUM_BINS = 48
+METER_WIDTH = 16
+
+
+class ScopePanel(wx.Panel):
+    """Oscilloscope on the left, spectrum in the middle, and rms/peak meter on the right.
+    Repaints are driven by a one shot timer that is only restarted after a repaint finishes,
+    so repaints never queue up, and FrameRate slows them down when the GUI falls behind"""
+
+    def __init__(self, parent, sample_rate, size=wx.Size(600, 120)):
+        """Constructor, nothing is drawn until a tap is set"""
+        super().__init__(parent, size=size)
+        self.SetBackgroundStyle(wx.BG_STYLE_PAINT)
+        self.sample_rate = sample_rate
+        self.frame_rate = FrameRate()
+        self._tap = None
+        self._due = 0.0
+        self._timer = wx.Timer(self)
+        self.Bind(wx.EVT_TIMER, self.on_timer, self._timer)
+        self.Bind(wx.EVT_PAINT, self.on_paint)
+
+    def set_tap(self, tap):
+        """Starts drawing the SignalTap tap"""
+        self._tap = tap
+        self._schedule(self.frame_rate.interval)
+
+    def stop(self):
+        """Stops repainting"""
+        self._timer.Stop()
+        self._tap = None
+
+    def _schedule(self, interval):
+        """Starts the timer for the next repaint"""
+        self._due = time.perf_counter() + interval
+        self._timer.StartOnce(max(1, int(interval * 1000)))
+
+    def on_timer(self, event):
+        """Repaints now, then schedules the next repaint from how long this one took"""
+        if self._tap is None:
+            return
+        start = time.perf_counter()
+        late = start - self._due
+        self.Refresh(eraseBackground=False)
+        self.Update()
+        self._schedule(self.frame_rate.update(time.perf_counter() - start, late))
+
+    def on_paint(self, event):
+        """Draws the latest samples of the tap"""
+        dc = wx.AutoBufferedPaintDC(self)
+        dc.SetBackground(wx.BLACK_BRUSH)
+        dc.Clear()
+        if self._tap is None:
+            return
+        width, height = self.GetClientSize()
+        samples = self._tap.latest(max(SCOPE_SAMPLES, SPECTRUM_SIZE))
+        section = (width - METER_WIDTH) // 2
+        self.draw_scope(dc, samples[-SCOPE_SAMPLES:], section, height)
+        self.draw_spectrum(dc, samples[-SPECTRUM_SIZE:], section, height)
+        self.draw_meter(dc, samples[-SCOPE_SAMPLES:], section * 2, height)
+
+    def draw_scope(self, dc, samples, width, height):
+        """Draws the waveform as one line of at most one point per pixel"""
+        points = decimate(samples, width)
+        if len(points) < 2:
+            return
+        step = width / (len(points) - 1)
+        middle = height / 2
+        dc.SetPen(wx.Pen(wx.GREEN))
+        dc.DrawLines(
+            [
+                wx.Point(int(i * step), int(middle - sample * middle))
+                for i, sample in enumerate(points)
+            ]
+        )
+
+    def draw_spectrum(self, dc, samples, left, height):
+        """Draws log spaced bars of the spectrum from SILENCE_DB to 0dB"""
+        _, decibels = spectrum(samples, self.sample_rate, SPECTRUM_BINS)
+        bar_width = max(1, (left - 1) // SPECTRUM_BINS)
+        dc.SetPen(wx.TRANSPARENT_PEN)
+        dc.SetBrush(wx.CYAN_BRUSH)
+        for i, decibel in enumerate(decibels):
+            bar_height = int(height * (1 - decibel / SILENCE_DB))
+            dc.DrawRectangle(
+                left + i * bar_width, height - bar_height, bar_width - 1, bar_height
+            )
+
+    def draw_meter(self, dc, samples, left, height):
+        """Draws the rms level as a bar and the peak level as a line"""
+        rms, peak = levels(samples)
+        dc.SetPen(wx.TRANSPARENT_PEN)
+        dc.SetBrush(wx.Brush(wx.Colour(255, 160, 0)))
+        bar_height = int(height * (1 - rms / SILENCE_DB))
+        dc.DrawRectangle(left, height - bar_height, METER_WIDTH, bar_height)
+        dc.SetPen(wx.RED_PEN)
+        line = height - int(height * (1 - peak / SILENCE_DB))
+        dc.DrawLine(left, line, left + METER_WIDTH, line)
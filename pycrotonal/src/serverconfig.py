@@ -0,0 +1,94 @@
+"""Audio server settings read from a json config file and command line flags.
+Smaller buffers lower the latency but give the CPU less time to fill them before an xrun,
+so each machine can pick its own trade off without editing the code"""
+import json
+
+# portaudio and coreaudio are sound cards, jack is the jack server,
+# and offline renders without audio hardware, offline_nb on its own thread
+BACKENDS = ("portaudio", "jack", "coreaudio", "offline", "offline_nb")
+OFFLINE_BACKENDS = ("offline", "offline_nb")
+DEFAULT_CONFIG = {
+    "sample_rate": 48000,
+    "buffer_size": 256,
+    "channels": 2,
+    # Pycrotonal never records, so the sound card is opened for output only by default
+    "duplex": False,
+    "backend": "portaudio",
+}
+
+
+def make_config(**params):
+    """Returns a complete server config with params replacing the defaults"""
+    unknown = set(params) - set(DEFAULT_CONFIG)
+    if unknown:
+        raise ValueError("Unknown server settings: " + ", ".join(sorted(unknown)))
+    config = dict(DEFAULT_CONFIG, **params)
+    if config["backend"] not in BACKENDS:
+        raise ValueError("This is not a valid audio backend")
+    for setting in ("sample_rate", "buffer_size", "channels"):
+        if not isinstance(config[setting], int) or config[setting] < 1:
+            raise ValueError(setting + " must be a positive integer")
+    return config
+
+
+def load_config(path):
+    """Reads a server config from a json file of settings"""
+    with open(path, encoding="utf-8") as config_file:
+        return make_config(**json.load(config_file))
+
+
+def add_arguments(parser):
+    """Adds the server settings to an argparse parser, flags override the config file"""
+    group = parser.add_argument_group("audio server")
+    group.add_argument("--config", help="json file of audio server settings")
+    group.add_argument("--sample-rate", type=int, dest="sample_rate")
+    group.add_argument(
+        "--buffer-size",
+        type=int,
+        dest="buffer_size",
+        help="samples per buffer, smaller is lower latency but more likely to glitch",
+    )
+    group.add_argument("--channels", type=int)
+    group.add_argument(
+        "--duplex",
+        action="store_true",
+        default=None,
+        help="also open the audio input",
+    )
+    group.add_argument("--backend", choices=BACKENDS)
+
+
+def config_from_args(args):
+    """Returns the server config from the config file of args and its flags"""
+    params = {}
+    if args.config:
+        with open(args.config, encoding="utf-8") as config_file:
+            params.update(json.load(config_file))
+    for setting in DEFAULT_CONFIG:
+        value = getattr(args, setting, None)
+        if value is not None:
+            params[setting] = value
+    return make_config(**params)
+
+
+def buffer_latency(config):
+    """Seconds of audio in one buffer, the delay added by buffering each way"""
+    return config["buffer_size"] / config["sample_rate"]
+
+
+def round_trip_latency(config):
+    """Seconds from input to output through the buffers, ignoring the driver's own buffering.
+    Output only servers have no input buffer"""
+    buffers = 2 if config["duplex"] else 1
+    return buffers * buffer_latency(config)
+
+
+def describe(config):
+    """One line summary of the server and its latency"""
+    return (
+        f"{config['backend']} {config['sample_rate']} Hz, "
+        f"{config['buffer_size']} sample buffer, {config['channels']} channels, "
+        f"{'duplex' if config['duplex'] else 'output only'}: "
+        f"{buffer_latency(config) * 1000:.1f} ms per buffer, "
+        f"{round_trip_latency(config) * 1000:.1f} ms round trip"
+    )
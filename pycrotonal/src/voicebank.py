@@ -0,0 +1,158 @@
+"""Every voice of the pool as one stream of a single pyo oscillator.
+The frequency and octave band of every voice are kept in NumPy arrays, and pyo expands the
+lists they are passed as into one stream per voice, so the pool has one oscillator and one
+frequency signal whatever its size, and retuning every voice at once is one call.
+Voices whose release has finished are put to sleep, their stream of the oscillator is taken
+out of processing until their next note, so silent voices cost nothing.
+The wavetables of the low bands take longer than a block to build, so every band's table
+is built ahead of time off the audio thread, and retuning a voice only looks it up"""
+import numpy as np
+from pyo import Osc, Sig, SawTable, Pattern
+from .waveforms.synth import limit_harmonics
+from .waveforms.wavetables import band_harmonics, get_table, octave_band, octave_bands
+
+# Highest frequency a voice can be tuned to
+MAX_FREQ = 22000
+# Seconds between looking for voices that have gone silent
+SLEEP_INTERVAL = 0.05
+# Envelope level under which a released voice is silent, about -100dB
+SILENCE = 1e-5
+# Octave bands of every frequency a voice can be tuned to
+NUM_BANDS = octave_band(MAX_FREQ) + 1
+
+
+def band_table(synth_class, band, max_harmonics):
+    """Shared wavetable of synth_class for the octave band, holding at most max_harmonics,
+    None for every harmonic below Nyquist"""
+    if synth_class.table_class is None:
+        # A saw of only the fundamental is a sine
+        return get_table(SawTable, 1)
+    highest = limit_harmonics(
+        band_harmonics(band, synth_class.sample_rate), max_harmonics
+    )
+    return get_table(synth_class.table_class, synth_class.table_order(highest))
+
+
+def build_tables(synth_classes, max_harmonics):
+    """Builds the shared wavetable of every octave band of synth_classes, so the audio
+    thread only looks them up. Call it off the audio thread"""
+    for synth_class in synth_classes:
+        for band in range(NUM_BANDS):
+            band_table(synth_class, band, max_harmonics)
+
+
+class VoiceBank:
+    """Oscillator of every voice of a VoicePool. Each voice is an index into the arrays and
+    into the streams of the oscillator, its envelope is the stream's multiplier"""
+
+    def __init__(self, synth_class, adsrs, freq=440):
+        """Constructor
+        synth_class is the Synth subclass whose waveform every voice plays
+        adsrs are the envelopes of the voices, one stream is made per envelope
+        """
+        self.synth_class = synth_class
+        build_tables([synth_class], synth_class.max_harmonics)
+        self.freqs = np.full(len(adsrs), float(freq))
+        self.bands = octave_bands(self.freqs)
+        self.playing = np.zeros(len(adsrs), dtype=bool)
+        # Whether the voice's stream is being processed
+        self.awake = np.ones(len(adsrs), dtype=bool)
+        self._adsrs = list(adsrs)
+        self._freq = Sig(self.freqs.tolist())
+        # Frequency the oscillator reads, the FM modulator is added to it when FM is on
+        self._freq_input = self._freq
+        self._osc = Osc(table=self._tables(), freq=self._freq_input, mul=self._adsrs)
+        self._sleeper = Pattern(self.sleep_silent, time=SLEEP_INTERVAL).play()
+
+    def __len__(self):
+        """Number of voices"""
+        return len(self.freqs)
+
+    def _tables(self):
+        """Wavetable of every voice for its octave band"""
+        bands = self.bands.tolist()
+        limit = self.synth_class.max_harmonics
+        tables = {
+            band: band_table(self.synth_class, band, limit) for band in set(bands)
+        }
+        return [tables[band] for band in bands]
+
+    def set_freq(self, index, freq):
+        """Retunes one voice"""
+        self.set_freqs([index], [freq])
+
+    def set_freqs(self, indices, freqs):
+        """Retunes the voices at indices to freqs in one call. The tables are only
+        swapped if a voice moved to another octave band"""
+        freqs = np.asarray(freqs, dtype=np.float64)
+        if np.any((freqs < 0) | (freqs > MAX_FREQ)):
+            raise ValueError("This is outside the range of hearing!")
+        self.freqs[indices] = freqs
+        self._freq.setValue(self.freqs.tolist())
+        bands = octave_bands(self.freqs)
+        if np.any(bands != self.bands):
+            self.bands = bands
+            self._osc.setTable(self._tables())
+
+    def refresh_tables(self):
+        """Switches every voice to the wavetables of the harmonics limit after it changed.
+        They should have been built with build_tables"""
+        self._osc.setTable(self._tables())
+
+    def set_waveform(self, synth_class):
+        """Switches every voice to a new Synth subclass. A new oscillator is made so the old
+        one can be crossfaded out, and the old one is returned to be stopped after the fade.
+        The tables of synth_class should have been built with build_tables"""
+        self.synth_class = synth_class
+        previous = self._osc
+        self._osc = Osc(table=self._tables(), freq=self._freq_input, mul=self._adsrs)
+        for index in np.flatnonzero(~self.awake):
+            self._stream(index).stop()
+        return previous
+
+    def set_modulator(self, modulator):
+        """Adds modulator, a PyoObject in Hz, to the frequency of every voice.
+        None goes back to constant frequencies"""
+        if modulator is None:
+            self._freq_input = self._freq
+        else:
+            self._freq_input = self._freq + modulator
+        self._osc.setFreq(self._freq_input)
+
+    def _stream(self, index):
+        """The voice's stream of the oscillator. pyo only plays and stops a whole object,
+        so the stream is reached through the object's list of streams"""
+        return self._osc._base_objs[index]  # pylint: disable=protected-access
+
+    def play(self, index):
+        """Wakes a voice if it was asleep, then starts its envelope"""
+        self.playing[index] = True
+        if not self.awake[index]:
+            self._stream(index).play()
+            self.awake[index] = True
+        self._adsrs[index].play()
+
+    def stop(self, index):
+        """Releases the envelope of a voice"""
+        self.playing[index] = False
+        self._adsrs[index].stop()
+
+    def get_output(self):
+        """The oscillator, one stream per voice"""
+        return self._osc
+
+    def sleep_silent(self):
+        """Puts every released voice whose envelope has reached silence to sleep.
+        A voice played again during its release is playing, so it is never put to sleep.
+        Runs on the audio thread like play, which the scheduler calls"""
+        for index in np.flatnonzero(self.awake & ~self.playing):
+            # Checked again right before stopping, the voice may have been played since
+            # the released voices were listed
+            if abs(self._adsrs[index].get()) < SILENCE and not self.playing[index]:
+                self._stream(index).stop()
+                self.awake[index] = False
+
+    def stop_all(self):
+        """Removes the oscillator from the processing loop"""
+        self._osc.stop()
+        self.awake[:] = False
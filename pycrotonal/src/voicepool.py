@@ -0,0 +1,157 @@
+"""Bounded pool of synth voices shared between all of the keys on the keyboard"""
+from pyo.lib.controls import Adsr
+from .envelope import EnvelopeParams
+from .voicebank import VoiceBank
+
+DEFAULT_NUM_VOICES = 8
+STEAL_OLDEST = "oldest"
+STEAL_QUIETEST = "quietest"
+STEAL_MODES = (STEAL_OLDEST, STEAL_QUIETEST)
+
+
+def default_adsr():
+    """Creates the envelope every voice starts with"""
+    return Adsr(attack=0.01, decay=0.01, release=0.01, mul=0.2)
+
+
+class VoicePool:
+    """A fixed number of voices that get retuned to whichever key is pressed.
+    When every voice is sounding, a new note steals either the oldest note
+    or the quietest note, so DSP cost follows polyphony instead of the EDO."""
+
+    def __init__(
+        self,
+        synth_class,
+        num_voices=DEFAULT_NUM_VOICES,
+        steal_mode=STEAL_OLDEST,
+        adsr_factory=default_adsr,
+        envelope=None,
+        bank_factory=VoiceBank,
+    ):
+        """Constructor
+        synth_class is the Synth subclass whose waveform every voice plays
+        adsr_factory creates one envelope per voice, envelopes are kept across waveform changes
+        envelope is the EnvelopeParams shared by every voice, a new one is made if None
+        bank_factory makes the VoiceBank of the voices from synth_class and the envelopes
+        """
+        if num_voices < 1:
+            raise ValueError("There must be at least one voice")
+        if steal_mode not in STEAL_MODES:
+            raise ValueError("This is not a valid voice stealing mode")
+        self.steal_mode = steal_mode
+        self.adsrs = [adsr_factory() for _ in range(num_voices)]
+        self.envelope = EnvelopeParams() if envelope is None else envelope
+        # Version of the shared parameters each envelope was last given, -1 if never
+        self._envelope_versions = [-1] * num_voices
+        # Key currently held by each voice, None if the voice is free
+        self._keys = [None] * num_voices
+        # Note on counter of each voice, used to find the oldest note
+        self._ages = [0] * num_voices
+        self._counter = 0
+        self._key_to_voice = {}
+        # Only the first polyphony voices are given notes
+        self.polyphony = num_voices
+        self.bank = bank_factory(synth_class, self.adsrs)
+
+    @property
+    def num_voices(self):
+        """Number of voices in the pool"""
+        return len(self.adsrs)
+
+    @property
+    def num_active(self):
+        """Number of voices holding a note"""
+        return len(self._key_to_voice)
+
+    def set_polyphony(self, polyphony):
+        """Limits how many notes sound at once without rebuilding the voices.
+        Notes held on voices above the limit are released, and those voices sleep"""
+        if not 1 <= polyphony <= self.num_voices:
+            raise ValueError("The polyphony must be between 1 and the number of voices")
+        self.polyphony = polyphony
+        for key in self._keys[polyphony:]:
+            if key is not None:
+                self.note_off(key)
+
+    def set_waveform(self, synth_class):
+        """Switches every voice to a new Synth subclass, keeping the envelopes.
+        Every held note is released, and the previous oscillator is returned
+        so it can be stopped once it is no longer heard"""
+        self.release_all()
+        return self.bank.set_waveform(synth_class)
+
+    def get_output(self):
+        """Returns the oscillator of every voice, one stream per voice"""
+        return self.bank.get_output()
+
+    def get_active_keys(self):
+        """Returns the keys that are currently held"""
+        return list(self._key_to_voice)
+
+    def held_notes(self):
+        """Returns the frequency of every held key"""
+        return {key: float(self.bank.freqs[i]) for key, i in self._key_to_voice.items()}
+
+    def note_on(self, key, freq):
+        """Retunes a voice to freq and starts it, stealing a voice if needed
+        Returns the index of the voice that plays the note"""
+        index = self._key_to_voice.get(key)
+        if index is None:
+            index = self._find_voice()
+            stolen_key = self._keys[index]
+            if stolen_key is not None:
+                del self._key_to_voice[stolen_key]
+            self._keys[index] = key
+            self._key_to_voice[key] = index
+        self._counter += 1
+        self._ages[index] = self._counter
+        self._sync_envelope(index)
+        self.bank.set_freq(index, freq)
+        self.bank.play(index)
+        return index
+
+    def retune(self, freqs):
+        """Retunes the held keys in freqs, a dict of key to frequency, in one call to the bank.
+        Keys that are not held are ignored"""
+        held = [key for key in freqs if key in self._key_to_voice]
+        if held:
+            self.bank.set_freqs(
+                [self._key_to_voice[key] for key in held], [freqs[key] for key in held]
+            )
+
+    def note_off(self, key):
+        """Releases the voice playing key, does nothing if key is not sounding"""
+        index = self._key_to_voice.pop(key, None)
+        if index is None:
+            return
+        self._keys[index] = None
+        # The release may have changed while the note was held
+        self._sync_envelope(index)
+        self.bank.stop(index)
+
+    def release_all(self):
+        """Releases every held note"""
+        for key in list(self._key_to_voice):
+            self.note_off(key)
+
+    def stop(self):
+        """Removes the oscillator from the processing loop"""
+        self.release_all()
+        self.bank.stop_all()
+
+    def _sync_envelope(self, index):
+        """Copies the shared envelope parameters onto a voice if they changed since its last note"""
+        if self._envelope_versions[index] != self.envelope.version:
+            self.envelope.apply(self.adsrs[index])
+            self._envelope_versions[index] = self.envelope.version
+
+    def _find_voice(self):
+        """Finds a free voice, or the voice to steal if every voice is held.
+        Free voices that were released first are reused first so release tails can ring"""
+        voices = range(self.polyphony)
+        free = [i for i in voices if self._keys[i] is None]
+        if free:
+            return min(free, key=lambda i: self._ages[i])
+        if self.steal_mode == STEAL_QUIETEST:
+            return min(voices, key=lambda i: self.adsrs[i].get())
+        return min(voices, key=lambda i: self._ages[i])
@@ -1,30 +1,19 @@
-"""Implementation of the Square Wave using PYO's RCOsc"""
-from pyo import Osc
+"""Square wave, read from a shared SquareTable"""
 from pyo.lib.tables import SquareTable
-from .synth import SAMPLE_RATE, Synth
+from .synth import Synth
 
 
 class SquareWave(Synth):
     """Square waveform"""
 
-    def __init__(self, freq, adsr):
-        """Constructor, uses Squaretable to avoid aliasing
-        Freq is fundemental frequency
-        adsr is Adsr object to control attack decay sustain release"""
-        self.freq = freq
-        self.adsr = adsr
-        self._wavetable = SquareTable(order=25)
-        # Sharp determines shape of waveform, 0 = triangle
-        self._osc = Osc(table=self._wavetable, freq=self._freq, mul=self._adsr)
+    table_class = SquareTable
 
-    def get_harmonics(self):
-        """Return an amplitude spread, 1/n up until nyquist limit"""
-        harmonics = []
-        amplitudes = []
-        for order in range(1, self._wavetable.order):
-            if order % 2 == 1:
-                if order * self._freq > SAMPLE_RATE:
-                    break
-                harmonics.append(order * self._freq)
-                amplitudes.append(1 / order)
-        return harmonics, amplitudes
+    @staticmethod
+    def table_order(highest):
+        """SquareTable counts odd harmonics, so holding up to highest needs half as many"""
+        return (highest + 1) // 2
+
+    @staticmethod
+    def harmonic_amplitude(order):
+        """Odd harmonics with an amplitude of 1/n"""
+        return 1 / order if order % 2 == 1 else 0.0
@@ -1,122 +1,68 @@
-"""Synth engine for Pycrotonal
-This module will apply the sound effects onto the original waveform"""
-import abc
-from pyo import PyoTableObject
-from pyo import PyoObject
+"""Waveforms of Pycrotonal, described by the harmonics of their wavetables.
+Every voice is a stream of the VoiceBank's oscillator, so a Synth subclass is never
+instanced, it only tells the bank which table to build for every octave band"""
+from .wavetables import octave_band, band_harmonics
 
-# pyo must start the server before anything else
+# Default sample rate, the AudioServer sets the rate it was booted with on every Synth
 SAMPLE_RATE = 48000
 
 
-class Synth(abc.ABC):
-    """Synth class that can later be subclassed into specific
-    Implementation of waveforms"""
-
-    _wavetable: PyoTableObject
-    _fm_amp: float
-    _fm_index: float
-    _reverb: float
-    _distortion: float
-    _adsr: PyoObject
-    _osc: PyoObject
-
-    @property
-    def fm_amp(self):
-        """FM amplitude"""
-        return self._fm_amp
-
-    @fm_amp.setter
-    def fm_amp(self, value):
-        """fm_amp setter"""
-        self._fm_amp = value
-
-    @property
-    def fm_index(self):
-        """Fm index of modulation = modulation deviation/fm_freq
-        Usually index is given as a ratio and pyo supports taking index directly"""
-        return self._fm_index
-
-    @fm_index.setter
-    def fm_index(self, value):
-        """fm_index setter"""
-        self._fm_index = value
-
-    @property
-    def reverb(self):
-        """Amount of reverb (units tbd)"""
-        return self._reverb
-
-    @reverb.setter
-    def reverb(self, value):
-        """reverb setter"""
-        self._reverb = value
-
-    @property
-    def distortion(self):
-        """dB of gain, likely will use Hard Clip distortion"""
-        return self._distortion
-
-    @distortion.setter
-    def distortion(self, value):
-        """distortion setter"""
-        self._distortion = value
-
-    @property
-    def freq(self):
-        """Base frequency"""
-        return self._freq
-
-    @freq.setter
-    def freq(self, value):
-        """freq setter"""
-        if value < 0 or value > 22000:
-            raise ValueError("This is outside the range of hearing!")
-        self._freq = value
-        try:
-            self._osc.setFreq(self._freq)
-        except AttributeError:
-            # Oscillator has not been initialized before trying to set the multipler.
-            # This is expected behavior when initializing a synth
-            pass
-
-    @property
-    def adsr(self):
-        """Amplitude (loudness)"""
-        return self._adsr
-
-    @adsr.setter
-    def adsr(self, value):
-        # TODO: Test this
-        """amp setter, limits at 1"""
-        if not isinstance(value, PyoObject):
-            raise ValueError("Amplitude must be a ADSR PyoObject")
-        self._adsr = value
-        try:
-            self._osc.setMul(self._adsr)
-        except AttributeError:
-            # Oscillator has not been initialized before trying to set the multipler.
-            # This is expected behavior when initializing a synth
-            pass
-
-    def get_synth(self):
-        """Gets the pyo synth object, will need to be implemented
-        in the subclasses"""
-        return self._osc
-
-    def play(self):
-        """Play the synth"""
-        self._osc.out()
-        self._adsr.play()
-
-    def stop(self):
-        """Stop the synth"""
-        self._adsr.stop()
-
-    @abc.abstractmethod
-    def get_harmonics(self):
-        """Gets the harmonic spectrum of the synth for the FM synthesizer
-        Might not be used?"""
-
-
-# Design: Likely create a synth object with waveform, FM params, Reverb, Distortion, ADSR
-# Then use the object to create a synth on the server
+def set_sample_rate(sample_rate):
+    """Sets the sample rate every Synth limits its harmonics to"""
+    Synth.sample_rate = sample_rate
+
+
+def set_max_harmonics(max_harmonics):
+    """Limits the harmonics of every Synth's wavetables, None for every harmonic
+    below Nyquist. Fewer harmonics are duller but much quicker to build a table of"""
+    if max_harmonics is not None and max_harmonics < 1:
+        raise ValueError("A wavetable needs at least the fundamental")
+    Synth.max_harmonics = max_harmonics
+
+
+def limit_harmonics(highest, max_harmonics):
+    """highest, or max_harmonics if it is lower. None is no limit"""
+    if max_harmonics is None:
+        return highest
+    return min(highest, max_harmonics)
+
+
+class Synth:
+    """Waveform whose subclasses set the pyo table and harmonics of their wavetables"""
+
+    # pyo table the waveform is read from, None if it does not use a wavetable
+    table_class = None
+    sample_rate = SAMPLE_RATE
+    # Most harmonics a wavetable holds, None for every harmonic below Nyquist
+    max_harmonics = None
+
+    @staticmethod
+    def harmonic_amplitude(order):
+        """Amplitude of a harmonic relative to the fundemental, 0 if it is not present"""
+        return 1.0 if order == 1 else 0.0
+
+    @staticmethod
+    def table_order(highest):
+        """The order argument of table_class that holds harmonics up to highest"""
+        return highest
+
+    @classmethod
+    def band_limit(cls, band, sample_rate=None):
+        """Highest harmonic of the wavetable of an octave band"""
+        sample_rate = cls.sample_rate if sample_rate is None else sample_rate
+        return limit_harmonics(band_harmonics(band, sample_rate), cls.max_harmonics)
+
+    @classmethod
+    def spectrum(cls, freq, sample_rate=None):
+        """Harmonic frequencies and amplitudes of the waveform at freq, the same harmonics
+        as the wavetable of freq's octave band. Does not need a server, so other engines
+        can synthesize the same waveform at their own sample rate"""
+        highest = cls.band_limit(octave_band(freq), sample_rate)
+        harmonics = []
+        amplitudes = []
+        for order in range(1, highest + 1):
+            amplitude = cls.harmonic_amplitude(order)
+            if amplitude:
+                harmonics.append(order * freq)
+                amplitudes.append(amplitude)
+        return harmonics, amplitudes
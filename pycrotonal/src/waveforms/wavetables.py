@@ -0,0 +1,66 @@
+"""Process wide wavetable bank shared by every Synth.
+Every table is identical for a given waveform, order, and size, so voices share
+one table instead of each one computing and allocating its own.
+The bank is mipmapped: every octave band gets a table holding exactly the harmonics
+that stay below Nyquist at the top of the band"""
+import math
+from collections import OrderedDict
+import numpy as np
+
+DEFAULT_TABLE_SIZE = 8192
+# Least recently used tables are dropped from the bank after this many are cached.
+# Oscillators still hold a reference to their table so dropping one is always safe.
+# More than the 10 octave bands of 4 waveforms at 3 quality tiers, so switching the
+# waveform or tier never drops a table that has to be built again
+MAX_CACHED_TABLES = 128
+# Bottom of the lowest octave band, A0 so that the bands line up with a 440 Hz root
+LOWEST_BAND_FREQ = 27.5
+
+_TABLES = OrderedDict()
+
+
+def get_table(table_class, order, size=DEFAULT_TABLE_SIZE):
+    """Returns the shared table_class(order, size) table, building it on the first request
+    table_class is a pyo table such as SawTable, SquareTable or TriangleTable"""
+    key = (table_class, order, size)
+    table = _TABLES.get(key)
+    if table is None:
+        table = table_class(order=order, size=size)
+        _TABLES[key] = table
+        if len(_TABLES) > MAX_CACHED_TABLES:
+            _TABLES.popitem(last=False)
+    else:
+        _TABLES.move_to_end(key)
+    return table
+
+
+def octave_band(freq):
+    """Index of the octave band freq is in, frequencies below the lowest band are in band 0"""
+    if freq < LOWEST_BAND_FREQ * 2:
+        return 0
+    return int(math.log2(freq / LOWEST_BAND_FREQ))
+
+
+def octave_bands(freqs):
+    """octave_band of every frequency in an array at once"""
+    freqs = np.maximum(np.asarray(freqs, dtype=np.float64), LOWEST_BAND_FREQ)
+    bands = np.floor(np.log2(freqs / LOWEST_BAND_FREQ)).astype(int)
+    return np.where(bands < 1, 0, bands)
+
+
+def band_harmonics(band, sample_rate, size=DEFAULT_TABLE_SIZE):
+    """Highest harmonic a table of the band can hold without aliasing at the top of the band.
+    A table can hold at most half its size in harmonics, a quarter leaves room for interpolation"""
+    top = LOWEST_BAND_FREQ * 2 ** (band + 1)
+    return max(1, min(int(sample_rate / 2 // top), size // 4))
+
+
+def num_cached_tables():
+    """Number of tables currently in the bank"""
+    return len(_TABLES)
+
+
+def clear_tables():
+    """Empties the bank. Tables belong to the server they were created on,
+    so this must be called whenever a new audio server is booted"""
+    _TABLES.clear()
@@ -0,0 +1,64 @@
+"""Test for the output analysis shown by the scope"""
+import os
+import tempfile
+import unittest
+import numpy as np
+from pyo import Sine
+from src.analysis import FrameRate, SignalTap, decimate, levels, spectrum, MIN_FPS
+from src.audioserver import AudioServer
+
+
+class TestAnalysis(unittest.TestCase):
+    """Test the ring buffer, levels, spectrum, and frame rate"""
+
+    def test_tap_latest(self):
+        """The tap returns the last samples of its source, oldest first"""
+        server = AudioServer(offline=True)
+        sine = Sine(freq=100, mul=0.5)
+        tap = SignalTap(sine, size=1000)
+        with tempfile.TemporaryDirectory() as directory:
+            server.record(os.path.join(directory, "tap.wav"), 0.05)
+            server.play()
+        latest = tap.latest(480)
+        self.assertEqual(len(latest), 480)
+        # 480 samples at 48000Hz is exactly one period of 100Hz
+        self.assertAlmostEqual(float(latest.max()), 0.5, 2)
+        self.assertAlmostEqual(float(latest.min()), -0.5, 2)
+
+    def test_decimate_keeps_peaks(self):
+        """Decimating never drops the loudest sample"""
+        samples = np.zeros(1000)
+        samples[537] = -1.0
+        points = decimate(samples, 100)
+        self.assertEqual(len(points), 100)
+        self.assertEqual(points.min(), -1.0)
+
+    def test_levels(self):
+        """A full scale sine has a peak of 0dB and an rms of -3dB"""
+        sine = np.sin(2 * np.pi * np.arange(4800) / 48)
+        rms, peak = levels(sine)
+        self.assertAlmostEqual(peak, 0, 2)
+        self.assertAlmostEqual(rms, -3.01, 2)
+
+    def test_spectrum_peak(self):
+        """A sine shows up in the band containing its frequency"""
+        sine = np.sin(2 * np.pi * 1000 * np.arange(2048) / 48000)
+        centres, decibels = spectrum(sine, 48000, 48)
+        loudest = centres[np.argmax(decibels)]
+        self.assertTrue(900 < loudest < 1100)
+
+    def test_frame_rate_backs_off(self):
+        """Slow repaints lower the frame rate down to the minimum, then it recovers"""
+        frame_rate = FrameRate()
+        for _ in range(10):
+            frame_rate.update(paint_seconds=1.0)
+        self.assertEqual(frame_rate.fps, MIN_FPS)
+        for _ in range(100):
+            frame_rate.update(paint_seconds=0.0)
+        self.assertEqual(frame_rate.fps, frame_rate.target_fps)
+        frame_rate.update(paint_seconds=0.0, late_seconds=1.0)
+        self.assertLess(frame_rate.fps, frame_rate.target_fps)
+
+
+if __name__ == "__main__":
+    unittest.main()
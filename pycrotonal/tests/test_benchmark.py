@@ -0,0 +1,50 @@
+"""Test for the benchmark helpers"""
+import unittest
+from src.audioserver import AudioServer
+from src.benchmark import bench_waveform_change, compare_results, time_call
+from src.engine import SynthEngine
+from src.patch import WAVEFORM_CLASSES
+
+
+class TestBenchmark(unittest.TestCase):
+    """Test timing and baseline comparison"""
+
+    def test_time_call_runs_setup(self):
+        """setup runs before every timed call"""
+        calls = []
+        seconds = time_call(
+            lambda: calls.append("call"), 3, lambda: calls.append("setup")
+        )
+        self.assertEqual(calls, ["setup", "call"] * 3)
+        self.assertGreaterEqual(seconds, 0)
+
+    def test_compare_results(self):
+        """Only results slower than the tolerance are regressions"""
+        baseline = {"a": 1.0, "b": 1.0, "c": 1.0}
+        results = {"a": 1.2, "b": 1.3, "d": 5.0}
+        self.assertEqual(
+            compare_results(results, baseline, 0.25), [("b", 1.0, 1.3)]
+        )
+
+
+    def test_waveform_change_replaces_oscillator(self):
+        """Every timed waveform change builds a new oscillator, even though no server
+        runs to end the crossfade of the change before it"""
+        AudioServer(offline=True)
+        engine = SynthEngine(WAVEFORM_CLASSES["Sine"], 4)
+        set_waveform = engine.voice_pool.set_waveform
+        oscillators = []
+
+        def record_oscillator(synth_class):
+            previous = set_waveform(synth_class)
+            oscillators.append(engine.voice_pool.get_output())
+            return previous
+
+        engine.voice_pool.set_waveform = record_oscillator
+        bench_waveform_change(engine, [5], 3)
+        self.assertEqual(len(oscillators), 3 * len(WAVEFORM_CLASSES))
+        self.assertEqual(len(set(map(id, oscillators))), len(oscillators))
+
+
+if __name__ == "__main__":
+    unittest.main()
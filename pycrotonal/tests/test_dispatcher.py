@@ -0,0 +1,66 @@
+"""Test for the keypress dispatcher"""
+import threading
+import unittest
+from src.dispatcher import KeypressDispatcher
+
+
+class FakeKeyboard:
+    """Stands in for a Keyboard, only the key map is used by the dispatcher"""
+
+    def __init__(self, key_map):
+        self.key_map = key_map
+
+
+class TestDispatcher(unittest.TestCase):
+    """Test the keypress dispatcher thread"""
+
+    def setUp(self):
+        """Collects every batch handed to the handler"""
+        self.batches = []
+        self.dispatcher = KeypressDispatcher(self.batches.append)
+        self.dispatcher.set_keyboard(FakeKeyboard({"a": (0, 440), "b": (1, 880)}))
+
+    def tearDown(self):
+        self.dispatcher.stop()
+
+    def test_batches_queued_messages(self):
+        """Messages queued before the thread runs are handled as one batch in order"""
+        self.dispatcher.msg_queue.put(("a", "start", 0))
+        self.dispatcher.msg_queue.put(("b", "start", 0))
+        self.dispatcher.msg_queue.put(("a", "stop", 0))
+        self.dispatcher.start()
+        self.dispatcher.stop()
+        self.assertEqual(
+            self.batches,
+            [[("a", 440, "start", 0), ("b", 880, "start", 0), ("a", 440, "stop", 0)]],
+        )
+
+    def test_unmapped_keys_dropped(self):
+        """Keys that are not in the current keyboard are not handled"""
+        self.dispatcher.msg_queue.put(("z", "start", 0))
+        self.dispatcher.start()
+        self.dispatcher.stop()
+        self.assertEqual(self.batches, [])
+
+    def test_swap_keyboard(self):
+        """Swapping the keyboard changes the frequencies without a new thread"""
+        threads = threading.active_count()
+        self.dispatcher.start()
+        for freq in (220, 330, 440):
+            self.dispatcher.set_keyboard(FakeKeyboard({"a": (0, freq)}))
+            self.dispatcher.msg_queue.put(("a", "start", 0))
+        self.dispatcher.stop()
+        self.assertEqual(threading.active_count(), threads)
+        freqs = [event[1] for batch in self.batches for event in batch]
+        self.assertEqual(freqs[-1], 440)
+
+    def test_stop(self):
+        """Stopping ends the thread"""
+        self.dispatcher.start()
+        self.assertTrue(self.dispatcher.is_alive())
+        self.dispatcher.stop()
+        self.assertFalse(self.dispatcher.is_alive())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,116 @@
+"""Test for the effects bus bypass"""
+import os
+import tempfile
+import unittest
+import numpy as np
+from pyo import CallAfter, NewTable, Sine, TableRec
+from pyo.lib.dynamics import Compress
+from pyo.lib.effects import Disto
+from src.audioserver import AudioServer
+from src.effects import DISTORTION_SLOPE, EffectsBus, REVERB_TAIL
+
+
+class TestEffectsBus(unittest.TestCase):
+    """Test taking dry effects out of the signal path on an offline server"""
+
+    def setUp(self):
+        """Bus of a dry sine"""
+        self.server = AudioServer(offline=True)
+        self.source = Sine(200, mul=0.3)
+        self.bus = EffectsBus()
+        self.bus.set_input(self.source, 0)
+
+    def render(self, duration):
+        """Runs the server for duration seconds"""
+        with tempfile.TemporaryDirectory() as directory:
+            self.server.record(os.path.join(directory, "effects.wav"), duration)
+            self.server.play()
+
+    def record(self, duration):
+        """Renders duration seconds and returns the output of the bus"""
+        recording = NewTable(duration)
+        recorder = TableRec(self.bus.final_output, recording).play()
+        self.render(duration)
+        recorder.stop()
+        return np.array(recording.getTable())
+
+    def test_dry_effects_stopped(self):
+        """Effects that start dry are never processed"""
+        self.assertTrue(self.bus.distortion_bypassed)
+        self.assertTrue(self.bus.reverb_bypassed)
+        self.assertFalse(self.bus.dist_effect.isPlaying())
+        self.assertFalse(self.bus.reverb_effect.isPlaying())
+        self.assertGreater(np.abs(self.record(0.1)).max(), 0.1)
+
+    def test_bypass_keeps_lowpass(self):
+        """Bypassed at no drive, the distortion sounds the same as running it"""
+        distorted = Compress(
+            Disto(self.source, drive=0, slope=DISTORTION_SLOPE), ratio=4
+        )
+        recording = NewTable(0.1)
+        recorder = TableRec(distorted, recording).play()
+        samples = self.record(0.1)
+        recorder.stop()
+        # Past the compressor's look ahead, where the sine starts
+        expected = np.array(recording.getTable())[480:]
+        self.assertGreater(np.abs(expected).max(), 0.1)
+        np.testing.assert_allclose(samples[480:], expected, atol=1e-3)
+
+    def test_stereo(self):
+        """Both channels of the input go through every effect"""
+        # A bus of its own, the mono sine of setUp would leak into the left channel
+        # for the sample its input takes to change
+        source = Sine([200, 300], mul=[0, 0.3])
+        bus = EffectsBus(distortion=0.3, reverb=0.5)
+        bus.set_input(source, 0)
+        self.assertEqual(len(bus.final_output), 2)
+        recording = NewTable(0.1, chnls=2)
+        recorder = TableRec(bus.final_output, recording).play()
+        self.render(0.1)
+        recorder.stop()
+        left, right = np.array(recording.getTable(all=True))
+        self.assertLess(np.abs(left).max(), 1e-3)
+        self.assertGreater(np.abs(right).max(), 0.1)
+
+    def test_reverb_stops_after_tail(self):
+        """A reverb turned down keeps running until its tail is gone, then stops"""
+        self.bus.set_reverb(0.5)
+        self.assertTrue(self.bus.reverb_effect.isPlaying())
+        self.render(0.1)
+        self.bus.set_reverb(0)
+        self.render(self.bus.fadetime + 0.05)
+        self.assertTrue(self.bus.reverb_effect.isPlaying())
+        self.render(REVERB_TAIL)
+        self.assertFalse(self.bus.reverb_effect.isPlaying())
+        self.bus.set_reverb(0.2)
+        self.assertFalse(self.bus.reverb_bypassed)
+        self.assertTrue(self.bus.reverb_effect.isPlaying())
+
+    def test_reverb_disabled(self):
+        """A disabled reverb is bypassed until enabled again at its knob's value"""
+        self.bus.set_reverb(0.5)
+        self.bus.set_reverb_enabled(False)
+        self.assertTrue(self.bus.reverb_bypassed)
+        self.bus.set_reverb(0.7)
+        self.assertTrue(self.bus.reverb_bypassed)
+        self.bus.set_reverb_enabled(True)
+        self.assertFalse(self.bus.reverb_bypassed)
+        self.assertEqual(self.bus.reverb, 0.7)
+
+    def test_bypass_without_click(self):
+        """Turning the effects down and up again never jumps between samples"""
+        self.bus.set_distortion(0.3)
+        self.bus.set_reverb(0.5)
+        # Kept referenced until the server has run, or they are collected before they fire
+        self._changes = [
+            CallAfter(lambda: self.bus.set_distortion(0), 0.1),
+            CallAfter(lambda: self.bus.set_reverb(0), 0.2),
+            CallAfter(lambda: self.bus.set_reverb(0.5), 0.3),
+            CallAfter(lambda: self.bus.set_distortion(0.3), 0.4),
+        ]
+        samples = self.record(0.5)
+        self.assertLess(np.abs(np.diff(samples[2400:])).max(), 0.02)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+"""Test for the synth engine"""
+import itertools
+import os
+import tempfile
+import unittest
+import numpy as np
+from pyo import NewTable, TableRec
+from pyo.lib._core import Mix
+from pyo.lib.dynamics import Compress
+from pyo.lib.effects import Disto, Freeverb
+from src.audioserver import AudioServer
+from src.engine import SynthEngine
+from src.envelope import EnvelopeParams
+from src.scheduler import EventScheduler
+from src.voicepool import VoicePool
+from src.waveforms.sinewave import SineWave
+from src.waveforms.trianglewave import TriangleWave
+
+
+class TestSynthEngine(unittest.TestCase):
+    """Test the engine on an offline server"""
+
+    def setUp(self):
+        """Sine engine played through a scheduler"""
+        self.server = AudioServer(offline=True)
+        self.engine = SynthEngine(SineWave, 4)
+        self.scheduler = EventScheduler(self.server, self.engine, lookahead=0)
+
+    def record(self, duration, *outputs):
+        """Renders duration seconds and returns the final output of the engine,
+        or of every one of outputs, both channels mixed together"""
+        outputs = outputs or (self.engine.final_output,)
+        mixes = [Mix(output, 1) for output in outputs]
+        recordings = [NewTable(duration) for _ in outputs]
+        recorders = [
+            TableRec(mix, recording).play() for mix, recording in zip(mixes, recordings)
+        ]
+        with tempfile.TemporaryDirectory() as directory:
+            self.server.record(os.path.join(directory, "engine.wav"), duration)
+            self.server.play()
+        for recorder in recorders:
+            recorder.stop()
+        samples = [np.array(recording.getTable()) for recording in recordings]
+        return samples[0] if len(samples) == 1 else samples
+
+    def change_waveform_at(self, changes):
+        """Switches the waveform at the start of the given blocks, like the GUI does"""
+        blocks = itertools.count()
+
+        def on_block():
+            block = next(blocks)
+            if block in changes:
+                self.scheduler.call(self.engine.set_waveform, changes[block])
+
+        self.server.add_block_callback(on_block)
+
+    def test_waveform_change_without_click(self):
+        """Changing the waveform, even again during its crossfade, never jumps the output"""
+        # Long enough for the released note to still sound through every crossfade
+        self.engine.set_release(0.5)
+        self.engine.note_on("a", 220.0)
+        # Blocks of 256 samples, the crossfade lasts about 10 blocks
+        self.change_waveform_at({18: TriangleWave, 20: SineWave, 40: TriangleWave})
+        samples = self.record(0.4)
+        steps = np.abs(np.diff(samples[: int(0.38 * 48000)]))
+        # A 220 Hz sine moves at most this much between two samples
+        before = steps[:4608].max()
+        self.assertGreater(before, 0)
+        self.assertLess(steps.max(), 1.5 * before)
+        # The change asked for during a crossfade is made after it
+        self.assertIs(self.engine.voice_pool.bank.synth_class, TriangleWave)
+
+    def test_same_as_inline_wiring(self):
+        """The engine sounds like the voices and effects the GUI used to wire itself"""
+        engine = SynthEngine(SineWave, 4, distortion=0.5, reverb=0.3)
+        engine.set_attack(0.05)
+        engine.set_release(0.1)
+        # The GUI mixed the pool into distortion, reverb and a compressor. The envelope
+        # it set on every voice is now the pool's, copied onto a voice when it is played
+        pool = VoicePool(SineWave, 4, envelope=EnvelopeParams(attack=0.05, release=0.1))
+        mix = Mix(pool.get_output(), 2)
+        dist_effect = Disto(mix, drive=0.5, slope=0.8)
+        reverb_effect = Freeverb(dist_effect, size=0.8, damp=0.7, bal=0.3)
+        inline_output = Compress(reverb_effect, ratio=4)
+        for player in (engine, pool):
+            player.note_on("a", 220.0)
+            player.note_on("b", 330.0)
+            player.note_on("c", 440.0)
+            player.note_off("a")
+        played, expected = self.record(0.3, engine.final_output, inline_output)
+        self.assertGreater(np.abs(expected).max(), 0.1)
+        np.testing.assert_allclose(played, expected, atol=1e-4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,12 @@
 """Test for the frequency helper class"""
 import unittest
-from src.freqhelper import find_scale, find_next_step
+import numpy as np
+from src.freqhelper import (
+    find_scale,
+    find_next_step,
+    find_scale_array,
+    find_scale_table,
+)
 
 
 class TestScales(unittest.TestCase):
@@ -26,8 +32,8 @@ class TestScales(unittest.TestCase):
                 440,
                 449.949,
                 460.123,
-                470.527,
-                481.1663,
+                470.5271,
+                481.1664,
                 492.0462,
                 503.1721,
                 514.5495,
@@ -35,26 +41,26 @@ class TestScales(unittest.TestCase):
                 538.082,
                 550.2488,
                 562.6907,
-                575.4139,
-                588.4248,
-                601.7299,
-                615.3359,
-                629.2495,
-                643.4777,
-                658.0277,
-                672.9067,
-                688.1221,
-                703.6815,
-                719.5927,
-                735.8637,
-                752.5026,
-                769.5178,
-                786.9177,
-                804.711,
-                822.9067,
-                841.5138,
-                860.5416,
-                879.9997,
+                575.414,
+                588.4249,
+                601.7301,
+                615.336,
+                629.2497,
+                643.4779,
+                658.0279,
+                672.9068,
+                688.1222,
+                703.6816,
+                719.5929,
+                735.8639,
+                752.5029,
+                769.518,
+                786.9179,
+                804.7113,
+                822.907,
+                841.5141,
+                860.5419,
+                880.0,
             ],
         )
 
@@ -78,9 +84,9 @@ class TestScales(unittest.TestCase):
             195.9979,
             207.6525,
             220.00,
-            233.0818,
-            246.94156,
-            261.62546,
+            233.0823,
+            246.9421,
+            261.626,
         ]
         for i, note in enumerate(scale):
             self.assertAlmostEqual(note, correct_12edo[i], 3)
@@ -96,6 +102,38 @@ class TestScales(unittest.TestCase):
         """Try to create a scale with an invalid root"""
         self.assertRaises(ValueError, find_scale, -1, 12, 1)
 
+    def test_create_invalid_edo(self):
+        """Try to create a scale with an invalid edo"""
+        self.assertRaises(ValueError, find_scale, 440, 0, 1)
+
+    def test_scale_array_no_drift(self):
+        """Every octave of the scale lands exactly on a power of two of the root"""
+        scale = find_scale_array(440, 53, 4)
+        self.assertEqual(scale.dtype, np.float64)
+        self.assertTrue(scale.flags["C_CONTIGUOUS"])
+        self.assertEqual(list(scale[::53]), [440.0, 880.0, 1760.0, 3520.0, 7040.0])
+
+    def test_scale_array_cached(self):
+        """The same scale is only computed once and can't be modified"""
+        scale = find_scale_array(440, 12)
+        self.assertIs(scale, find_scale_array(440.0, 12, 1))
+        with self.assertRaises(ValueError):
+            scale[0] = 0
+
+    def test_scale_table(self):
+        """Build a table of scales with different roots, edos and octaves"""
+        table = find_scale_table([440, 220], [3, 2], [1, 2])
+        self.assertEqual(table.shape, (2, 5))
+        np.testing.assert_allclose(table[0, :4], find_scale_array(440, 3))
+        self.assertTrue(np.all(np.isnan(table[0, 4:])))
+        np.testing.assert_allclose(table[1], find_scale_array(220, 2, 2))
+
+    def test_scale_table_broadcast(self):
+        """A single edo is shared between many roots"""
+        table = find_scale_table([100, 200, 300], 12)
+        self.assertEqual(table.shape, (3, 13))
+        np.testing.assert_allclose(table[:, 12], [200, 400, 600])
+
 
 if __name__ == "__main__":
     unittest.main()
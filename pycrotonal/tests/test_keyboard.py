@@ -1,8 +1,14 @@
 """Test for the keyinput class"""
 import time
 import unittest
-from pynput.keyboard import Key, Controller
-from src.keyinput import Keyboard, SCALE_12_EDO, SCALE_36_EDO, SCALE_60_EDO
+from pynput.keyboard import Key, KeyCode, Controller
+from src.keyinput import (
+    Keyboard,
+    SCALE_12_EDO,
+    SCALE_36_EDO,
+    SCALE_60_EDO,
+    DEGREE_TABLES,
+)
 
 
 class TestKeyboard(unittest.TestCase):
@@ -59,6 +65,24 @@ class TestKeyboard(unittest.TestCase):
         keyscale = self.keyboard.find_key_scale(60)
         self.assertEqual(keyscale, SCALE_60_EDO)
 
+    def test_degree_tables(self):
+        """Every edo has a compiled table matching its key scale"""
+        for edo in (1, 12, 33, 60):
+            keyscale = self.keyboard.find_key_scale(edo)
+            self.assertEqual(
+                DEGREE_TABLES[edo], {key: i for i, key in enumerate(keyscale)}
+            )
+
+    def test_unmapped_key_not_queued(self):
+        """Keys outside the scale never reach the message queue"""
+        keyboard = Keyboard(440, 24)
+        keyboard.on_press(KeyCode.from_char("z"))
+        keyboard.on_release(KeyCode.from_char("z"))
+        self.assertTrue(keyboard.msg_queue.empty())
+        key = KeyCode.from_char("1")
+        keyboard.on_press(key)
+        self.assertEqual(keyboard.get_keypress()[0:3], (key, 452.893, "start"))
+
     def test_neg1edo_keyscale(self):
         """Invalid edo keyscale should throw error"""
         self.assertRaises(ValueError, self.keyboard.find_key_scale, -1)
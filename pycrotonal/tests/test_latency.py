@@ -0,0 +1,54 @@
+"""Test for the latency instrumentation"""
+import time
+import unittest
+from src import latency
+from src.latency import LatencyTracker, STAGES
+
+
+class TestLatency(unittest.TestCase):
+    """Test the latency histograms"""
+
+    def tearDown(self):
+        """Leave the instrumentation off for the other tests"""
+        latency.disable()
+
+    def test_high_resolution_clock(self):
+        """Stamps come from perf_counter, which is fine enough on every platform"""
+        before = time.perf_counter_ns()
+        stamp = latency.now()
+        self.assertLessEqual(before, stamp)
+        self.assertLessEqual(stamp, time.perf_counter_ns())
+
+    def test_histograms(self):
+        """Histograms report the count and percentiles of every stage"""
+        tracker = LatencyTracker()
+        captured = latency.now()
+        for _ in range(10):
+            tracker.record("onset", captured)
+        histograms = tracker.histograms()
+        self.assertEqual(set(histograms), set(STAGES))
+        self.assertEqual(histograms["onset"]["count"], 10)
+        self.assertLessEqual(histograms["onset"]["p50_ms"], histograms["onset"]["max_ms"])
+        self.assertEqual(histograms["queued"], {"count": 0})
+
+    def test_window(self):
+        """Only the latest latencies are kept"""
+        tracker = LatencyTracker(window=3)
+        for _ in range(5):
+            tracker.record("queued", latency.now())
+        self.assertEqual(tracker.histograms()["queued"]["count"], 3)
+
+    def test_disabled_records_nothing(self):
+        """Recording while disabled is ignored"""
+        latency.record("queued", latency.now())
+        self.assertIsNone(latency.get_tracker())
+
+    def test_enabled_records(self):
+        """Recording while enabled goes to the tracker"""
+        tracker = latency.enable(dump_at_exit=False)
+        latency.record("dequeued", latency.now())
+        self.assertEqual(tracker.histograms()["dequeued"]["count"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+"""Test for the keyboard load generator"""
+import unittest
+from src.keyinput import Keyboard
+from src.loadgen import (
+    UNMAPPED_KEYS,
+    is_sustained,
+    make_events,
+    playable_keys,
+    run_load,
+    PATTERNS,
+)
+
+
+class TestLoadgen(unittest.TestCase):
+    """Test the synthetic keypress streams and a short run of the input path"""
+
+    def setUp(self):
+        """Playable keys of 24edo"""
+        self.keys = playable_keys(Keyboard(440, 24))
+
+    def test_phrases_release_every_key(self):
+        """Every pattern releases every key it presses"""
+        for pattern in PATTERNS:
+            held = set()
+            for key, msg in make_events(self.keys, pattern, 500):
+                if msg == "start":
+                    held.add(key)
+                else:
+                    held.discard(key)
+            self.assertEqual(held, set(), pattern)
+
+    def test_unmapped_keys(self):
+        """The unmapped pattern only uses keys outside every scale"""
+        events = make_events(self.keys, "unmapped", 10)
+        self.assertTrue(all(key in UNMAPPED_KEYS for key, _ in events))
+        self.assertTrue(all(key not in self.keys for key in UNMAPPED_KEYS))
+
+    def test_invalid_pattern(self):
+        """Unknown patterns are rejected"""
+        with self.assertRaises(ValueError):
+            make_events(self.keys, "glissando", 10)
+
+    def test_run_load(self):
+        """A low rate of mixed keypresses is played without dropped or stuck notes"""
+        report = run_load("mixed", rate=1000, duration=0.2, edo=24)
+        self.assertGreaterEqual(report["sent"], 200)
+        self.assertGreater(report["unmapped"], 0)
+        self.assertEqual(report["applied"], report["sent"] - report["unmapped"])
+        self.assertEqual(report["dropped"], 0)
+        self.assertEqual(report["stuck"], 0)
+        self.assertTrue(is_sustained(report))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+"""Test for the audio server monitor"""
+import json
+import os
+import tempfile
+import time
+import unittest
+from src.audioserver import AudioServer
+from src.monitor import JsonLinesSink, ServerMonitor, format_status, make_thresholds
+
+
+class FakePool:
+    """Stands in for a VoicePool with some voices holding notes"""
+
+    num_voices = 4
+
+    def __init__(self, num_active):
+        """Constructor"""
+        self.num_active = num_active
+
+
+class TestMonitor(unittest.TestCase):
+    """Test sampling the health of an offline server"""
+
+    def setUp(self):
+        """Offline server with a monitor counting a pool of 4 voices"""
+        self.server = AudioServer(offline=True)
+        self.pool = FakePool(1)
+        self.monitor = ServerMonitor(self.server, self.pool)
+
+    def render(self, duration=0.1):
+        """Runs the server for duration seconds"""
+        with tempfile.TemporaryDirectory() as directory:
+            self.server.record(os.path.join(directory, "monitor.wav"), duration)
+            self.server.play()
+
+    def test_sample(self):
+        """A sample counts the voices and an offline server is never late"""
+        self.render()
+        snapshot = self.monitor.sample()
+        self.assertEqual(snapshot["voices"], 1)
+        self.assertEqual(snapshot["voice_usage"], 0.25)
+        self.assertEqual(snapshot["late_blocks"], 0)
+        self.assertEqual(snapshot["clock_lag_ms"], 0.0)
+        self.assertGreaterEqual(snapshot["cpu_percent"], 0)
+        self.assertIn("voices 1", format_status(snapshot))
+
+    def test_cpu_of_audio_thread(self):
+        """CPU is the audio thread's time per block, other threads are not counted"""
+
+        def busy_block():
+            start = time.thread_time()
+            while time.thread_time() - start < self.monitor.block_seconds / 2:
+                pass
+
+        self.server.add_block_callback(busy_block)
+        self.render()
+        self.assertLess(abs(self.monitor.sample()["cpu_percent"] - 50), 25)
+        start = time.thread_time()
+        while time.thread_time() - start < 0.05:
+            pass
+        self.assertEqual(self.monitor.sample()["cpu_percent"], 0.0)
+
+    def test_late_block(self):
+        """A block starting long after the previous one is counted once"""
+        self.monitor.realtime = True
+        self.monitor._on_block()
+        self.monitor._last_block = time.perf_counter() - 0.1
+        self.monitor._on_block()
+        self.monitor._on_block()
+        snapshot = self.monitor.sample()
+        self.assertEqual(snapshot["late_blocks"], 1)
+        self.assertGreaterEqual(snapshot["max_gap_ms"], 100)
+        self.assertIn("late_blocks", snapshot["alerts"])
+        self.assertEqual(self.monitor.sample()["late_blocks"], 0)
+        self.assertEqual(self.monitor.total_late_blocks(), 1)
+
+    def test_alerts_and_series(self):
+        """Alerts follow the thresholds and every sample is kept in the series"""
+        self.monitor.thresholds = make_thresholds(cpu_percent=1000, voice_usage=0.5)
+        self.assertEqual(self.monitor.sample()["alerts"], [])
+        self.pool.num_active = 2
+        self.assertEqual(self.monitor.sample()["alerts"], ["voice_usage"])
+        self.assertEqual(self.monitor.series("voices"), [1, 2])
+
+    def test_json_sink(self):
+        """Every sample is written as one line of json"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "health.jsonl")
+            sink = JsonLinesSink(path)
+            self.monitor.sinks.append(sink)
+            self.monitor.sample()
+            self.monitor.sample()
+            sink.close()
+            with open(path, encoding="utf-8") as log:
+                lines = [json.loads(line) for line in log]
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(lines[0]["voices"], 1)
+
+    def test_invalid_thresholds(self):
+        """Unknown metrics and negative thresholds are rejected"""
+        with self.assertRaises(ValueError):
+            make_thresholds(loudness=3)
+        with self.assertRaises(ValueError):
+            make_thresholds(cpu_percent=-1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+"""Test for the numpy synthesis engine"""
+import os
+import tempfile
+import unittest
+import numpy as np
+from pyo import Disto, NewTable, Sine, TableRec
+from src.audioserver import AudioServer
+from src.npengine import NumpyEngine, adsr_envelope, distort
+from src.patch import make_patch
+
+
+class TestNumpyEngine(unittest.TestCase):
+    """Test rendering without a pyo server"""
+
+    def test_adsr_envelope(self):
+        """The envelope rises, decays to the sustain, then releases to 0"""
+        age = np.array([[-1.0, 0.05, 0.1, 0.15, 0.5, 1.05, 1.2]])
+        held = np.array([[1.0]])
+        envelope = adsr_envelope(age, held, 0.1, 0.1, 0.5, 0.1)
+        np.testing.assert_allclose(
+            envelope, [[0.0, 0.5, 1.0, 0.75, 0.5, 0.25, 0.0]], atol=1e-9
+        )
+
+    def test_release_before_sustain(self):
+        """A note released during its attack releases from where it was"""
+        envelope = adsr_envelope(np.array([[0.15]]), np.array([[0.05]]), 0.1, 0, 1, 0.2)
+        self.assertAlmostEqual(envelope[0, 0], 0.25)
+
+    def test_distort_matches_loop(self):
+        """The block lowpass is the same as filtering sample by sample"""
+        block = np.random.default_rng(0).standard_normal(1000)
+        expected = []
+        last = 0.1
+        k = 2 * 0.3 / 0.7
+        for sample in (1 + k) * block / (1 + k * np.abs(block)):
+            last = 0.2 * sample + 0.8 * last
+            expected.append(last)
+        np.testing.assert_allclose(distort(block, 0.3, 0.8, 0.1), expected)
+
+    def test_distort_matches_pyo(self):
+        """distort renders the same samples as pyo's Disto, unity gain at drive 0"""
+        server = AudioServer(offline=True)
+        sample_rate = server.config["sample_rate"]
+        for drive in (0, 0.5, 0.95):
+            sine = Sine(440, mul=0.2)
+            disto = Disto(sine, drive=drive, slope=0.8)
+            recording = NewTable(0.05)
+            recorder = TableRec(disto, recording).play()
+            with tempfile.TemporaryDirectory() as directory:
+                server.record(os.path.join(directory, "disto.wav"), 0.05)
+                server.play()
+            recorder.stop()
+            expected = np.array(recording.getTable())
+            time = np.arange(len(expected)) / sample_rate
+            block = 0.2 * np.sin(2 * np.pi * 440 * time)
+            np.testing.assert_allclose(distort(block, drive), expected, atol=1e-3)
+        self.assertLess(np.abs(distort(block, 0)).max(), 0.2)
+
+    def test_render_frequency(self):
+        """A sine renders at the frequency of its degree"""
+        engine = NumpyEngine(make_patch(edo=12))
+        samples = engine.render([{"time": 0, "duration": 1, "degree": 12}], tail=0)
+        spectrum = np.abs(np.fft.rfft(samples[: engine.sample_rate]))
+        self.assertEqual(np.argmax(spectrum), 880)
+
+    def test_render_fm_sidebands(self):
+        """FM moves energy from the carrier to sidebands a modulator frequency apart"""
+        engine = NumpyEngine(make_patch(edo=12, fm_freq=100, fm_index=2))
+        samples = engine.render([{"time": 0, "duration": 1, "degree": 0}], tail=0)
+        spectrum = np.abs(np.fft.rfft(samples[: engine.sample_rate]))
+        # The carrier's bessel amplitude at an index of 2 is smaller than the first sidebands
+        self.assertGreater(spectrum[540], spectrum[440])
+        self.assertGreater(spectrum[340], spectrum[440])
+
+    def test_render_deterministic(self):
+        """Rendering the same events twice gives the same samples"""
+        events = [
+            {"time": i * 0.05, "duration": 0.1, "degree": i % 7} for i in range(20)
+        ]
+        first = NumpyEngine(make_patch(waveform="Saw")).render(events)
+        second = NumpyEngine(make_patch(waveform="Saw")).render(events)
+        np.testing.assert_array_equal(first, second)
+
+    def test_voices_freed(self):
+        """Voices are freed after their release, and polyphony is bounded"""
+        engine = NumpyEngine(make_patch(waveform="Square", voices=2, release=0.01))
+        for freq in (220, 330, 440):
+            engine.note_on(freq)
+        self.assertEqual(engine.active_voices(), 2)
+        engine.note_off(0)
+        engine.note_off(1)
+        for _ in range(5):
+            engine.process_block()
+        self.assertEqual(engine.active_voices(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
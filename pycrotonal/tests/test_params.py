@@ -0,0 +1,83 @@
+"""Test for coalescing knob changes"""
+import os
+import tempfile
+import threading
+import unittest
+from src.audioserver import AudioServer
+from src.params import ParameterScheduler
+
+
+class FakeEngine:
+    """Stands in for a SynthEngine, recording every setter call"""
+
+    def __init__(self):
+        """Constructor"""
+        self.calls = []
+
+    def set_reverb(self, reverb):
+        """Records the reverb"""
+        self.calls.append(("reverb", reverb))
+
+    def set_attack(self, attack):
+        """Records the attack"""
+        self.calls.append(("attack", attack))
+
+
+class TestParameterScheduler(unittest.TestCase):
+    """Test that only the latest value of every parameter reaches the engine"""
+
+    def setUp(self):
+        """Scheduler without a server"""
+        self.engine = FakeEngine()
+        self.params = ParameterScheduler(self.engine)
+
+    def test_coalesce(self):
+        """A drag of many values applies the last one once"""
+        for value in range(100):
+            self.params.set("reverb", value / 100)
+        self.params.set("attack", 0.5)
+        self.assertEqual(self.params.pending(), 2)
+        self.params.apply_pending()
+        self.assertCountEqual(self.engine.calls, [("reverb", 0.99), ("attack", 0.5)])
+        self.assertEqual(self.params.received, 101)
+        self.assertEqual(self.params.applied, 2)
+        self.params.apply_pending()
+        self.assertEqual(len(self.engine.calls), 2)
+
+    def test_unknown_parameter(self):
+        """Only the engine's parameters can be set"""
+        with self.assertRaises(ValueError):
+            self.params.set("volume", 1)
+
+    def test_concurrent_set(self):
+        """Values set while another thread applies them are never lost"""
+        done = threading.Event()
+
+        def drag():
+            for value in range(10000):
+                self.params.set("reverb", value)
+            done.set()
+
+        thread = threading.Thread(target=drag)
+        thread.start()
+        while not done.is_set():
+            self.params.apply_pending()
+        thread.join()
+        self.params.apply_pending()
+        self.assertEqual(self.engine.calls[-1], ("reverb", 9999))
+
+    def test_applied_every_block(self):
+        """Values set before the server runs are applied by its block callback"""
+        server = AudioServer(offline=True)
+        params = ParameterScheduler(self.engine, server)
+        params.set("reverb", 0.25)
+        params.set("reverb", 0.5)
+        with tempfile.TemporaryDirectory() as directory:
+            server.record(os.path.join(directory, "params.wav"), 0.05)
+            server.play()
+        self.assertEqual(self.engine.calls, [("reverb", 0.5)])
+        self.assertEqual(params.pending(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,135 @@
+"""Test for saving presets and switching between them"""
+import os
+import tempfile
+import unittest
+import numpy as np
+from pyo import CallAfter, NewTable, TableRec
+from src.audioserver import AudioServer
+from src.patch import make_patch
+from src.presets import PresetStore, PresetSwitcher, encode_patch, decode_patch
+from src.waveforms.sawtoothwave import SawtoothWave
+
+
+class TestPresetStore(unittest.TestCase):
+    """Test the preset files"""
+
+    def setUp(self):
+        """Store in a temporary directory"""
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = PresetStore(os.path.join(self.directory.name, "presets"))
+
+    def tearDown(self):
+        """Removes the presets"""
+        self.directory.cleanup()
+
+    def test_encode(self):
+        """Only the values that differ from the defaults are written"""
+        self.assertEqual(encode_patch(make_patch()), "{}")
+        text = encode_patch(make_patch(waveform="Saw", reverb=0.5))
+        self.assertEqual(text, '{"reverb":0.5,"waveform":"Saw"}')
+        self.assertEqual(decode_patch(text), make_patch(waveform="Saw", reverb=0.5))
+        self.assertRaises(ValueError, decode_patch, "[1]")
+        self.assertRaises(ValueError, decode_patch, '{"chorus":1}')
+
+    def test_save_load(self):
+        """A saved preset loads as the same patch"""
+        self.assertEqual(self.store.names(), [])
+        patch = make_patch(waveform="Square", attack=0.5, edo=31)
+        self.store.save("lead", patch)
+        self.store.save("pad", make_patch(reverb=0.8))
+        self.assertEqual(self.store.names(), ["lead", "pad"])
+        self.assertEqual(self.store.load("lead"), patch)
+        self.store.delete("lead")
+        self.assertEqual(self.store.names(), ["pad"])
+
+    def test_invalid_preset(self):
+        """Presets need a plain name and a valid patch"""
+        self.assertRaises(ValueError, self.store.load, "missing")
+        self.assertRaises(ValueError, self.store.save, "", make_patch())
+        self.assertRaises(ValueError, self.store.save, "../lead", make_patch())
+        self.assertRaises(ValueError, self.store.save, "lead", {"reverb": 2})
+        self.assertRaises(ValueError, decode_patch, '{"edo":0}')
+        self.assertRaises(ValueError, decode_patch, '{"edo":12.5}')
+        self.assertRaises(ValueError, decode_patch, '{"root":0}')
+        self.assertRaises(ValueError, decode_patch, '{"voices":0}')
+
+
+class TestPresetSwitcher(unittest.TestCase):
+    """Test switching between prebuilt engines on an offline server"""
+
+    def setUp(self):
+        """Switcher of the default patch"""
+        self.server = AudioServer(offline=True)
+        self.switcher = PresetSwitcher(make_patch(voices=4))
+
+    def test_switch(self):
+        """Held notes move to the prepared engine, which becomes live"""
+        first = self.switcher.live
+        self.switcher.note_on("a", 440.0)
+        self.switcher.prepare(make_patch(waveform="Saw", voices=4, reverb=0.3))
+        self.assertIs(self.switcher.live, first)
+        self.switcher.switch()
+        self.assertIsNot(self.switcher.live, first)
+        self.assertEqual(self.switcher.patch["waveform"], "Saw")
+        self.assertEqual(self.switcher.live.reverb, 0.3)
+        self.assertEqual(self.switcher.voice_pool.held_notes(), {"a": 440.0})
+        # Released and stopped once it has faded out
+        self.assertEqual(first.voice_pool.num_active, 1)
+        with tempfile.TemporaryDirectory() as directory:
+            self.server.record(os.path.join(directory, "switch.wav"), 0.05)
+            self.server.play()
+        self.assertEqual(first.voice_pool.num_active, 0)
+        self.assertFalse(first.final_output.isPlaying())
+        self.switcher.note_off("a")
+        self.assertEqual(self.switcher.num_active, 0)
+        self.switcher.prepare(make_patch(voices=4))
+        self.assertTrue(first.final_output.isPlaying())
+
+    def test_standby_stopped(self):
+        """The standby engine only runs from prepare until it has faded out"""
+        self.assertTrue(self.switcher.standby.bus.stopped)
+        self.assertFalse(self.switcher.standby.final_output.isPlaying())
+        recording = NewTable(0.1)
+        recorder = TableRec(self.switcher.final_output, recording).play()
+        self.switcher.note_on("a", 220.0)
+        # Switching without prepare starts the standby engine too
+        self.switcher.switch()
+        with tempfile.TemporaryDirectory() as directory:
+            self.server.record(os.path.join(directory, "switch.wav"), 0.1)
+            self.server.play()
+        recorder.stop()
+        self.assertTrue(self.switcher.standby.bus.stopped)
+        self.assertFalse(self.switcher.live.bus.stopped)
+        samples = np.array(recording.getTable())[2400:]
+        self.assertGreater(np.abs(samples).max(), 0.1)
+
+    def test_live_patch(self):
+        """Changes to the live engine are kept in its patch"""
+        self.switcher.set_reverb(0.4)
+        self.switcher.set_attack(1.0)
+        self.switcher.set_waveform(SawtoothWave)
+        patch = self.switcher.patch
+        self.assertEqual((patch["reverb"], patch["attack"]), (0.4, 1.0))
+        self.assertEqual(patch["waveform"], "Saw")
+        self.assertEqual(self.switcher.standby_patch["reverb"], 0)
+
+    def test_switch_without_gap(self):
+        """A note held through a switch never goes silent"""
+        recording = NewTable(0.3)
+        recorder = TableRec(self.switcher.final_output, recording).play()
+        self.switcher.note_on("a", 220.0)
+        self.switcher.prepare(make_patch(waveform="Triangle", voices=4))
+        # Kept referenced until the server has run, or it is collected before it fires
+        self._switch = CallAfter(self.switcher.switch, 0.1)
+        with tempfile.TemporaryDirectory() as directory:
+            self.server.record(os.path.join(directory, "switch.wav"), 0.3)
+            self.server.play()
+        recorder.stop()
+        samples = np.array(recording.getTable())[4800:]
+        # Loudest sample of every 5ms, longer than a period of the note
+        windows = np.abs(samples[: len(samples) // 240 * 240]).reshape(-1, 240)
+        self.assertGreater(windows.max(axis=1).min(), 0.02)
+
+
+if __name__ == "__main__":
+    unittest.main()
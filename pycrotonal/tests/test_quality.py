@@ -0,0 +1,201 @@
+"""Test for the quality tiers and the governor stepping between them"""
+import os
+import tempfile
+import unittest
+from src.audioserver import AudioServer
+from src.engine import SynthEngine
+from src.patch import WAVEFORM_CLASSES
+from src.quality import (
+    QualityGovernor,
+    STEP_DOWN_LATE_SAMPLES,
+    STEP_UP_SAMPLES,
+    SETTLE_SAMPLES,
+    TIERS,
+)
+from src.scheduler import EventScheduler
+from src.voicebank import NUM_BANDS
+from src.waveforms.sawtoothwave import SawtoothWave
+from src.waveforms.synth import Synth, set_max_harmonics
+from src.waveforms.wavetables import MAX_CACHED_TABLES, num_cached_tables
+
+
+class FakePool:
+    """Stands in for a VoicePool"""
+
+    num_voices = 8
+
+
+class FakeEngine:
+    """Stands in for a SynthEngine, recording the quality it is set to"""
+
+    def __init__(self):
+        """Constructor"""
+        self.voice_pool = FakePool()
+        self.quality = None
+
+    def set_quality(self, polyphony, reverb_enabled, lookahead, knee):
+        """Records the settings"""
+        self.quality = (polyphony, reverb_enabled, lookahead, knee)
+
+
+def sample(cpu_percent, late_blocks=0):
+    """Monitor sample with only the metrics the governor reads"""
+    return {"cpu_percent": cpu_percent, "late_blocks": late_blocks}
+
+
+class TestQualityGovernor(unittest.TestCase):
+    """Test manual tiers and auto mode"""
+
+    def setUp(self):
+        """Governor in auto mode that has settled, the server is needed for the tables"""
+        self.server = AudioServer(offline=True)
+        self.engine = FakeEngine()
+        self.governor = QualityGovernor(self.engine, "auto")
+        for _ in range(SETTLE_SAMPLES):
+            self.governor.update(sample(0))
+
+    def tearDown(self):
+        """Every harmonic again for the other tests"""
+        set_max_harmonics(None)
+
+    def settle(self):
+        """Feeds the samples ignored after a change"""
+        for _ in range(SETTLE_SAMPLES):
+            self.assertFalse(self.governor.update(sample(100)))
+
+    def test_manual_tiers(self):
+        """Fixed tiers set the engine and ignore the load"""
+        self.governor.set_mode("eco")
+        self.assertEqual(self.engine.quality, (4, False, 0, 0))
+        self.assertEqual(Synth.max_harmonics, 16)
+        self.assertFalse(self.governor.update(sample(100, 5)))
+        self.governor.set_mode("high")
+        self.assertEqual(self.engine.quality[:2], (8, True))
+        self.assertIsNone(Synth.max_harmonics)
+        self.assertRaises(ValueError, self.governor.set_mode, "ultra")
+
+    def test_step_down(self):
+        """Overload steps down one tier at a time, down to eco"""
+        self.assertEqual(self.governor.mode, "auto")
+        self.assertEqual(self.governor.tier, "high")
+        self.assertTrue(self.governor.update(sample(90)))
+        self.assertEqual(self.governor.tier, "standard")
+        self.settle()
+        for _ in range(STEP_DOWN_LATE_SAMPLES - 1):
+            self.assertFalse(self.governor.update(sample(10, late_blocks=2)))
+        self.assertTrue(self.governor.update(sample(10, late_blocks=2)))
+        self.assertEqual(self.governor.tier, "eco")
+        self.settle()
+        self.assertFalse(self.governor.update(sample(90)))
+        self.assertEqual(self.governor.steps, 2)
+
+    def test_single_late_block(self):
+        """Late blocks only step down when they keep coming, and are never calm"""
+        for _ in range(STEP_UP_SAMPLES):
+            self.assertFalse(self.governor.update(sample(10, late_blocks=1)))
+            self.assertFalse(self.governor.update(sample(10)))
+        self.assertEqual(self.governor.tier, "high")
+        self.governor.set_mode("standard")
+        self.governor.set_mode("auto")
+        for _ in range(SETTLE_SAMPLES):
+            self.governor.update(sample(0))
+        for _ in range(STEP_UP_SAMPLES - 1):
+            self.assertFalse(self.governor.update(sample(10)))
+        self.assertFalse(self.governor.update(sample(10, late_blocks=1)))
+        self.assertEqual(self.governor.tier, "standard")
+
+    def test_step_up_hysteresis(self):
+        """Only a long calm between the thresholds is needed to step back up"""
+        self.governor.update(sample(90))
+        for _ in range(SETTLE_SAMPLES):
+            self.governor.update(sample(0))
+        for _ in range(STEP_UP_SAMPLES - 1):
+            self.assertFalse(self.governor.update(sample(10)))
+        # Between the thresholds, neither overloaded nor calm
+        self.assertFalse(self.governor.update(sample(50)))
+        for _ in range(STEP_UP_SAMPLES - 1):
+            self.assertFalse(self.governor.update(sample(10)))
+        self.assertTrue(self.governor.update(sample(10)))
+        self.assertEqual(self.governor.tier, "high")
+
+    def test_applied_through_call(self):
+        """Settings wait for the call, such as the scheduler's next block"""
+        deferred = []
+        governor = QualityGovernor(
+            self.engine, "high", call=lambda *call: deferred.append(call)
+        )
+        self.engine.quality = None
+        governor.set_mode("eco")
+        self.assertEqual(governor.tier, "eco")
+        self.assertIsNone(self.engine.quality)
+        for function, *args in deferred:
+            function(*args)
+        self.assertEqual(self.engine.quality, (4, False, 0, 0))
+
+    def test_every_tier_cached(self):
+        """The table of every band of every waveform at every tier fits in the bank"""
+        self.assertGreaterEqual(
+            MAX_CACHED_TABLES, NUM_BANDS * len(WAVEFORM_CLASSES) * len(TIERS)
+        )
+
+    def test_invalid_thresholds(self):
+        """Stepping up needs a lower CPU than stepping down"""
+        with self.assertRaises(ValueError):
+            QualityGovernor(self.engine, step_down_cpu=50, step_up_cpu=60)
+
+
+class TestEngineQuality(unittest.TestCase):
+    """Test tiers on a real engine on an offline server"""
+
+    def setUp(self):
+        """Saw engine of 8 voices with reverb"""
+        self.server = AudioServer(offline=True)
+        self.engine = SynthEngine(SawtoothWave, 8, reverb=0.5)
+
+    def tearDown(self):
+        """Every harmonic again for the other tests"""
+        set_max_harmonics(None)
+
+    def test_eco(self):
+        """Eco limits the voices and stops the reverb, high brings them back"""
+        governor = QualityGovernor(self.engine, "eco")
+        for key in range(6):
+            self.engine.note_on(key, 110.0 * (key + 1))
+        self.assertEqual(self.engine.voice_pool.num_active, 4)
+        self.assertTrue(self.engine.bus.reverb_bypassed)
+        table = self.engine.voice_pool.bank.get_output().table
+        self.assertLessEqual(table[0].order, 16)
+        governor.set_mode("high")
+        self.assertFalse(self.engine.bus.reverb_bypassed)
+        self.assertEqual(self.engine.voice_pool.polyphony, 8)
+        table = self.engine.voice_pool.bank.get_output().table
+        self.assertGreater(table[0].order, 16)
+
+    def test_tables_built_before_call(self):
+        """The tables of a tier are built before the call, which only swaps them in"""
+        deferred = []
+        governor = QualityGovernor(
+            self.engine, "high", call=lambda *call: deferred.append(call)
+        )
+        governor.set_mode("eco")
+        built = num_cached_tables()
+        for function, *args in deferred:
+            function(*args)
+        self.assertEqual(num_cached_tables(), built)
+        table = self.engine.voice_pool.bank.get_output().table
+        self.assertLessEqual(table[0].order, 16)
+
+    def test_applied_on_block(self):
+        """Through the scheduler, the tier reaches the voices on the audio thread"""
+        scheduler = EventScheduler(self.server, self.engine, lookahead=0)
+        governor = QualityGovernor(self.engine, "high", call=scheduler.call)
+        governor.set_mode("eco")
+        self.assertEqual(self.engine.voice_pool.polyphony, 8)
+        with tempfile.TemporaryDirectory() as directory:
+            self.server.record(os.path.join(directory, "quality.wav"), 0.01)
+            self.server.play()
+        self.assertEqual(self.engine.voice_pool.polyphony, 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,147 @@
+"""Test for the command ring to the engine process"""
+import multiprocessing
+import threading
+import unittest
+from src import remote
+from src.remote import (
+    CommandRing,
+    apply_command,
+    NOTE_ON,
+    NOTE_OFF,
+    SET_REVERB,
+    SET_WAVEFORM,
+    QUIT,
+    WAVEFORM_NAMES,
+)
+from src.patch import WAVEFORM_CLASSES
+
+
+def send_notes(ring_name):
+    """Runs in another process and writes three notes into the ring"""
+    ring = CommandRing(name=ring_name, capacity=8)
+    for key in range(3):
+        ring.push(NOTE_ON, key, 440.0 + key, key)
+    ring.close()
+
+
+class FakeEngine:
+    """Records every call made on the engine and the scheduler"""
+
+    def __init__(self):
+        """Constructor"""
+        self.calls = []
+
+    def __getattr__(self, name):
+        """Every method records its name and arguments"""
+        return lambda *args: self.calls.append((name,) + args)
+
+
+class FakeScheduler(FakeEngine):
+    """Records the calls like FakeEngine, and keeps the functions handed to call
+    to run them later, like the audio thread does"""
+
+    def __init__(self):
+        """Constructor"""
+        super().__init__()
+        self.deferred = []
+
+    def call(self, function, *args):
+        """Keeps the function to run at the next block"""
+        self.deferred.append((function, args))
+
+
+class TestRemote(unittest.TestCase):
+    """Test the shared memory ring and the commands"""
+
+    def setUp(self):
+        """A small ring to wrap around quickly"""
+        self.ring = CommandRing(capacity=4)
+
+    def tearDown(self):
+        self.ring.close()
+        self.ring.unlink()
+
+    def test_messages_in_order(self):
+        """Messages come out in the order they went in, across the end of the ring"""
+        for _ in range(3):
+            for key in range(3):
+                self.assertTrue(self.ring.push(NOTE_ON, key, 440.0, 7))
+            self.assertEqual(
+                self.ring.pop_all(),
+                [(NOTE_ON, 0, 440.0, 7), (NOTE_ON, 1, 440.0, 7), (NOTE_ON, 2, 440.0, 7)],
+            )
+        self.assertEqual(self.ring.pop_all(), [])
+
+    def test_full_ring_drops(self):
+        """Messages sent to a full ring are dropped and counted"""
+        for key in range(5):
+            self.ring.push(NOTE_ON, key)
+        self.assertEqual(self.ring.dropped, 1)
+        self.assertEqual([message[1] for message in self.ring.pop_all()], [0, 1, 2, 3])
+
+    def test_full_ring_keeps_note_off(self):
+        """A note off sent to a full ring waits for room instead of being dropped"""
+        for key in range(4):
+            self.ring.push(NOTE_ON, key)
+        popped = []
+        reader = threading.Timer(0.05, lambda: popped.extend(self.ring.pop_all()))
+        reader.start()
+        self.assertTrue(self.ring.push(NOTE_OFF, 0))
+        reader.join()
+        self.assertEqual(self.ring.dropped, 0)
+        self.assertEqual(len(popped), 4)
+        self.assertEqual(self.ring.pop_all(), [(NOTE_OFF, 0, 0.0, 0)])
+
+    def test_kept_message_timeout(self):
+        """A note off is only dropped once nothing has read the ring for a while"""
+        timeout = remote.KEPT_TIMEOUT
+        remote.KEPT_TIMEOUT = 0.01
+        try:
+            for key in range(4):
+                self.ring.push(NOTE_ON, key)
+            self.assertFalse(self.ring.push(NOTE_OFF, 0))
+            self.assertEqual(self.ring.dropped, 1)
+        finally:
+            remote.KEPT_TIMEOUT = timeout
+
+    def test_other_process(self):
+        """Another process can write into the ring by its name"""
+        ring = CommandRing(capacity=8)
+        try:
+            process = multiprocessing.get_context("spawn").Process(
+                target=send_notes, args=(ring.name,)
+            )
+            process.start()
+            process.join(30)
+            self.assertEqual(
+                ring.pop_all(),
+                [(NOTE_ON, 0, 440.0, 0), (NOTE_ON, 1, 441.0, 1), (NOTE_ON, 2, 442.0, 2)],
+            )
+        finally:
+            ring.close()
+            ring.unlink()
+
+    def test_apply_command(self):
+        """Notes go to the scheduler, and engine changes wait for the audio thread"""
+        engine = FakeEngine()
+        scheduler = FakeScheduler()
+        self.assertTrue(apply_command(engine, scheduler, NOTE_ON, 5, 440.0, 9))
+        apply_command(engine, scheduler, NOTE_OFF, 5, 440.0, 10)
+        apply_command(engine, scheduler, SET_REVERB, 0, 0.5, 0)
+        apply_command(engine, scheduler, SET_WAVEFORM, 0, WAVEFORM_NAMES.index("Saw"), 0)
+        self.assertFalse(apply_command(engine, scheduler, QUIT, 0, 0.0, 0))
+        self.assertEqual(engine.calls, [])
+        for function, args in scheduler.deferred:
+            function(*args)
+        self.assertEqual(
+            scheduler.calls,
+            [("schedule", 5, 440.0, "start", 9), ("schedule", 5, 440.0, "stop", 10)],
+        )
+        self.assertEqual(
+            engine.calls,
+            [("set_reverb", 0.5), ("set_waveform", WAVEFORM_CLASSES["Saw"])],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+"""Test for offline rendering"""
+import os
+import tempfile
+import unittest
+import wave
+from src.audioserver import AudioServer
+from src.patch import make_patch
+from src.render import event_frequencies, render, render_length
+
+
+class TestRender(unittest.TestCase):
+    """Test rendering note events without a sound card"""
+
+    def test_event_frequencies(self):
+        """Degrees count up the edo from the root, past the first octave"""
+        events = [{"degree": 0}, {"degree": 3}, {"degree": 7}]
+        freqs = event_frequencies(events, 440, 3)
+        self.assertEqual(freqs[0], 440.0)
+        self.assertEqual(freqs[1], 880.0)
+        self.assertAlmostEqual(freqs[2], 440 * 2 ** (7 / 3))
+
+    def test_negative_degree(self):
+        """Notes below the root throw an error"""
+        self.assertRaises(ValueError, event_frequencies, [{"degree": -1}], 440, 12)
+
+    def test_render_length(self):
+        """The render covers the last note, its release, and the tail"""
+        patch = make_patch(release=0.5)
+        events = [
+            {"time": 0, "duration": 2, "degree": 0},
+            {"time": 1, "duration": 0.5, "degree": 0},
+        ]
+        self.assertEqual(render_length(events, patch, tail=1), 3.5)
+
+    def test_invalid_patch(self):
+        """Unknown waveforms and parameters throw errors"""
+        self.assertRaises(ValueError, make_patch, waveform="Noise")
+        self.assertRaises(ValueError, make_patch, chorus=1)
+        self.assertRaises(ValueError, make_patch, reverb=2)
+        self.assertRaises(ValueError, make_patch, fm_index=-1)
+
+    def test_render_file(self):
+        """Render a short score to a wav file"""
+        server = AudioServer(offline=True)
+        patch = make_patch(waveform="Saw", edo=31, reverb=0.3)
+        events = [
+            {"time": 0, "duration": 0.2, "degree": 0},
+            {"time": 0.1, "duration": 0.2, "degree": 10},
+        ]
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "render.wav")
+            length = render(server, events, patch, filename, tail=0.1)
+            with wave.open(filename) as rendered:
+                self.assertEqual(rendered.getnchannels(), 2)
+                self.assertAlmostEqual(
+                    rendered.getnframes() / rendered.getframerate(), length, 1
+                )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+"""Test for the event scheduler"""
+import os
+import tempfile
+import unittest
+from src import latency
+from src.audioserver import AudioServer
+from src.scheduler import EventScheduler
+
+
+class FakeEngine:
+    """Stands in for a SynthEngine, records the block clock of every note"""
+
+    def __init__(self):
+        """Constructor"""
+        self.scheduler = None
+        self.calls = []
+
+    def note_on(self, key, freq):
+        """Record a note on"""
+        self.calls.append(("on", key, self.scheduler.clock()))
+
+    def note_off(self, key):
+        """Record a note off"""
+        self.calls.append(("off", key, self.scheduler.clock()))
+
+
+class TestScheduler(unittest.TestCase):
+    """Test applying events on the block clock of an offline server"""
+
+    def setUp(self):
+        """Offline server with 256 sample blocks"""
+        self.server = AudioServer(offline=True)
+        self.engine = FakeEngine()
+        self.scheduler = EventScheduler(self.server, self.engine, lookahead=0)
+        self.engine.scheduler = self.scheduler
+
+    def render(self, duration=0.1):
+        """Runs the server for duration seconds"""
+        with tempfile.TemporaryDirectory() as directory:
+            self.server.record(os.path.join(directory, "scheduler.wav"), duration)
+            self.server.play()
+
+    def test_sequence_on_nearest_block(self):
+        """Every event is applied in the block nearest to its target"""
+        self.scheduler.schedule_sequence(
+            [
+                (0.0, "a", 440, "start"),
+                (1000 / 48000, "a", 440, "stop"),
+                (0.05, "b", 550, "start"),
+            ],
+            start=0,
+        )
+        self.render()
+        self.assertEqual(
+            self.engine.calls, [("on", "a", 0), ("off", "a", 1024), ("on", "b", 2304)]
+        )
+        jitter = self.scheduler.jitter()
+        self.assertEqual(jitter["count"], 3)
+        self.assertLessEqual(jitter["max_ms"], 128 / 48)
+        self.assertEqual(jitter["late"], 0)
+
+    def test_keypress_lookahead(self):
+        """A keypress is applied lookahead after it was captured"""
+        self.scheduler.lookahead = 0.02
+        self.scheduler.schedule("a", 440, "start", latency.now())
+        self.assertEqual(self.scheduler.pending(), 1)
+        self.render()
+        self.assertEqual(len(self.engine.calls), 1)
+        # 0.02s is 960 samples, the nearest block starts at 1024
+        self.assertEqual(self.engine.calls[0][2], 1024)
+
+    def test_late_events_counted(self):
+        """Events captured longer ago than the look-ahead are applied at once and counted"""
+        self.scheduler.schedule("a", 440, "start", latency.now() - 10**9)
+        self.render()
+        self.assertEqual(self.engine.calls, [("on", "a", 0)])
+        self.assertEqual(self.scheduler.jitter()["late"], 1)
+
+    def test_keypresses_keep_order(self):
+        """A keypress that waited longer in the queue is not applied before an earlier one"""
+        self.scheduler.lookahead = 0.02
+        self.scheduler.schedule("a", 440, "start", latency.now())
+        self.scheduler.schedule("a", 440, "stop", latency.now() - 10**8)
+        self.render()
+        self.assertEqual(self.engine.calls, [("on", "a", 1024), ("off", "a", 1024)])
+
+    def test_cancel(self):
+        """Cancelled events are never applied"""
+        self.scheduler.schedule_sequence([(0.05, "a", 440, "start")], start=0)
+        self.scheduler.cancel()
+        self.scheduler.schedule_sequence([(0.06, "b", 440, "start")], start=0)
+        self.render()
+        self.assertEqual([call[1] for call in self.engine.calls], ["b"])
+
+    def test_call_on_audio_thread(self):
+        """A call waits for the next block and runs before the notes due in it"""
+        self.scheduler.schedule_sequence([(0.0, "a", 440, "start")], start=0)
+
+        def release_all():
+            self.engine.calls.append(("call", self.scheduler.clock()))
+
+        self.scheduler.call(release_all)
+        self.assertEqual(self.engine.calls, [])
+        self.render()
+        self.assertEqual(self.engine.calls, [("call", 0), ("on", "a", 0)])
+        self.assertEqual(self.scheduler.pending(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+"""Test for the audio server config"""
+import argparse
+import json
+import os
+import tempfile
+import unittest
+from src.serverconfig import (
+    DEFAULT_CONFIG,
+    add_arguments,
+    config_from_args,
+    make_config,
+    round_trip_latency,
+)
+
+
+class TestServerConfig(unittest.TestCase):
+    """Test reading and validating the server settings"""
+
+    def parse(self, *flags):
+        """Parses command line flags into a config"""
+        parser = argparse.ArgumentParser()
+        add_arguments(parser)
+        return config_from_args(parser.parse_args(list(flags)))
+
+    def test_defaults(self):
+        """No flags gives the default config"""
+        self.assertEqual(self.parse(), DEFAULT_CONFIG)
+
+    def test_invalid_settings(self):
+        """Unknown settings, backends, and sizes are rejected"""
+        self.assertRaises(ValueError, make_config, latency=1)
+        self.assertRaises(ValueError, make_config, backend="alsa")
+        self.assertRaises(ValueError, make_config, buffer_size=0)
+
+    def test_flags_override_file(self):
+        """Flags take priority over the config file"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "server.json")
+            with open(path, "w", encoding="utf-8") as config_file:
+                json.dump({"buffer_size": 1024, "backend": "jack"}, config_file)
+            config = self.parse("--config", path, "--buffer-size", "64")
+        self.assertEqual(config["buffer_size"], 64)
+        self.assertEqual(config["backend"], "jack")
+
+    def test_round_trip_latency(self):
+        """Duplex servers buffer both the input and the output"""
+        output_only = make_config(buffer_size=480, sample_rate=48000)
+        duplex = make_config(buffer_size=480, sample_rate=48000, duplex=True)
+        self.assertAlmostEqual(round_trip_latency(output_only), 0.01)
+        self.assertAlmostEqual(round_trip_latency(duplex), 0.02)
+
+
+if __name__ == "__main__":
+    unittest.main()
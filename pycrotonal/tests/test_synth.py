@@ -1,49 +1,26 @@
-"""Test for the synths"""
+"""Test for the harmonics of the waveforms"""
 import unittest
 
-from pyo.lib.controls import Adsr
 from src.waveforms.sinewave import SineWave
 from src.waveforms.squarewave import SquareWave
 from src.waveforms.trianglewave import TriangleWave
 from src.waveforms.sawtoothwave import SawtoothWave
-from src.audioserver import AudioServer
 
 
 class TestSynths(unittest.TestCase):
-    """Test cases for the Synth objects"""
-
-    def setUp(self):
-        """Setup an audioserver"""
-        self.audioserver = AudioServer()
+    """Test cases for the spectrum of every Synth subclass at 48kHz"""
 
     def test_sine_harmonics(self):
-        """Test the sine harmonics, should just be 1"""
-        adsr = Adsr()
-        sine = SineWave(100, adsr)
-        self.assertEqual(sine.get_harmonics(), 100)
+        """Test the sine harmonics, should just be the fundamental"""
+        self.assertEqual(SineWave.spectrum(100, 48000), ([100], [1.0]))
 
     def test_square_harmonics(self):
         """Test the square wave harmonics, should be odd harmonics up until the nyquist limit
-        w/amplitude of 1/n"""
-        adsr = Adsr()
-        square = SquareWave(1000, adsr)
+        of the top of the octave band 880-1760Hz w/amplitude of 1/n"""
         self.assertEqual(
-            square.get_harmonics(),
+            SquareWave.spectrum(1000, 48000),
             (
-                [
-                    1000,
-                    3000,
-                    5000,
-                    7000,
-                    9000,
-                    11000,
-                    13000,
-                    15000,
-                    17000,
-                    19000,
-                    21000,
-                    23000,
-                ],
+                [1000, 3000, 5000, 7000, 9000, 11000, 13000],
                 [
                     1.0,
                     0.3333333333333333,
@@ -52,24 +29,17 @@ class TestSynths(unittest.TestCase):
                     0.1111111111111111,
                     0.09090909090909091,
                     0.07692307692307693,
-                    0.06666666666666667,
-                    0.058823529411764705,
-                    0.05263157894736842,
-                    0.047619047619047616,
-                    0.043478260869565216,
                 ],
             ),
         )
 
     def test_triangle_harmonics(self):
-        """Test the square wave harmonics, should be odd harmonics up until the nyquist limit
-        w/amplitude of 1/n^2"""
-        adsr = Adsr()
-        triangle = TriangleWave(1000, adsr)
+        """Test the triangle wave harmonics, should be odd harmonics up until the nyquist limit
+        of the top of the octave band 880-1760Hz w/amplitude of 1/n^2"""
         self.assertEqual(
-            triangle.get_harmonics(),
+            TriangleWave.spectrum(1000, 48000),
             (
-                [1000, 3000, 5000, 7000, 9000, 11000, 13000, 15000, 17000, 19000],
+                [1000, 3000, 5000, 7000, 9000, 11000, 13000],
                 [
                     1.0,
                     0.1111111111111111,
@@ -78,20 +48,15 @@ class TestSynths(unittest.TestCase):
                     0.012345679012345678,
                     0.008264462809917356,
                     0.005917159763313609,
-                    0.0044444444444444444,
-                    0.0034602076124567475,
-                    0.002770083102493075,
                 ],
             ),
         )
 
     def test_sawtooth_harmonics(self):
-        """Test the square wave harmonics, should be all harmonics up until the nyquist limit
-        w/amplitude of 1/n"""
-        adsr = Adsr()
-        saw = SawtoothWave(1000, adsr)
+        """Test the sawtooth wave harmonics, should be all harmonics up until the nyquist limit
+        of the top of the octave band 880-1760Hz w/amplitude of 1/n"""
         self.assertEqual(
-            saw.get_harmonics(),
+            SawtoothWave.spectrum(1000, 48000),
             (
                 [
                     1000,
@@ -107,17 +72,6 @@ class TestSynths(unittest.TestCase):
                     11000,
                     12000,
                     13000,
-                    14000,
-                    15000,
-                    16000,
-                    17000,
-                    18000,
-                    19000,
-                    20000,
-                    21000,
-                    22000,
-                    23000,
-                    24000,
                 ],
                 [
                     1.0,
@@ -133,42 +87,10 @@ class TestSynths(unittest.TestCase):
                     0.09090909090909091,
                     0.08333333333333333,
                     0.07692307692307693,
-                    0.07142857142857142,
-                    0.06666666666666667,
-                    0.0625,
-                    0.058823529411764705,
-                    0.05555555555555555,
-                    0.05263157894736842,
-                    0.05,
-                    0.047619047619047616,
-                    0.045454545454545456,
-                    0.043478260869565216,
-                    0.041666666666666664,
                 ],
             ),
         )
 
-    def test_adsr(self):
-        """Tests applying an ADSR on the synth"""
-        adsr = Adsr()
-        sine = SineWave(100, adsr)
-        self.assertNotEqual(sine.adsr, None, "Test that adsr is accepted")
-
-    def test_invalid_adsr(self):
-        """Tests applying an invalid ADSR"""
-        adsr = 5.0
-        self.assertRaises(ValueError, SineWave, 100, adsr)
-
-    def test_set_outside_freq(self):
-        """Test setting a frequency outside the range"""
-        adsr = Adsr()
-        sine = SineWave(440, adsr)
-        with self.assertRaises(ValueError):
-            sine.freq = 400000
-
-        with self.assertRaises(ValueError):
-            sine.freq = -100
-
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,124 @@
+"""Test for the multi-stream voice bank"""
+import os
+import tempfile
+import unittest
+import numpy as np
+from pyo import NewTable, TableRec
+from pyo.lib._core import Mix
+from src.audioserver import AudioServer
+from src.voicebank import VoiceBank
+from src.voicepool import default_adsr
+from src.waveforms.sawtoothwave import SawtoothWave
+from src.waveforms.sinewave import SineWave
+from src.waveforms.wavetables import clear_tables, num_cached_tables
+
+
+class TestVoiceBank(unittest.TestCase):
+    """Test one oscillator playing every voice on an offline server"""
+
+    def setUp(self):
+        """Bank of 4 sine voices"""
+        self.server = AudioServer(offline=True)
+        self.adsrs = [default_adsr() for _ in range(4)]
+        self.bank = VoiceBank(SineWave, self.adsrs)
+
+    def render(self, duration):
+        """Runs the server for duration seconds"""
+        with tempfile.TemporaryDirectory() as directory:
+            self.server.record(os.path.join(directory, "bank.wav"), duration)
+            self.server.play()
+
+    def test_one_stream_per_voice(self):
+        """The bank is one oscillator with a stream per voice"""
+        self.assertEqual(len(self.bank), 4)
+        self.assertEqual(len(self.bank.get_output()), 4)
+
+    def test_set_freqs(self):
+        """Retuning changes the tables only for voices that change octave band"""
+        table = self.bank.get_output().table
+        self.bank.set_freqs([0, 1], [450.0, 460.0])
+        self.assertEqual(self.bank.freqs.tolist(), [450.0, 460.0, 440.0, 440.0])
+        self.assertIs(self.bank.get_output().table, table)
+        self.bank.set_waveform(SawtoothWave)
+        saw = self.bank.get_output()
+        self.bank.set_freq(2, 4000.0)
+        self.assertEqual(self.bank.bands.tolist(), [4, 4, 7, 4])
+        self.assertLess(saw.table[2].order, saw.table[0].order)
+        with self.assertRaises(ValueError):
+            self.bank.set_freq(0, 30000.0)
+
+    def test_tables_built_ahead(self):
+        """Every band's table is built with the bank, retuning only looks them up"""
+        clear_tables()
+        bank = VoiceBank(SawtoothWave, [default_adsr() for _ in range(2)])
+        built = num_cached_tables()
+        bank.set_freqs([0, 1], [30.0, 20000.0])
+        self.assertEqual(bank.bands.tolist(), [0, 9])
+        self.assertEqual(num_cached_tables(), built)
+
+    def test_set_waveform(self):
+        """A new oscillator is made and the previous one is returned"""
+        previous = self.bank.get_output()
+        self.assertIs(self.bank.set_waveform(SawtoothWave), previous)
+        self.assertIsNot(self.bank.get_output(), previous)
+        self.assertEqual(len(self.bank.get_output()), 4)
+
+    def test_only_played_voices_sound(self):
+        """Voices are silent until they are played"""
+        recording = NewTable(0.1)
+        recorder = TableRec(Mix(self.bank.get_output(), 1), recording).play()
+        self.bank.set_freq(1, 1000.0)
+        self.bank.play(1)
+        self.assertEqual(self.bank.playing.tolist(), [False, True, False, False])
+        self.render(0.1)
+        recorder.stop()
+        samples = np.array(recording.getTable())
+        self.assertAlmostEqual(np.abs(samples).max(), 0.2, places=2)
+        spectrum = np.abs(np.fft.rfft(samples[2400:]))
+        freqs = np.fft.rfftfreq(len(samples[2400:]), 1 / 48000)
+        self.assertAlmostEqual(freqs[np.argmax(spectrum)], 1000.0, delta=20)
+
+    def test_silent_voices_sleep(self):
+        """Voices sleep once their release is over and wake up on their next note"""
+        self.adsrs[0].setRelease(10.0)
+        self.bank.play(0)
+        self.bank.play(1)
+        self.render(0.1)
+        self.bank.stop(0)
+        self.bank.stop(1)
+        self.render(0.2)
+        # Voice 0 is still releasing, voice 1 finished and voices 2 and 3 never played
+        self.assertEqual(self.bank.awake.tolist(), [True, False, False, False])
+        recording = NewTable(0.1)
+        recorder = TableRec(Mix(self.bank.get_output(), 1), recording).play()
+        self.bank.set_freq(1, 1000.0)
+        self.bank.play(1)
+        self.assertTrue(self.bank.awake[1])
+        self.render(0.1)
+        recorder.stop()
+        self.assertTrue(self.bank.awake[1])
+        self.assertGreater(np.abs(np.array(recording.getTable())).max(), 0.1)
+
+    def test_voice_played_while_sleeping(self):
+        """A voice played after the released voices are listed is not put to sleep"""
+        level = self.adsrs[0].get
+
+        def play_while_read():
+            self.bank.play(0)
+            return level()
+
+        self.adsrs[0].get = play_while_read
+        self.bank.sleep_silent()
+        self.assertEqual(self.bank.awake.tolist(), [True, False, False, False])
+
+    def test_sleeping_voices_stay_asleep_on_waveform_change(self):
+        """The new oscillator only processes the voices that are awake"""
+        self.render(0.1)
+        self.assertFalse(self.bank.awake.any())
+        self.bank.set_waveform(SawtoothWave)
+        self.bank.play(2)
+        self.assertEqual(self.bank.awake.tolist(), [False, False, True, False])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,178 @@
+"""Test for the voice pool"""
+import unittest
+from src.voicepool import VoicePool, STEAL_OLDEST, STEAL_QUIETEST
+
+
+class FakeAdsr:
+    """Stands in for a pyo Adsr so the pool can be tested without a server"""
+
+    def __init__(self):
+        """Constructor"""
+        self.level = 0.0
+        self.params = {}
+        self.applied = 0
+
+    def get(self):
+        """Current amplitude of the envelope"""
+        return self.level
+
+    def setAttack(self, value):  # pylint: disable=invalid-name
+        """Counts every time the pool copies the shared parameters"""
+        self.params["attack"] = value
+        self.applied += 1
+
+    def setDecay(self, value):  # pylint: disable=invalid-name
+        """Set the decay"""
+        self.params["decay"] = value
+
+    def setSustain(self, value):  # pylint: disable=invalid-name
+        """Set the sustain"""
+        self.params["sustain"] = value
+
+    def setRelease(self, value):  # pylint: disable=invalid-name
+        """Set the release"""
+        self.params["release"] = value
+
+
+class FakeSynth:
+    """Stands in for a Synth subclass, only the bank uses it"""
+
+
+class FakeBank:
+    """Stands in for a VoiceBank"""
+
+    def __init__(self, synth_class, adsrs):
+        """Constructor"""
+        self.synth_class = synth_class
+        self.freqs = [440.0] * len(adsrs)
+        self.playing = [False] * len(adsrs)
+        self.retunes = 0
+
+    def set_freq(self, index, freq):
+        """Retune one voice"""
+        self.set_freqs([index], [freq])
+
+    def set_freqs(self, indices, freqs):
+        """Retune voices, counting the calls"""
+        self.retunes += 1
+        for index, freq in zip(indices, freqs):
+            self.freqs[index] = freq
+
+    def play(self, index):
+        """Start the note"""
+        self.playing[index] = True
+
+    def stop(self, index):
+        """Stop the note"""
+        self.playing[index] = False
+
+
+def make_pool(num_voices, steal_mode=STEAL_OLDEST):
+    """Pool of fake envelopes and a fake bank"""
+    return VoicePool(
+        FakeSynth, num_voices, steal_mode, adsr_factory=FakeAdsr, bank_factory=FakeBank
+    )
+
+
+class TestVoicePool(unittest.TestCase):
+    """Test the voice allocation and stealing"""
+
+    def test_note_on_retunes_voice(self):
+        """A note on retunes a free voice and plays it"""
+        pool = make_pool(4)
+        index = pool.note_on("a", 550.0)
+        self.assertEqual(pool.bank.freqs[index], 550.0)
+        self.assertTrue(pool.bank.playing[index])
+
+    def test_voice_count_independent_of_notes(self):
+        """Playing more notes than voices never creates more voices"""
+        pool = make_pool(3)
+        for i in range(10):
+            pool.note_on(i, 440.0 + i)
+        self.assertEqual(pool.num_voices, 3)
+        self.assertEqual(len(pool.get_active_keys()), 3)
+
+    def test_steal_oldest(self):
+        """The oldest note is stolen when all voices are held"""
+        pool = make_pool(2)
+        first = pool.note_on("a", 440.0)
+        pool.note_on("b", 480.0)
+        stolen = pool.note_on("c", 500.0)
+        self.assertEqual(first, stolen)
+        self.assertEqual(sorted(pool.get_active_keys()), ["b", "c"])
+
+    def test_steal_quietest(self):
+        """The quietest note is stolen when all voices are held"""
+        pool = make_pool(2, STEAL_QUIETEST)
+        first = pool.note_on("a", 440.0)
+        second = pool.note_on("b", 480.0)
+        pool.adsrs[first].level = 0.2
+        pool.adsrs[second].level = 0.05
+        self.assertEqual(pool.note_on("c", 500.0), second)
+
+    def test_note_off_frees_voice(self):
+        """Releasing a key stops its voice and makes it available again"""
+        pool = make_pool(1)
+        index = pool.note_on("a", 440.0)
+        pool.note_off("a")
+        self.assertFalse(pool.bank.playing[index])
+        self.assertEqual(pool.get_active_keys(), [])
+        # Releasing a key that is not held is ignored
+        pool.note_off("b")
+
+    def test_retrigger_same_key(self):
+        """Pressing a held key again reuses its voice"""
+        pool = make_pool(2)
+        self.assertEqual(pool.note_on("a", 440.0), pool.note_on("a", 440.0))
+
+    def test_retune_held_keys(self):
+        """Every held key is retuned in one call and keys that are not held are ignored"""
+        pool = make_pool(4)
+        first = pool.note_on("a", 440.0)
+        second = pool.note_on("b", 480.0)
+        retunes = pool.bank.retunes
+        pool.retune({"a": 450.0, "b": 490.0, "c": 500.0})
+        self.assertEqual(pool.bank.retunes, retunes + 1)
+        self.assertEqual(pool.bank.freqs[first], 450.0)
+        self.assertEqual(pool.bank.freqs[second], 490.0)
+
+    def test_polyphony_limit(self):
+        """Lowering the polyphony releases the notes above it and steals within it"""
+        pool = make_pool(4)
+        for key in "abcd":
+            pool.note_on(key, 440.0)
+        pool.set_polyphony(2)
+        self.assertEqual(pool.get_active_keys(), ["a", "b"])
+        self.assertLess(pool.note_on("e", 440.0), 2)
+        self.assertEqual(pool.num_active, 2)
+        self.assertRaises(ValueError, pool.set_polyphony, 5)
+
+    def test_invalid_pool(self):
+        """Invalid voice counts and stealing modes throw errors"""
+        self.assertRaises(ValueError, make_pool, 0)
+        self.assertRaises(ValueError, make_pool, 2, "loudest")
+
+    def test_envelope_applied_lazily(self):
+        """Changing the envelope touches no voice until it is played again"""
+        pool = make_pool(4)
+        index = pool.note_on("a", 440.0)
+        pool.note_off("a")
+        pool.envelope.update(attack=0.5)
+        pool.envelope.update(attack=1.0, release=2.0)
+        self.assertEqual(sum(adsr.applied for adsr in pool.adsrs), 1)
+        played = pool.adsrs[pool.note_on("b", 440.0)]
+        self.assertEqual(played.params["attack"], 1.0)
+        self.assertEqual(played.params["release"], 2.0)
+        self.assertNotEqual(pool.adsrs[index].params.get("attack"), 1.0)
+
+    def test_invalid_envelope_param(self):
+        """Unknown or negative envelope parameters are rejected"""
+        pool = make_pool(1)
+        with self.assertRaises(ValueError):
+            pool.envelope.update(hold=1.0)
+        with self.assertRaises(ValueError):
+            pool.envelope.update(attack=-1.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
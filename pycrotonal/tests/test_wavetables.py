@@ -0,0 +1,74 @@
+"""Test for the shared wavetable bank"""
+import unittest
+from src.waveforms import wavetables
+from src.waveforms.wavetables import (
+    get_table,
+    clear_tables,
+    num_cached_tables,
+    octave_band,
+    band_harmonics,
+)
+
+
+class FakeTable:
+    """Stands in for a pyo table so the bank can be tested without a server"""
+
+    built = 0
+
+    def __init__(self, order, size):
+        """Constructor, counts how many tables were built"""
+        FakeTable.built += 1
+        self.order = order
+        self.size = size
+
+
+class TestWavetables(unittest.TestCase):
+    """Test the wavetable bank"""
+
+    def setUp(self):
+        """Start every test with an empty bank"""
+        clear_tables()
+        FakeTable.built = 0
+
+    def test_tables_are_shared(self):
+        """Asking for the same table twice only builds it once"""
+        first = get_table(FakeTable, 25)
+        second = get_table(FakeTable, 25)
+        self.assertIs(first, second)
+        self.assertEqual(FakeTable.built, 1)
+
+    def test_tables_keyed_by_order_and_size(self):
+        """Different orders and sizes are different tables"""
+        get_table(FakeTable, 25)
+        get_table(FakeTable, 20)
+        get_table(FakeTable, 25, 1024)
+        self.assertEqual(num_cached_tables(), 3)
+
+    def test_least_recently_used_evicted(self):
+        """The bank never holds more than MAX_CACHED_TABLES"""
+        first = get_table(FakeTable, 0)
+        for order in range(1, wavetables.MAX_CACHED_TABLES + 1):
+            get_table(FakeTable, order)
+        self.assertEqual(num_cached_tables(), wavetables.MAX_CACHED_TABLES)
+        self.assertIsNot(get_table(FakeTable, 0), first)
+
+    def test_octave_bands(self):
+        """Bands start at A0 and double every octave, anything lower is in the first band"""
+        self.assertEqual(octave_band(10), 0)
+        self.assertEqual(octave_band(54.9), 0)
+        self.assertEqual(octave_band(440), 4)
+        self.assertEqual(octave_band(879.9), 4)
+        self.assertEqual(octave_band(880), 5)
+
+    def test_band_harmonics_below_nyquist(self):
+        """Every harmonic of a band's table stays below nyquist at the top of the band"""
+        for band in range(10):
+            highest = band_harmonics(band, 48000)
+            top = wavetables.LOWEST_BAND_FREQ * 2 ** (band + 1)
+            self.assertTrue(highest == 1 or highest * top <= 24000)
+        self.assertEqual(band_harmonics(4, 48000), 27)
+        self.assertEqual(band_harmonics(0, 48000, 1024), 256)
+
+
+if __name__ == "__main__":
+    unittest.main()